@@ -0,0 +1,21 @@
+# ==============================================
+#  CRIAÇÃO DO APLICATIVO (APP FACTORY)
+# ==============================================
+from flask import Flask
+from flask_cors import CORS
+import config
+
+
+def criar_app(objeto_config=config):
+    """
+    Cria o app Flask com a configuração de config.py e registra as rotas de view.py.
+    Não inicia threads de fundo: cada processo chama view.iniciar_servicos() depois do fork
+    (gunicorn.conf.py) ou na inicialização (main.py, servidor de desenvolvimento).
+    """
+    app = Flask(__name__)
+    app.config.from_object(objeto_config)
+    CORS(app, resources={r"/*": {"origins": "*"}})  # Permite CORS (origem cruzada) em todas as rotas
+
+    from view import api  # Importado aqui: view.py cria o pool e os caches do processo
+    app.register_blueprint(api)
+    return app
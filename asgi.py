@@ -0,0 +1,93 @@
+"""
+Ponto de entrada ASGI (modo asyncio) para tráfego de leitura com muitas conexões simultâneas.
+
+    hypercorn asgi:app --bind 0.0.0.0:5000 --workers 2
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
+
+GET /produtos, /produto/<id>, /carrinho/<email>, /vendas, /cashbacks, /eventos e /eventos/stream
+são atendidas pelas rotas assíncronas de view_async.py. As demais rotas vão para o app Flask (o mesmo de wsgi.py), rodando
+em threads pelo asgiref; sem o asgiref instalado, só as rotas assíncronas ficam disponíveis.
+"""
+from quart import Quart, request
+from werkzeug.exceptions import NotFound, MethodNotAllowed
+from werkzeug.routing import RequestRedirect
+import config
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:  # Sem asgiref: serve só as rotas assíncronas
+    WsgiToAsgi = None
+
+# Métodos anunciados no preflight (os mesmos que o flask_cors anuncia por padrão)
+METODOS_CORS = ('GET', 'HEAD', 'POST', 'OPTIONS', 'PUT', 'PATCH', 'DELETE')
+
+
+def criar_app_assincrono(objeto_config=config):
+    """Cria o app Quart com as rotas de view_async.py."""
+    app = Quart(__name__, static_folder=None)  # Arquivos estáticos ficam com o app Flask (ETag/cache)
+    app.config.from_object(objeto_config)
+
+    from view import iniciar_servicos, compactador_resumos, recarregador_busca, feed_eventos, servico_hash, fila_jobs
+    from view_async import api_async, pool_async
+    app.register_blueprint(api_async)
+
+    @app.before_serving
+    async def iniciar():
+        # Cada worker do hypercorn/uvicorn é um processo próprio: sobe as threads de fundo aqui
+        # (as rotas de jobs também rodam aqui, pelo app Flask; a fila garante um dono só por job)
+        iniciar_servicos()
+
+    @app.after_serving
+    async def encerrar():
+        compactador_resumos.parar()
+        recarregador_busca.parar()
+        feed_eventos.parar()
+        servico_hash.fechar()
+        fila_jobs.fechar()
+        pool_async.fechar()
+
+    @app.after_request
+    async def cors(resposta):
+        # Mesmo CORS do app Flask (flask_cors, origins='*'), inclusive no preflight: sem Allow-Headers
+        # o navegador não envia Authorization nem If-None-Match para as rotas assíncronas
+        resposta.headers['Access-Control-Allow-Origin'] = '*'
+        if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+            resposta.headers['Access-Control-Allow-Methods'] = ', '.join(METODOS_CORS)
+            pedidos = request.headers.get('Access-Control-Request-Headers')
+            if pedidos:
+                resposta.headers['Access-Control-Allow-Headers'] = pedidos  # Aceita os cabeçalhos pedidos
+        return resposta
+
+    return app
+
+
+class Despachante:
+    """
+    App ASGI que manda cada requisição HTTP para o app assíncrono, se ele tem a rota,
+    ou para o app Flask (WSGI) nos demais casos. Lifespan (startup/shutdown) vai para o assíncrono.
+    """
+
+    def __init__(self, app_assincrono, app_wsgi):
+        self.app_assincrono = app_assincrono
+        self.app_wsgi = app_wsgi
+        self._rotas = app_assincrono.url_map.bind('localhost')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and self.app_wsgi is not None and not self._assincrona(scope):
+            return await self.app_wsgi(scope, receive, send)
+        return await self.app_assincrono(scope, receive, send)
+
+    def _assincrona(self, scope):
+        try:
+            self._rotas.match(scope['path'], method=scope['method'])
+            return True
+        except (NotFound, MethodNotAllowed, RequestRedirect):
+            return False
+
+
+app_assincrono = criar_app_assincrono()
+if WsgiToAsgi is not None:
+    from aplicacao import criar_app
+    app = Despachante(app_assincrono, WsgiToAsgi(criar_app()))
+else:
+    app = app_assincrono
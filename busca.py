@@ -0,0 +1,230 @@
+# ==============================================
+#  BUSCA DE PRODUTOS (ÍNDICE INVERTIDO EM MEMÓRIA)
+# ==============================================
+import unicodedata
+import threading
+import logging
+import bisect
+import re
+
+# Campos indexados e o peso de cada um na pontuação
+PESOS = {'nome': 3, 'marca': 2, 'descricao': 1}
+# Colunas lidas do banco para montar o índice (e devolvidas nos resultados)
+SQL_PRODUTOS_BUSCA = "SELECT ID, NOME, DESCRICAO, MARCA, PRECO, IMAGEM FROM PRODUTOS"
+TOKEN = re.compile(r'[0-9a-z]+')
+
+
+def normalizar(texto):
+    """Separa o texto em termos sem acento e em minúsculas: 'Óleo Câmbio' -> ['oleo', 'cambio']."""
+    if not texto:
+        return []
+    sem_acento = ''.join(c for c in unicodedata.normalize('NFKD', str(texto)) if not unicodedata.combining(c))
+    return TOKEN.findall(sem_acento.casefold())
+
+
+class IndiceBusca:
+    """
+    Índice invertido (termo -> IDs de produtos) sobre NOME, MARCA e DESCRICAO.
+    - Os termos ficam também numa lista ordenada, então um prefixo ('pasti') vira uma faixa contígua
+      encontrada por busca binária: é o que permite o autocompletar.
+    - Todos os termos da consulta precisam aparecer no produto, inteiros ou como começo de uma palavra
+      (palavras inteiras pontuam mais).
+    - atualizar()/remover() mantêm o índice em dia a cada escrita; reconstruir() relê tudo do banco
+      (pega as mudanças feitas por outros workers).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vazio()
+        self.pronto = False  # True depois da primeira carga completa
+        self._pendentes = None  # Mudanças feitas durante uma reconstrução (reaplicadas no fim)
+
+    # ---------- escrita ----------
+    def atualizar(self, produto):
+        """Indexa (ou reindexa) um produto: dict com id, nome, descricao, marca, preco e imagem."""
+        with self._lock:
+            self._atualizar(produto)
+            if self._pendentes is not None:
+                self._pendentes.append(('atualizar', produto))
+
+    def remover(self, id_produto):
+        with self._lock:
+            self._remover(int(id_produto))
+            if self._pendentes is not None:
+                self._pendentes.append(('remover', int(id_produto)))
+
+    def iniciar_reconstrucao(self):
+        """
+        Passa a registrar as escritas para reaplicar no índice novo. Chamar ANTES da consulta que lê os
+        produtos: uma escrita confirmada depois que a consulta começou não aparece no resultado dela.
+        """
+        with self._lock:
+            self._pendentes = []
+
+    def cancelar_reconstrucao(self):
+        with self._lock:
+            self._pendentes = None
+
+    def reconstruir(self, produtos):
+        """
+        Monta um índice novo com `produtos` (iterável de dicts, pode vir do banco aos poucos) e troca de uma vez.
+        As buscas continuam usando o índice antigo enquanto isso.
+        """
+        with self._lock:
+            if self._pendentes is None:  # Sem iniciar_reconstrucao(): registra a partir daqui
+                self._pendentes = []
+        novo = IndiceBusca()
+        try:
+            for produto in produtos:
+                novo._atualizar(produto, manter_termos=False)
+        except Exception:
+            self.cancelar_reconstrucao()
+            raise
+        novo._termos = sorted(novo._postagens)  # Uma ordenação no fim, em vez de um insort por termo
+        with self._lock:
+            for operacao, valor in self._pendentes:  # Escritas que aconteceram durante a leitura do banco
+                if operacao == 'atualizar':
+                    novo._atualizar(valor)
+                else:
+                    novo._remover(valor)
+            self._documentos, self._postagens, self._termos = novo._documentos, novo._postagens, novo._termos
+            self._pendentes = None
+            self.pronto = True
+
+    # ---------- leitura ----------
+    def buscar(self, consulta, limite=20):
+        """Retorna (total de produtos encontrados, melhores `limite` resultados)."""
+        termos = normalizar(consulta)
+        if not termos:
+            return 0, []
+        with self._lock:
+            candidatos = None
+            for termo in termos:
+                ids = self._ids_com_prefixo(termo)
+                candidatos = ids if candidatos is None else candidatos & ids
+                if not candidatos:
+                    return 0, []
+            pontuados = [(self._pontuar(self._documentos[i], termos), i) for i in candidatos]
+            melhores = sorted(pontuados, key=lambda p: (-p[0], len(self._documentos[p[1]]['produto']['nome']), p[1]))
+            return len(pontuados), [self._documentos[i]['produto'] for _, i in melhores[:limite]]
+
+    def estatisticas(self):
+        with self._lock:
+            return {"pronto": self.pronto, "produtos": len(self._documentos), "termos": len(self._termos)}
+
+    # ---------- auxiliares internos ----------
+    def _vazio(self):
+        self._documentos = {}  # id -> {'produto': resumo, 'campos': {campo: set(termos)}}
+        self._postagens = {}  # termo -> set(ids)
+        self._termos = []  # Todos os termos, em ordem (para busca por prefixo)
+
+    def _atualizar(self, produto, manter_termos=True):
+        """`manter_termos=False` não mexe na lista ordenada (a reconstrução a monta de uma vez no fim)."""
+        id_produto = int(produto['id'])
+        self._remover(id_produto, manter_termos)
+        campos = {campo: set(normalizar(produto.get(campo))) for campo in PESOS}
+        resumo = {
+            'id': id_produto,
+            'nome': produto.get('nome') or '',
+            'marca': produto.get('marca'),
+            'preco': float(produto['preco']) if produto.get('preco') is not None else None,
+            'imagem': produto.get('imagem'),
+        }
+        self._documentos[id_produto] = {'produto': resumo, 'campos': campos}
+        for termo in set().union(*campos.values()):
+            ids = self._postagens.get(termo)
+            if ids is None:
+                ids = self._postagens[termo] = set()
+                if manter_termos:
+                    bisect.insort(self._termos, termo)
+            ids.add(id_produto)
+
+    def _remover(self, id_produto, manter_termos=True):
+        documento = self._documentos.pop(id_produto, None)
+        if documento is None:
+            return
+        for termo in set().union(*documento['campos'].values()):
+            ids = self._postagens.get(termo)
+            if ids is None:
+                continue
+            ids.discard(id_produto)
+            if not ids:
+                del self._postagens[termo]
+                if manter_termos:
+                    del self._termos[bisect.bisect_left(self._termos, termo)]
+
+    def _ids_com_prefixo(self, prefixo):
+        ids = set()
+        posicao = bisect.bisect_left(self._termos, prefixo)
+        while posicao < len(self._termos) and self._termos[posicao].startswith(prefixo):
+            ids |= self._postagens[self._termos[posicao]]
+            posicao += 1
+        return ids
+
+    @staticmethod
+    def _pontuar(documento, termos):
+        """Soma, para cada termo da consulta, o peso do melhor campo onde aparece (palavra inteira vale o dobro)."""
+        total = 0
+        for termo in termos:
+            melhor = 0
+            for campo, peso in PESOS.items():
+                palavras = documento['campos'][campo]
+                if termo in palavras:
+                    melhor = max(melhor, peso * 2)
+                elif any(p.startswith(termo) for p in palavras):
+                    melhor = max(melhor, peso)
+            total += melhor
+        return total
+
+
+class RecarregadorIndice:
+    """Thread de fundo que carrega o índice ao iniciar e o reconstrói do banco a cada `intervalo` segundos."""
+
+    def __init__(self, indice, pool, intervalo=300, lote=1000):
+        self.indice = indice
+        self.pool = pool
+        self.intervalo = intervalo
+        self.lote = lote
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name='indice-busca', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def recarregar(self):
+        self.indice.iniciar_reconstrucao()  # Antes do SELECT: o que for gravado durante a leitura é reaplicado
+        con = self.pool.obter()
+        cursor = con.cursor()
+        try:
+            cursor.execute(SQL_PRODUTOS_BUSCA)
+            self.indice.reconstruir(self._linhas(cursor))
+        except Exception:
+            self.indice.cancelar_reconstrucao()
+            raise
+        finally:
+            cursor.close()
+            con.close()
+
+    def _linhas(self, cursor):
+        while True:
+            linhas = cursor.fetchmany(self.lote)
+            if not linhas:
+                return
+            for id_produto, nome, descricao, marca, preco, imagem in linhas:
+                yield {'id': id_produto, 'nome': nome, 'descricao': descricao, 'marca': marca,
+                       'preco': preco, 'imagem': imagem}
+
+    def _loop(self):
+        while True:
+            try:
+                self.recarregar()
+            except Exception as e:
+                logging.warning(f"Carga do índice de busca adiada: {str(e)}")
+            if self._parar.wait(self.intervalo if self.indice.pronto else min(self.intervalo, 10)):
+                return
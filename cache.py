@@ -0,0 +1,95 @@
+# ==============================================
+#  CACHE EM MEMÓRIA (TTL + LRU)
+# ==============================================
+import threading
+import time
+import collections
+
+
+class CacheLRU:
+    """
+    Cache thread-safe com expiração por tempo (TTL) e descarte do item
+    menos usado (LRU) quando passa do tamanho máximo.
+    Conta acertos, falhas e descartes para ajudar a dimensionar o cache.
+    Com `peso_max`, também limita a soma dos pesos (ex: bytes) dos itens guardados.
+    """
+
+    def __init__(self, tamanho_max=1024, ttl=300, peso_max=None):
+        self.tamanho_max = tamanho_max  # Máximo de itens guardados
+        self.ttl = ttl  # Segundos de validade de cada item
+        self.peso_max = peso_max  # Máximo da soma dos pesos (None = sem limite)
+        self.peso_total = 0
+        self._itens = collections.OrderedDict()  # chave -> (expira_em, valor, peso)
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0  # Itens removidos por falta de espaço
+        self.expirados = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor guardado ou `padrao` se não existir/estiver expirado."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return padrao
+            if item[0] <= time.monotonic():
+                del self._itens[chave]
+                self.peso_total -= item[2]
+                self.expirados += 1
+                self.falhas += 1
+                return padrao
+            self._itens.move_to_end(chave)  # Marca como usado recentemente
+            self.acertos += 1
+            return item[1]
+
+    def guardar(self, chave, valor, ttl=None, peso=0):
+        """Guarda um valor; `ttl` sobrescreve a validade padrão e `peso` conta para o `peso_max`."""
+        if self.peso_max is not None and peso > self.peso_max:
+            return  # Maior que o cache inteiro: não vale a pena guardar
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.peso_total -= anterior[2]
+            self._itens[chave] = (expira_em, valor, peso)
+            self.peso_total += peso
+            while len(self._itens) > self.tamanho_max or (
+                    self.peso_max is not None and self.peso_total > self.peso_max):
+                _, item = self._itens.popitem(last=False)  # Remove o menos usado
+                self.peso_total -= item[2]
+                self.descartes += 1
+
+    def remover(self, chave):
+        """Invalida uma chave específica."""
+        with self._lock:
+            item = self._itens.pop(chave, None)
+            if item is not None:
+                self.peso_total -= item[2]
+                self.invalidacoes += 1
+
+    def limpar(self):
+        """Invalida todas as chaves."""
+        with self._lock:
+            self.invalidacoes += len(self._itens)
+            self._itens.clear()
+            self.peso_total = 0
+
+    def estatisticas(self):
+        """Retorna os contadores do cache."""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "tamanho_max": self.tamanho_max,
+                "ttl": self.ttl,
+                "peso_total": self.peso_total,
+                "peso_max": self.peso_max,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+                "descartes": self.descartes,
+                "expirados": self.expirados,
+                "invalidacoes": self.invalidacoes,
+            }
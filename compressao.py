@@ -0,0 +1,82 @@
+# ==============================================
+#  COMPRESSÃO DAS RESPOSTAS (GZIP / BROTLI)
+# ==============================================
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Sem o pacote brotli: só gzip
+    brotli = None
+
+COMPRESSAO_MINIMO = 1024  # Respostas menores que isso (bytes) vão sem compressão: não compensa a CPU
+GZIP_NIVEL = 6
+BROTLI_QUALIDADE = 5  # 0 a 11; acima de ~6 fica caro demais para conteúdo gerado a cada requisição
+
+# Tipos que valem a pena comprimir (imagens, PDF, gzip, Parquet... já são compactados)
+TIPOS_COMPRESSIVEIS = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+# Nunca comprimidos: o SSE manda um evento por vez, e proxies e EventSource lidam mal com ele compactado
+TIPOS_NAO_COMPRESSIVEIS = {'text/event-stream'}
+
+
+def codificacoes_suportadas():
+    """Em ordem de preferência do servidor (em empate no Accept-Encoding, brotli comprime melhor)."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compressivel(mimetype):
+    if mimetype in TIPOS_NAO_COMPRESSIVEIS:
+        return False
+    return mimetype in TIPOS_COMPRESSIVEIS or (mimetype or '').startswith('text/')
+
+
+def comprimir(dados, codificacao):
+    """Comprime um corpo inteiro."""
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=BROTLI_QUALIDADE)
+    compressor = zlib.compressobj(GZIP_NIVEL, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    return compressor.compress(dados) + compressor.flush()
+
+
+class CompressorStream:
+    """
+    Comprime uma resposta em streaming pedaço por pedaço.
+    Cada pedaço é descarregado (flush) ao final, para o cliente receber os dados sem esperar o fim.
+    """
+
+    def __init__(self, codificacao):
+        self.codificacao = codificacao
+        if codificacao == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALIDADE)
+        else:
+            self._compressor = zlib.compressobj(GZIP_NIVEL, zlib.DEFLATED, 31)
+
+    def pedaco(self, dados):
+        if isinstance(dados, str):
+            dados = dados.encode('utf-8')
+        if self.codificacao == 'br':
+            return self._compressor.process(dados) + self._compressor.flush()
+        return self._compressor.compress(dados) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def fim(self):
+        if self.codificacao == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def comprimir_pedacos(pedacos, codificacao):
+    """
+    Gerador: comprime os pedaços de uma resposta em streaming.
+    Repassa o close() para `pedacos`: se o cliente desconecta no meio, o gerador de dentro fecha na hora
+    (e devolve a conexão e o cursor do pool) em vez de esperar o coletor de lixo.
+    """
+    compressor = CompressorStream(codificacao)
+    try:
+        for dados in pedacos:
+            comprimido = compressor.pedaco(dados)
+            if comprimido:
+                yield comprimido
+        yield compressor.fim()
+    finally:
+        fechar = getattr(pedacos, 'close', None)
+        if fechar is not None:
+            fechar()
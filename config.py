@@ -1,11 +1,31 @@
 import os
 
-SECRET_KEY = 'CHAVE_SECRETAS_SECRETISSIMA'
-DEBUG = True
-DB_HOST = 'localhost'
-DB_NAME = r'C:\Users\Aluno\Desktop\AUTOPRIME.FDB'
-DB_USER = 'sysdba'
-DB_PASSWORD = 'sysdba'
-
-UPLOAD_FOLDER = os.path.join(os.getcwd(), 'static/uploads')
-ID_USUARIO = 0
\ No newline at end of file
+# Configuração única do aplicativo (app Flask, pool do banco e servidor em gunicorn.conf.py).
+# Em produção, cada valor pode ser trocado pela variável de ambiente AUTOPRIME_<NOME>.
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def _env(nome, padrao):
+    return os.environ.get(f"AUTOPRIME_{nome}", padrao)
+
+
+SECRET_KEY = _env('SECRET_KEY', 'CHAVE_SECRETAS_SECRETISSIMA')
+DEBUG = _env('DEBUG', '0') == '1'
+DB_HOST = _env('DB_HOST', 'localhost')
+DB_NAME = _env('DB_NAME', r'C:\Users\Aluno\Desktop\AUTOPRIME.FDB')
+DB_USER = _env('DB_USER', 'sysdba')
+DB_PASSWORD = _env('DB_PASSWORD', 'sysdba')
+DB_DSN = f"{DB_HOST}:{DB_NAME}"
+
+UPLOAD_FOLDER = _env('UPLOAD_FOLDER', os.path.join(RAIZ, 'static', 'imagens'))
+ID_USUARIO = 0
+
+# Servidor (gunicorn.conf.py)
+SERVIDOR_BIND = _env('BIND', '0.0.0.0:5000')
+SERVIDOR_WORKERS = int(_env('WORKERS', (os.cpu_count() or 1) * 2 + 1))  # Processos
+SERVIDOR_THREADS = int(_env('THREADS', 4))  # Threads por processo
+SERVIDOR_TIMEOUT = int(_env('TIMEOUT', 60))  # Segundos até um worker travado ser reiniciado
+SERVIDOR_GRACEFUL = int(_env('GRACEFUL', 30))  # Segundos para terminar as requisições em andamento no restart
+SERVIDOR_MAX_REQUISICOES = int(_env('MAX_REQUISICOES', 10000))  # Recicla o worker após N requisições (0 = nunca)
+# Processos auxiliares de CPU (hash de senha e PDFs) somando TODOS os workers; cada worker fica com uma parte
+SERVIDOR_PROCESSOS_AUXILIARES = int(_env('PROCESSOS_AUXILIARES', os.cpu_count() or 1))
@@ -0,0 +1,77 @@
+# ==============================================
+#  POOL DE CONEXÕES PARA CÓDIGO ASYNCIO
+# ==============================================
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import functools
+import asyncio
+
+from db_pool import PoolEsgotado
+
+
+class PoolAssincrono:
+    """
+    Usa o PoolConexoes (síncrono) a partir de corrotinas.
+    O fdb só tem chamadas bloqueantes: elas rodam num executor com no máximo `threads` threads,
+    e um semáforo deixa entrar no banco no máximo o tamanho do pool ao mesmo tempo.
+    Quem está esperando vaga é uma corrotina parada, não uma thread: milhares de clientes
+    conectados custam memória, não threads.
+    """
+
+    def __init__(self, pool, threads=None):
+        self.pool = pool
+        self.threads = threads or pool.tamanho_max
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='fdb-async')
+        self._semaforo = None  # Criado dentro do event loop (no primeiro uso)
+
+    async def rodar(self, funcao, *args):
+        """Roda uma chamada bloqueante no executor e espera o resultado sem travar o event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(funcao, *args))
+
+    async def executar(self, funcao, *args):
+        """
+        Empresta uma conexão e roda `funcao(cursor, *args)` inteira numa thread do executor
+        (a conexão é devolvida ao pool na mesma thread, ao final).
+        """
+        async with self._vaga():
+            return await self.rodar(self._com_cursor, funcao, args)
+
+    @contextlib.asynccontextmanager
+    async def conexao(self):
+        """
+        Empresta uma conexão por um trecho maior (ex: streaming com vários fetchmany).
+        Cada chamada bloqueante nela deve passar por rodar().
+        """
+        async with self._vaga():
+            con = await self.rodar(self.pool.obter)
+            try:
+                yield con
+            finally:
+                await self.rodar(con.close)
+
+    def fechar(self):
+        self._executor.shutdown(wait=False)
+
+    # ---------- auxiliares internos ----------
+    @contextlib.asynccontextmanager
+    async def _vaga(self):
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.pool.tamanho_max)
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), self.pool.espera_max)
+        except asyncio.TimeoutError:
+            raise PoolEsgotado(f"Nenhuma conexão livre após {self.pool.espera_max}s")
+        try:
+            yield
+        finally:
+            self._semaforo.release()
+
+    def _com_cursor(self, funcao, args):
+        con = self.pool.obter()
+        cursor = con.cursor()
+        try:
+            return funcao(cursor, *args)
+        finally:
+            cursor.close()
+            con.close()
@@ -0,0 +1,327 @@
+# ==============================================
+#  POOL DE CONEXÕES COM O FIREBIRD
+# ==============================================
+import threading
+import time
+import collections
+import logging
+
+
+class PoolEsgotado(Exception):
+    """Lançada quando nenhuma conexão fica livre dentro do tempo de espera."""
+
+
+class CursorMedido:
+    """
+    Envolve um cursor fdb e mede o tempo de execute/executemany e de cada fetch.
+    A cada chamada avisa o observador: observador(sql, parametros, segundos, fase),
+    com fase 'execute' ou 'fetch' (o fetch é atribuído ao último comando executado).
+    """
+
+    def __init__(self, cursor, observador):
+        self._cursor = cursor
+        self._observador = observador
+        self._sql = None
+        self._parametros = None
+
+    def execute(self, sql, parametros=None):
+        self._sql, self._parametros = sql, parametros
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, parametros) if parametros is not None else self._cursor.execute(sql)
+        finally:
+            self._observador(sql, parametros, time.perf_counter() - inicio, 'execute')
+
+    def executemany(self, sql, sequencia):
+        sequencia = list(sequencia)
+        self._sql, self._parametros = sql, sequencia
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, sequencia)
+        finally:
+            self._observador(sql, sequencia, time.perf_counter() - inicio, 'execute')
+
+    def fetchone(self):
+        return self._medir_fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._medir_fetch(self._cursor.fetchall)
+
+    def fetchmany(self, tamanho=None):
+        if tamanho is None:
+            return self._medir_fetch(self._cursor.fetchmany)
+        return self._medir_fetch(self._cursor.fetchmany, tamanho)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, nome):
+        # description, rowcount, close, prep etc. vêm do cursor real
+        return getattr(self._cursor, nome)
+
+    def _medir_fetch(self, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            self._observador(self._sql, self._parametros, time.perf_counter() - inicio, 'fetch')
+
+
+class ConexaoFisica:
+    """Conexão fdb aberta, guardada pelo pool entre um empréstimo e outro."""
+
+    def __init__(self, con):
+        self.con = con
+        self.criada_em = time.monotonic()  # Usado para reciclar por tempo de vida
+        self.devolvida_em = self.criada_em  # Usado para expirar conexões ociosas
+
+
+class ConexaoPool:
+    """
+    Empréstimo de uma conexão do pool: cada obter() cria um objeto novo.
+    Funciona como a conexão original, mas close() devolve a conexão ao pool
+    em vez de desconectar do banco. close() repetido (ex: a rota fecha e o teardown
+    fecha de novo) não faz nada, mesmo que a conexão física já esteja com outra thread.
+    """
+
+    def __init__(self, pool, fisica):
+        self._pool = pool
+        self._fisica = fisica
+        self._lock = threading.Lock()
+
+    @property
+    def liberada(self):
+        return self._fisica is None
+
+    @property
+    def _con(self):
+        if self._fisica is None:
+            raise RuntimeError("Conexão já devolvida ao pool")
+        return self._fisica.con
+
+    def cursor(self):
+        cursor = self._con.cursor()
+        if self._pool.observador is not None:
+            return CursorMedido(cursor, self._pool.observador)
+        return cursor
+
+    def commit(self):
+        self._con.commit()
+
+    def rollback(self):
+        self._con.rollback()
+
+    def close(self):
+        """Devolve a conexão ao pool (pode ser chamado mais de uma vez)."""
+        with self._lock:
+            fisica, self._fisica = self._fisica, None
+        if fisica is not None:
+            self._pool.devolver(fisica)
+
+    def __getattr__(self, nome):
+        # Qualquer outro atributo (ex: main_transaction) vem da conexão real
+        return getattr(self._con, nome)
+
+
+class PoolConexoes:
+    """
+    Pool thread-safe e limitado de conexões Firebird.
+    - tamanho_max: número máximo de conexões abertas ao mesmo tempo
+    - ocioso_max: segundos que uma conexão pode ficar parada antes de ser fechada
+    - vida_max: segundos de vida de uma conexão antes de ser reciclada
+    - espera_max: segundos que obter() aguarda por uma conexão livre
+    - validar_apos: conexões paradas há mais que isso são testadas antes do uso
+    - observador: se informado, os cursores medem o tempo de cada comando (ver CursorMedido)
+    """
+
+    QUERY_TESTE = "SELECT 1 FROM RDB$DATABASE"  # Consulta mais barata possível no Firebird
+
+    def __init__(self, fabrica, tamanho_max=10, ocioso_max=300, vida_max=1800,
+                 espera_max=30, validar_apos=5, observador=None):
+        self._fabrica = fabrica  # Função que abre uma conexão nova
+        self.observador = observador
+        self.tamanho_max = tamanho_max
+        self.ocioso_max = ocioso_max
+        self.vida_max = vida_max
+        self.espera_max = espera_max
+        self.validar_apos = validar_apos
+
+        self._cond = threading.Condition()
+        self._ociosas = []  # Pilha (LIFO): a conexão mais recente é reutilizada primeiro
+        self._total = 0  # Conexões abertas (ociosas + emprestadas + sendo abertas)
+        self._em_uso = 0
+
+        # Estatísticas
+        self._conexoes_abertas = collections.deque()  # Instantes de cada fdb.connect
+        self._total_conexoes = 0
+        self._total_emprestimos = 0
+        self._espera_total = 0.0
+        self._espera_max_obs = 0.0
+        self._descartadas = 0
+
+    # ---------- empréstimo / devolução ----------
+    def obter(self):
+        """Empresta uma conexão do pool, abrindo uma nova se houver espaço."""
+        inicio = time.monotonic()
+        limite = inicio + self.espera_max
+        while True:
+            candidata = None
+            abrir_nova = False
+            with self._cond:
+                self._remover_expiradas()
+                while not self._ociosas and self._total >= self.tamanho_max:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        raise PoolEsgotado(
+                            f"Nenhuma conexão livre após {self.espera_max}s "
+                            f"({self._em_uso} em uso de {self.tamanho_max})"
+                        )
+                    self._cond.wait(restante)
+                    self._remover_expiradas()
+                if self._ociosas:
+                    candidata = self._ociosas.pop()
+                else:
+                    self._total += 1  # Reserva a vaga antes de abrir fora do lock
+                    abrir_nova = True
+                self._em_uso += 1
+
+            # A conexão é aberta/testada fora do lock para não travar as outras threads
+            if abrir_nova:
+                try:
+                    candidata = self._abrir()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._em_uso -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._saudavel(candidata):
+                self._descartar(candidata)
+                continue  # Tenta outra conexão
+
+            self._registrar_espera(time.monotonic() - inicio)
+            return ConexaoPool(self, candidata)  # Empréstimo novo a cada obter()
+
+    def devolver(self, conexao):
+        """Recebe a conexão física de volta (via ConexaoPool.close), encerrando qualquer transação pendente."""
+        try:
+            conexao.con.rollback()  # Garante que a próxima requisição não herde transação aberta
+        except Exception:
+            self._descartar(conexao)
+            return
+
+        agora = time.monotonic()
+        if agora - conexao.criada_em >= self.vida_max:
+            self._descartar(conexao)  # Recicla conexões antigas
+            return
+
+        conexao.devolvida_em = agora
+        with self._cond:
+            self._em_uso -= 1
+            self._ociosas.append(conexao)
+            self._cond.notify()
+
+    def fechar_todas(self):
+        """Fecha todas as conexões ociosas (ex: ao encerrar ou após um fork)."""
+        with self._cond:
+            ociosas, self._ociosas = self._ociosas, []
+            self._total -= len(ociosas)
+            self._cond.notify_all()
+        for conexao in ociosas:
+            self._fechar_real(conexao)
+
+    def apos_fork(self):
+        """
+        Chamar no processo filho logo após um fork (ex: worker do gunicorn com preload).
+        Esquece as conexões herdadas do pai sem fechá-las (o socket é do pai) e recria o lock,
+        que pode ter sido copiado travado.
+        """
+        self._cond = threading.Condition()
+        self._ociosas = []
+        self._total = 0
+        self._em_uso = 0
+
+    # ---------- estatísticas ----------
+    def estatisticas(self):
+        """Retorna um retrato do pool para monitoramento."""
+        with self._cond:
+            agora = time.monotonic()
+            self._podar_janela(agora)
+            return {
+                "tamanho_max": self.tamanho_max,
+                "abertas": self._total,
+                "em_uso": self._em_uso,
+                "ociosas": len(self._ociosas),
+                "emprestimos": self._total_emprestimos,
+                "conexoes_criadas": self._total_conexoes,
+                "conexoes_descartadas": self._descartadas,
+                "conexoes_por_segundo": round(len(self._conexoes_abertas) / 60.0, 3),  # Média do último minuto
+                "espera_media_ms": round(self._espera_total / self._total_emprestimos * 1000, 3)
+                if self._total_emprestimos else 0.0,
+                "espera_max_ms": round(self._espera_max_obs * 1000, 3),
+            }
+
+    # ---------- auxiliares internos ----------
+    def _abrir(self):
+        con = self._fabrica()
+        with self._cond:
+            agora = time.monotonic()
+            self._total_conexoes += 1
+            self._conexoes_abertas.append(agora)
+            self._podar_janela(agora)
+        return ConexaoFisica(con)
+
+    def _saudavel(self, conexao):
+        """Testa a conexão se ela ficou parada por tempo suficiente para ter caído."""
+        if time.monotonic() - conexao.devolvida_em < self.validar_apos:
+            return True
+        try:
+            cur = conexao.con.cursor()
+            cur.execute(self.QUERY_TESTE)
+            cur.fetchone()
+            cur.close()
+            conexao.con.rollback()
+            return True
+        except Exception as e:
+            logging.warning(f"Conexão do pool descartada no teste de saúde: {e}")
+            return False
+
+    def _descartar(self, conexao):
+        """Fecha uma conexão emprestada e libera sua vaga no pool."""
+        self._fechar_real(conexao)
+        with self._cond:
+            self._total -= 1
+            self._em_uso -= 1
+            self._descartadas += 1
+            self._cond.notify()
+
+    def _remover_expiradas(self):
+        """Fecha conexões ociosas há tempo demais ou velhas demais (chamado com o lock)."""
+        agora = time.monotonic()
+        manter = []
+        for conexao in self._ociosas:
+            if (agora - conexao.devolvida_em >= self.ocioso_max
+                    or agora - conexao.criada_em >= self.vida_max):
+                self._fechar_real(conexao)
+                self._total -= 1
+                self._descartadas += 1
+            else:
+                manter.append(conexao)
+        self._ociosas = manter
+
+    def _registrar_espera(self, espera):
+        with self._cond:
+            self._total_emprestimos += 1
+            self._espera_total += espera
+            self._espera_max_obs = max(self._espera_max_obs, espera)
+
+    def _podar_janela(self, agora):
+        while self._conexoes_abertas and agora - self._conexoes_abertas[0] > 60:
+            self._conexoes_abertas.popleft()
+
+    @staticmethod
+    def _fechar_real(conexao):
+        try:
+            conexao.con.close()
+        except Exception:
+            pass
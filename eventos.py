@@ -0,0 +1,255 @@
+# ==============================================
+#  FEED DE ALTERAÇÕES (ver sql/005_eventos.sql)
+# ==============================================
+import collections
+import threading
+import logging
+import datetime
+import time
+import json
+
+from exportacao import SQL_TRANSACOES_ANTERIORES  # Transações que já gravaram algo, abertas desde um instante
+
+TABELAS_FEED = ('VENDAS', 'CASHBACKS', 'CARRINHO')
+OPERACOES = {'I': 'inclusao', 'U': 'alteracao', 'D': 'exclusao'}
+
+SQL_EVENTOS = """
+    SELECT FIRST {limite} ID, TABELA, OPERACAO, ID_REGISTRO, ID_CLIENTE, ID_PRODUTO, ID_VENDA, QUANTIDADE, VALOR, DATA
+    FROM EVENTOS
+    WHERE ID > ?
+    ORDER BY ID
+"""
+
+
+def evento_para_dict(linha):
+    id_evento, tabela, operacao, id_registro, id_cliente, id_produto, id_venda, quantidade, valor, data = linha
+    return {
+        "id": id_evento,
+        "tabela": tabela.strip().lower(),
+        "operacao": OPERACOES.get(operacao, operacao),
+        "id_registro": id_registro,
+        "id_cliente": id_cliente,
+        "id_produto": id_produto,
+        "id_venda": id_venda,
+        "quantidade": quantidade,
+        "valor": float(valor) if valor is not None else None,
+        "data": str(data),
+    }
+
+
+def filtrar(eventos, tabelas, id_cliente=None):
+    """Só os eventos das `tabelas` pedidas (nomes em minúsculas; None = todas) e, com `id_cliente`, só os dele."""
+    if not tabelas and id_cliente is None:
+        return eventos
+    return [e for e in eventos if (not tabelas or e['tabela'] in tabelas)
+            and (id_cliente is None or e['id_cliente'] == id_cliente)]
+
+
+def formatar_sse(evento):
+    """Um evento no formato text/event-stream (o 'id' volta no Last-Event-ID quando o navegador reconecta)."""
+    return f"id: {evento['id']}\nevent: {evento['tabela']}\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+
+class FeedEventos:
+    """
+    Lê da tabela EVENTOS as alterações já confirmadas e as guarda num buffer circular em memória.
+    - Uma thread por processo consulta ID > último lido a cada `intervalo` segundos (ou na hora, com avisar()).
+    - Os eventos saem sempre em ordem de ID. Um ID ainda ausente (transação aberta que pegou o número antes)
+      segura os seguintes. Passados `lacuna_espera` segundos, a cada leitura o feed procura o ID de novo e olha
+      MON$TRANSACTIONS: enquanto houver transação que já gravou algo, aberta desde antes da lacuna ser vista,
+      o ID ainda pode ser confirmado e continua segurando; quando não sobra nenhuma, ele foi desfeito (rollback).
+    - Quem fica para trás do buffer é atendido pela tabela; quem fica para trás da retenção precisa
+      ressincronizar (recentes()/antigos() retornam None).
+    Os consumidores só guardam o último ID recebido: não existe fila por cliente, e um cliente lento
+    não ocupa memória nem atrasa os outros.
+    """
+
+    def __init__(self, pool, tamanho=10000, intervalo=0.5, lacuna_espera=2.0, retencao=86400, lote=500):
+        self.pool = pool
+        self.intervalo = intervalo
+        self.lacuna_espera = lacuna_espera
+        self.retencao = retencao
+        self.lote = lote
+        self.ultimo_id = None  # Último ID publicado (None até a primeira leitura)
+        self._buffer = collections.deque(maxlen=tamanho)
+        self._cond = threading.Condition()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._ouvintes = []  # Funções chamadas a cada publicação (ex: para acordar o event loop do asyncio)
+        self._lacuna = None  # (ID que falta, quando foi vista (monotonic), CURRENT_TIMESTAMP do servidor)
+        self._lacuna_aviso = 0.0
+        self._proxima_limpeza = 0.0
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name='feed-eventos', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def avisar(self):
+        """Chamar depois de um commit que gerou eventos: a thread lê na hora, sem esperar o intervalo."""
+        self._acordar.set()
+
+    def encerrado(self):
+        return self._parar.is_set()
+
+    def inscrever(self, ouvinte):
+        self._ouvintes.append(ouvinte)
+
+    # ---------- leitura pelos consumidores ----------
+    def recentes(self, id_evento, limite=500):
+        """Eventos com ID > id_evento que ainda estão no buffer, ou None se id_evento é mais antigo que ele."""
+        with self._cond:
+            if self.ultimo_id is None or id_evento >= self.ultimo_id:
+                return []
+            if not self._buffer or id_evento < self._buffer[0]['id'] - 1:
+                return None
+            resultado = []
+            for evento in reversed(self._buffer):  # Consumidores em dia estão sempre perto do fim
+                if evento['id'] <= id_evento:
+                    break
+                resultado.append(evento)
+        resultado.reverse()
+        return resultado[:limite]
+
+    def antigos(self, cursor, id_evento, limite=500):
+        """Eventos com ID > id_evento lidos da tabela, ou None se já foram apagados pela retenção."""
+        cursor.execute("SELECT MIN(ID) FROM EVENTOS")
+        menor = cursor.fetchone()[0]
+        if menor is None or id_evento < menor - 1:
+            return None
+        cursor.execute(SQL_EVENTOS.format(limite=int(limite)), (id_evento,))
+        # Só o que já foi publicado: o que está além de ultimo_id pode ainda ter lacunas abertas
+        return [evento_para_dict(linha) for linha in cursor.fetchall() if linha[0] <= self.ultimo_id]
+
+    def desde(self, id_evento, limite=500):
+        """recentes() e, se o cliente ficou para trás do buffer, antigos() numa conexão do pool."""
+        eventos = self.recentes(id_evento, limite)
+        if eventos is not None:
+            return eventos
+        con = self.pool.obter()
+        cursor = con.cursor()
+        try:
+            return self.antigos(cursor, id_evento, limite)
+        finally:
+            cursor.close()
+            con.close()
+
+    def esperar(self, id_evento, timeout):
+        """Bloqueia até existir evento com ID > id_evento (True) ou o tempo acabar (False)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._parar.is_set() or (self.ultimo_id or 0) > id_evento, timeout)
+
+    def estatisticas(self):
+        with self._cond:
+            return {
+                "ultimo_id": self.ultimo_id,
+                "buffer": len(self._buffer),
+                "buffer_max": self._buffer.maxlen,
+                "mais_antigo": self._buffer[0]['id'] if self._buffer else None,
+            }
+
+    # ---------- auxiliares internos ----------
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                if self._ler():
+                    continue  # Lote cheio: tem mais esperando
+                self._limpar_antigos()
+            except Exception as e:
+                logging.warning(f"Leitura do feed de eventos adiada: {str(e)}")
+                self._parar.wait(max(self.intervalo, 5))
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+    def _ler(self):
+        """Lê e publica os eventos novos. Retorna True se o lote veio cheio."""
+        con = self.pool.obter()
+        cursor = con.cursor()
+        try:
+            if self.ultimo_id is None:
+                # Primeira leitura: o feed começa do fim (o histórico fica na tabela, para quem pedir)
+                cursor.execute("SELECT MAX(ID) FROM EVENTOS")
+                self._publicar([], cursor.fetchone()[0] or 0)
+                return False
+            cursor.execute(SQL_EVENTOS.format(limite=self.lote), (self.ultimo_id,))
+            linhas = cursor.fetchall()
+            pular = self._lacuna_desfeita(cursor, linhas)
+        finally:
+            cursor.close()
+            con.close()
+
+        novos, esperado = [], self.ultimo_id + 1
+        for linha in linhas:
+            if linha[0] != esperado:
+                if not pular:
+                    break  # Segura os seguintes até o ID que falta aparecer (ou a transação dele terminar)
+                pular, self._lacuna = False, None  # Só a primeira lacuna foi conferida
+            novos.append(evento_para_dict(linha))
+            esperado = linha[0] + 1
+        if novos:
+            self._publicar(novos, novos[-1]['id'])
+        return len(linhas) == self.lote and len(novos) == len(linhas)
+
+    def _lacuna_desfeita(self, cursor, linhas):
+        """True se o primeiro ID que falta em `linhas` já pode ser dado como desfeito (rollback)."""
+        esperado = self.ultimo_id + 1
+        for linha in linhas:
+            if linha[0] != esperado:
+                break
+            esperado += 1
+        else:
+            self._lacuna = None  # Sem lacuna, ou o ID que faltava foi confirmado
+            return False
+        if self._lacuna is None or self._lacuna[0] != esperado:
+            # Quem pegou o ID que falta começou antes deste instante (um ID maior já está confirmado)
+            cursor.execute("SELECT CURRENT_TIMESTAMP FROM RDB$DATABASE")
+            self._lacuna = (esperado, time.monotonic(), cursor.fetchone()[0])
+            return False
+        _, vista_em, instante = self._lacuna
+        if time.monotonic() - vista_em < self.lacuna_espera:
+            return False  # Quase sempre o commit chega antes disso: nem consulta o MON$
+        # Cada leitura é uma transação nova do pool: a consulta acima já procurou o ID de novo e o MON$ é atual
+        cursor.execute(SQL_TRANSACOES_ANTERIORES, (instante,))
+        if cursor.fetchone()[0]:
+            if time.monotonic() - self._lacuna_aviso > 60:
+                self._lacuna_aviso = time.monotonic()
+                logging.warning(f"Feed de eventos esperando o ID {esperado}: transação de escrita longa em aberto")
+            return False  # A transação dona do ID ainda pode confirmar
+        return True
+
+    def _publicar(self, eventos, ultimo_id):
+        with self._cond:
+            self._buffer.extend(eventos)
+            self.ultimo_id = ultimo_id
+            self._cond.notify_all()
+        for ouvinte in list(self._ouvintes):
+            try:
+                ouvinte()
+            except Exception as e:
+                logging.warning(f"Ouvinte do feed de eventos falhou: {str(e)}")
+
+    def _limpar_antigos(self):
+        """Apaga da tabela os eventos mais velhos que a retenção (no máximo uma vez por hora)."""
+        if time.monotonic() < self._proxima_limpeza:
+            return
+        self._proxima_limpeza = time.monotonic() + 3600
+        con = self.pool.obter()
+        cursor = con.cursor()
+        try:
+            limite = datetime.datetime.now() - datetime.timedelta(seconds=self.retencao)
+            cursor.execute("DELETE FROM EVENTOS WHERE DATA < ?", (limite,))
+            con.commit()
+        except Exception as e:
+            con.rollback()  # Outro worker limpando ao mesmo tempo: fica para a próxima
+            logging.info(f"Limpeza do feed de eventos adiada: {str(e)}")
+        finally:
+            cursor.close()
+            con.close()
@@ -0,0 +1,239 @@
+# ==============================================
+#  EXPORTAÇÃO DE VENDAS E CASHBACKS (CSV GZIP, PARQUET, ARROW)
+# ==============================================
+from collections import namedtuple
+import datetime
+import decimal
+import zlib
+import time
+import csv
+import io
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Sem pyarrow: só o CSV compactado fica disponível
+    pa = pq = None
+
+# Coluna exportada:
+#   nome: nome da coluna no arquivo
+#   coluna: coluna no banco
+#   tipo: 'inteiro', 'decimal' ou 'data_hora'
+Coluna = namedtuple('Coluna', 'nome coluna tipo')
+
+# Tabela exportável: tabela no banco, coluna do ID (fatias incrementais), coluna da data (período) e colunas
+Exportacao = namedtuple('Exportacao', 'tabela coluna_id coluna_data colunas')
+
+EXPORTACOES = {
+    'vendas': Exportacao('VENDAS', 'ID_VENDA', 'DATA_VENDA', [
+        Coluna('id_venda', 'ID_VENDA', 'inteiro'),
+        Coluna('id_produto', 'ID_PRODUTO', 'inteiro'),
+        Coluna('id_cliente', 'ID_CLIENTE', 'inteiro'),
+        Coluna('id_vendedor', 'ID_VENDEDOR', 'inteiro'),
+        Coluna('quantidade', 'QUANTIDADE', 'inteiro'),
+        Coluna('valor_total', 'VALOR_TOTAL', 'decimal'),
+        Coluna('data_venda', 'DATA_VENDA', 'data_hora'),
+    ]),
+    'cashbacks': Exportacao('CASHBACKS', 'ID_CASHBACK', 'DATA_GERACAO', [
+        Coluna('id_cashback', 'ID_CASHBACK', 'inteiro'),
+        Coluna('id_cliente', 'ID_CLIENTE', 'inteiro'),
+        Coluna('id_venda', 'ID_VENDA', 'inteiro'),
+        Coluna('valor_cashback', 'VALOR_CASHBACK', 'decimal'),
+        Coluna('data_geracao', 'DATA_GERACAO', 'data_hora'),
+    ]),
+}
+
+# Formatos: nome na URL -> (mimetype, extensão do arquivo, precisa do pyarrow)
+FORMATOS = {
+    'csv': ('application/gzip', 'csv.gz', False),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', True),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', True),
+}
+
+# Transações de outras conexões ainda abertas, que começaram até o instante informado e já gravaram algum registro
+# (MON$ só mostra as conexões dos outros usuários para SYSDBA/dono do banco, que é o usuário do app).
+# MON$READ_ONLY sozinho não separa quem escreve: o TPB padrão do fdb é leitura e escrita, então toda leitura longa
+# (outra exportação, um stream de /vendas, o próprio feed) contaria. Quem pegou um ID do generator já fez o INSERT
+# dele, e o MON$RECORD_STATS da transação conta esse registro.
+SQL_TRANSACOES_ANTERIORES = """
+    SELECT COUNT(*) FROM MON$TRANSACTIONS T
+    JOIN MON$RECORD_STATS R ON R.MON$STAT_ID = T.MON$STAT_ID
+    WHERE T.MON$STATE = 1 AND T.MON$READ_ONLY = 0
+      AND T.MON$TRANSACTION_ID <> CURRENT_TRANSACTION AND T.MON$TIMESTAMP <= ?
+      AND R.MON$RECORD_INSERTS + R.MON$RECORD_UPDATES + R.MON$RECORD_DELETES > 0
+"""
+
+DECIMAL_PRECISAO = 18  # Mesma precisão dos valores em dinheiro no banco
+DECIMAL_ESCALA = 2
+CENTAVOS = decimal.Decimal(1).scaleb(-DECIMAL_ESCALA)
+
+
+def sql_exportacao(exportacao, condicoes):
+    """SELECT das colunas exportadas em ordem crescente de ID (quem sincroniza continua do último ID recebido)."""
+    return f"""
+        SELECT {', '.join(c.coluna for c in exportacao.colunas)}
+        FROM {exportacao.tabela}
+        {'WHERE ' + ' AND '.join(condicoes) if condicoes else ''}
+        ORDER BY {exportacao.coluna_id}
+    """
+
+
+def sql_ultimo_id(exportacao, condicoes):
+    """Maior ID visível dentro dos filtros e o instante da leitura (ver marca_consolidada)."""
+    return f"""
+        SELECT CURRENT_TIMESTAMP, MAX({exportacao.coluna_id})
+        FROM {exportacao.tabela}
+        {'WHERE ' + ' AND '.join(condicoes) if condicoes else ''}
+    """
+
+
+def marca_consolidada(con, cursor, exportacao, condicoes, valores, espera=5.0, intervalo=0.1):
+    """
+    Fim seguro da fatia exportada: (True, maior ID) ou (False, None) se não deu para garantir em `espera` s.
+    O ID sai do generator no INSERT, mas a linha só aparece no commit: uma transação longa com o ID 100
+    pode confirmar depois de outra com o 101. Exportar até MAX(ID) = 101 faria quem sincroniza com
+    apos_id=101 perder o 100 para sempre. Por isso:
+    1. Lê M = MAX(ID) visível e o instante t da leitura: todo ID <= M foi gerado antes de t.
+    2. Espera, em transações novas (MON$ é fotografado uma vez por transação), até não restar transação
+       aberta que começou até t e já gravou algo: aí todo ID <= M já foi confirmado ou desfeito. Leitores
+       longos (outra exportação, streams) não contam.
+    3. Termina com rollback: a exportação roda numa transação nova, que enxerga todos esses commits.
+    Com M = None (nada dentro dos filtros) retorna (True, None) na hora.
+    """
+    cursor.execute(sql_ultimo_id(exportacao, condicoes), tuple(valores))
+    instante, marca = cursor.fetchone()
+    con.rollback()
+    if marca is None:
+        return True, None
+    limite = time.monotonic() + espera
+    while True:
+        cursor.execute(SQL_TRANSACOES_ANTERIORES, (instante,))
+        abertas = cursor.fetchone()[0]
+        con.rollback()
+        if not abertas:
+            return True, marca
+        if time.monotonic() >= limite:
+            return False, None
+        time.sleep(intervalo)
+
+
+def para_decimal(valor):
+    if valor is None:
+        return None
+    if not isinstance(valor, decimal.Decimal):
+        valor = decimal.Decimal(str(valor))  # Coluna em ponto flutuante: passa pelo texto para não herdar o erro binário
+    return valor.quantize(CENTAVOS)
+
+
+def para_data_hora(valor):
+    if valor is None or isinstance(valor, datetime.datetime):
+        return valor
+    return datetime.datetime.combine(valor, datetime.time())  # Coluna DATE vira meia-noite
+
+
+CONVERSORES = {'inteiro': lambda v: v, 'decimal': para_decimal, 'data_hora': para_data_hora}
+
+
+def formato_disponivel(formato):
+    """Parquet e Arrow dependem do pyarrow; o CSV só usa a biblioteca padrão."""
+    return not FORMATOS[formato][2] or pa is not None
+
+
+def exportar(exportacao, formato, lotes):
+    """
+    Gera o arquivo em pedaços de bytes a partir de `lotes` (iterável de listas de linhas do banco).
+    Cada lote é convertido e enviado assim que chega: a memória usada não depende do tamanho da tabela.
+    """
+    if formato == 'csv':
+        return _exportar_csv(exportacao, lotes)
+    if pa is None:
+        raise RuntimeError("Formato indisponível: instale o pyarrow")
+    return _exportar_arrow(exportacao, lotes, parquet=(formato == 'parquet'))
+
+
+# ---------- auxiliares internos ----------
+def _exportar_csv(exportacao, lotes):
+    """CSV (cabeçalho + linhas) compactado em gzip; decimais com as casas exatas e datas em ISO 8601."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip (arquivo .csv.gz)
+    texto = io.StringIO()
+    escritor = csv.writer(texto, lineterminator='\n')
+    escritor.writerow([c.nome for c in exportacao.colunas])
+    conversores = [CONVERSORES[c.tipo] for c in exportacao.colunas]
+    for linhas in lotes:
+        for linha in linhas:
+            escritor.writerow([_texto_csv(f(v)) for f, v in zip(conversores, linha)])
+        pedaco = compressor.compress(texto.getvalue().encode('utf-8'))
+        texto.seek(0)
+        texto.truncate()
+        if pedaco:
+            yield pedaco
+    yield compressor.compress(texto.getvalue().encode('utf-8')) + compressor.flush()
+
+
+def _texto_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime.datetime):
+        return valor.isoformat(sep=' ')
+    return str(valor)
+
+
+def _esquema(exportacao):
+    tipos = {
+        'inteiro': pa.int64(),
+        'decimal': pa.decimal128(DECIMAL_PRECISAO, DECIMAL_ESCALA),
+        'data_hora': pa.timestamp('ms'),
+    }
+    return pa.schema([pa.field(c.nome, tipos[c.tipo]) for c in exportacao.colunas])
+
+
+class _Saida(io.RawIOBase):
+    """Arquivo só de escrita que acumula o que o pyarrow grava, para ser enviado e esvaziado a cada lote."""
+
+    def __init__(self):
+        super().__init__()
+        self.partes = []
+        self.posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        dados = bytes(dados)
+        self.partes.append(dados)
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self.posicao
+
+    def esvaziar(self):
+        dados = b''.join(self.partes)
+        self.partes = []
+        return dados
+
+
+def _exportar_arrow(exportacao, lotes, parquet):
+    """
+    Parquet: cada lote vira um row group (colunar, compactado com zstd).
+    Arrow: formato de stream IPC, um record batch por lote.
+    """
+    esquema = _esquema(exportacao)
+    conversores = [CONVERSORES[c.tipo] for c in exportacao.colunas]
+    saida = _Saida()
+    if parquet:
+        escritor = pq.ParquetWriter(saida, esquema, compression='zstd')
+    else:
+        escritor = pa.ipc.new_stream(saida, esquema)
+    try:
+        for linhas in lotes:
+            colunas = [[f(linha[i]) for linha in linhas] for i, f in enumerate(conversores)]
+            tabela = pa.Table.from_arrays([pa.array(valores, type=campo.type)
+                                           for valores, campo in zip(colunas, esquema)], schema=esquema)
+            escritor.write_table(tabela)
+            pedaco = saida.esvaziar()
+            if pedaco:
+                yield pedaco
+    finally:
+        escritor.close()  # Rodapé do Parquet / marca de fim do stream Arrow
+    yield saida.esvaziar()
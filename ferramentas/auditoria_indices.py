@@ -0,0 +1,248 @@
+"""
+Auditoria de índices do AUTOPRIME.FDB.
+
+1. Lê todos os comandos SQL escritos no código da API (view.py e módulos auxiliares).
+   Os montados em tempo de execução (f-strings) são auditados pelas formas base cadastradas em
+   FORMAS_BASE: uma por combinação de WHERE/ORDER BY que a função consegue gerar.
+2. Prepara cada um no Firebird e mostra o PLAN escolhido, marcando leituras NATURAL
+   (tabela inteira percorrida, sem índice).
+3. Com --aplicar, cria os índices de sql/003_indices.sql que ainda não existem
+   e mostra o tempo das consultas mais frequentes antes e depois.
+
+Uso:
+    python ferramentas/auditoria_indices.py                  # só mostra os planos
+    python ferramentas/auditoria_indices.py --aplicar        # cria os índices e compara tempos
+    python ferramentas/auditoria_indices.py --dsn localhost:/dados/AUTOPRIME.FDB --repeticoes 50
+"""
+import argparse
+import ast
+import os
+import re
+import statistics
+import sys
+import time
+
+import fdb
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+import config  # noqa: E402
+
+# Arquivos que contêm SQL executado pela API
+ARQUIVOS_SQL = ['view.py', 'resumos.py', 'relatorios.py', 'busca.py', 'exportacao.py', 'eventos.py', 'versoes.py']
+ARQUIVO_INDICES = os.path.join(RAIZ, 'sql', '003_indices.sql')
+INICIO_SQL = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|MERGE|EXECUTE\s+BLOCK)\b', re.IGNORECASE)
+
+
+def _periodo(modelo, coluna_id, coluna_data, extras=()):
+    """Formas de um SELECT filtrado por filtros_periodo() (view.py): sem filtro e com cada filtro."""
+    filtros = [f"{coluna_id} > ?", f"{coluna_data} >= ?", f"{coluna_data} < ?", *extras]
+    return [modelo.format(where='')] + [modelo.format(where=f"WHERE {filtro}") for filtro in filtros]
+
+
+# SQL montado em tempo de execução: (arquivo, função que monta) -> formas base a auditar.
+# A lista de colunas não muda o plano e vira '*'; o que importa são os WHERE/ORDER BY possíveis.
+# Uma f-string com SQL numa função que não está aqui aparece como "[dinâmico] sem forma base".
+FORMAS_BASE = {
+    ('view.py', 'buscar_produto'): ["SELECT * FROM PRODUTOS WHERE ID = ?"],
+    ('view.py', 'buscar_produtos'): ["SELECT * FROM PRODUTOS WHERE ID IN (?, ?)"],
+    ('view.py', 'editar_usuario'): ["UPDATE CADASTRO SET NOME = ? WHERE ID_CADASTRO = ?"],
+    ('view.py', 'editar_produto'): ["UPDATE PRODUTOS SET NOME = ? WHERE ID = ?"],
+    ('view.py', 'ler_pagina_catalogo'): [
+        f"SELECT FIRST 21 * FROM PRODUTOS WHERE ID > ?{filtro} ORDER BY ID"
+        for filtro in ('', ' AND MARCA = ?', ' AND ACABAMENTO = ?', ' AND ID_VENDEDOR = ?',
+                       ' AND PRECO >= ?', ' AND PRECO <= ?')],
+    ('view.py', 'sql_vendas'): _periodo("SELECT * FROM VENDAS {where} ORDER BY ID_VENDA DESC",
+                                        'ID_VENDA', 'DATA_VENDA'),
+    ('view.py', 'sql_cashbacks'): _periodo("SELECT * FROM CASHBACKS {where} ORDER BY ID_CASHBACK DESC",
+                                           'ID_CASHBACK', 'DATA_GERACAO'),
+    # Dentro do EXECUTE BLOCK só o DELETE procura linhas; os INSERTs não dependem de índice
+    ('view.py', 'sql_checkout'): ["DELETE FROM CARRINHO WHERE ID_ITEM = ?"],
+    ('exportacao.py', 'sql_exportacao'): (
+        _periodo("SELECT * FROM VENDAS {where} ORDER BY ID_VENDA", 'ID_VENDA', 'DATA_VENDA', ["ID_VENDA <= ?"])
+        + _periodo("SELECT * FROM CASHBACKS {where} ORDER BY ID_CASHBACK", 'ID_CASHBACK', 'DATA_GERACAO',
+                   ["ID_CASHBACK <= ?"])),
+    ('exportacao.py', 'sql_ultimo_id'): (
+        _periodo("SELECT CURRENT_TIMESTAMP, MAX(ID_VENDA) FROM VENDAS {where}", 'ID_VENDA', 'DATA_VENDA')
+        + _periodo("SELECT CURRENT_TIMESTAMP, MAX(ID_CASHBACK) FROM CASHBACKS {where}", 'ID_CASHBACK',
+                   'DATA_GERACAO')),
+    ('versoes.py', 'sql_versoes'): ["SELECT GEN_ID(GEN_VERSAO_VENDAS, 0) FROM RDB$DATABASE"],
+}
+LEITURA_NATURAL = re.compile(r'(\w+(?:\$\w+)?) NATURAL')
+
+# Consultas mais frequentes, medidas antes/depois: (nome, sql, consulta que busca parâmetros reais)
+CONSULTAS_QUENTES = [
+    ("login por e-mail",
+     "SELECT ID_CADASTRO, NOME, EMAIL, CARGO, ATIVO, SENHA, TENTATIVAS_LOGIN FROM CADASTRO WHERE EMAIL = ?",
+     "SELECT MAX(EMAIL) FROM CADASTRO"),
+    ("produto duplicado por nome",
+     "SELECT 1 FROM PRODUTOS WHERE NOME = ?",
+     "SELECT MAX(NOME) FROM PRODUTOS"),
+    ("carrinho do cliente",
+     "SELECT C.ID_ITEM, P.NOME, P.MARCA, C.QUANTIDADE, C.VALOR_UNITARIO, C.VALOR_TOTAL, C.DATA_ADICAO "
+     "FROM CARRINHO C JOIN PRODUTOS P ON C.ID_PRODUTO = P.ID WHERE C.ID_CLIENTE = ? ORDER BY C.DATA_ADICAO DESC",
+     "SELECT FIRST 1 ID_CLIENTE FROM CARRINHO ORDER BY ID_ITEM DESC"),
+    ("relatório por cargo",
+     "SELECT ID_CADASTRO, NOME, EMAIL, ATIVO FROM CADASTRO WHERE UPPER(CARGO) = 'CLIENTE' ORDER BY NOME",
+     None),
+    ("vendas mais recentes",
+     "SELECT FIRST 100 ID_VENDA, ID_PRODUTO, ID_CLIENTE, VALOR_TOTAL FROM VENDAS ORDER BY ID_VENDA DESC",
+     None),
+    ("cashbacks mais recentes",
+     "SELECT FIRST 100 ID_CASHBACK, ID_CLIENTE, VALOR_CASHBACK FROM CASHBACKS ORDER BY ID_CASHBACK DESC",
+     None),
+]
+
+
+def extrair_sql(caminho):
+    """Retorna [(linha, sql)] com os textos SQL do arquivo e [(linha, função)] dos montados dinamicamente."""
+    with open(caminho, encoding='utf-8') as f:
+        arvore = ast.parse(f.read(), caminho)
+    encontrados, dinamicos = [], []
+    # Função onde cada f-string está (a chave de FORMAS_BASE)
+    funcao_de = {id(no): funcao.name for funcao in ast.walk(arvore)
+                 if isinstance(funcao, (ast.FunctionDef, ast.AsyncFunctionDef)) for no in ast.walk(funcao)}
+    # Pedaços fixos de f-strings também são ast.Constant: ficam de fora (não são SQL completo)
+    partes_fstring = {id(p) for no in ast.walk(arvore) if isinstance(no, ast.JoinedStr) for p in no.values}
+    for no in ast.walk(arvore):
+        if id(no) in partes_fstring:
+            continue
+        if isinstance(no, ast.Constant) and isinstance(no.value, str) and INICIO_SQL.match(no.value):
+            # Modelos de .format() ('{cargo}', 'FIRST {limite}') recebem um valor qualquer só para poder preparar
+            encontrados.append((no.lineno, re.sub(r'\{\w+\}', '1', no.value)))
+        elif isinstance(no, ast.JoinedStr):
+            texto = ''.join(p.value for p in no.values if isinstance(p, ast.Constant))
+            if INICIO_SQL.match(texto):
+                dinamicos.append((no.lineno, funcao_de.get(id(no))))
+    return sorted(encontrados), sorted(dinamicos)
+
+
+def plano(cursor, sql):
+    """PLAN do Firebird para o comando (sem executar)."""
+    return (cursor.prep(sql).plan or '').strip()
+
+
+def auditar(con):
+    """Mostra o plano de cada comando e retorna quantos têm leitura NATURAL."""
+    cursor = con.cursor()
+    naturais = 0
+    for arquivo in ARQUIVOS_SQL:
+        encontrados, dinamicos = extrair_sql(os.path.join(RAIZ, arquivo))
+        sem_forma = []
+        for linha, funcao in dinamicos:
+            formas = FORMAS_BASE.get((arquivo, funcao))
+            if formas is None:
+                sem_forma.append((linha, funcao))
+            else:
+                encontrados += [(linha, sql) for sql in formas]
+        for linha, sql in sorted(encontrados):
+            resumo = ' '.join(sql.split())
+            try:
+                texto_plano = plano(cursor, sql)
+            except fdb.DatabaseError as e:
+                print(f"[ERRO]     {arquivo}:{linha}  {resumo[:90]}\n           {str(e).splitlines()[0]}")
+                continue
+            tabelas = [t for t in LEITURA_NATURAL.findall(texto_plano) if t != 'RDB$DATABASE']
+            marca = '[NATURAL] ' if tabelas else '[ok]      '
+            naturais += bool(tabelas)
+            print(f"{marca}{arquivo}:{linha}  {resumo[:90]}")
+            if texto_plano:
+                print(f"           {texto_plano}")
+        for linha, funcao in sem_forma:
+            print(f"[dinâmico] {arquivo}:{linha}  SQL montado em {funcao or 'nível de módulo'}: "
+                  f"sem forma base em FORMAS_BASE (não auditado)")
+    cursor.close()
+    con.rollback()
+    return naturais
+
+
+def medir(con, repeticoes):
+    """Tempo mediano (ms) de cada consulta quente, com parâmetros reais do banco."""
+    cursor = con.cursor()
+    tempos = {}
+    for nome, sql, sql_params in CONSULTAS_QUENTES:
+        params = ()
+        if sql_params:
+            cursor.execute(sql_params)
+            params = cursor.fetchone() or ()
+            if not params or params[0] is None:
+                tempos[nome] = None  # Tabela vazia: nada a medir
+                continue
+        amostras = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            cursor.execute(sql, tuple(params))
+            cursor.fetchall()
+            amostras.append((time.perf_counter() - inicio) * 1000)
+        tempos[nome] = statistics.median(amostras)
+    cursor.close()
+    con.rollback()
+    return tempos
+
+
+def indices_existentes(con):
+    cursor = con.cursor()
+    cursor.execute("SELECT TRIM(RDB$INDEX_NAME) FROM RDB$INDICES")
+    nomes = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return nomes
+
+
+def criar_indices(con):
+    """Cria os índices de sql/003_indices.sql que ainda não existem."""
+    with open(ARQUIVO_INDICES, encoding='utf-8') as f:
+        texto = re.sub(r'/\*.*?\*/', '', f.read(), flags=re.S)  # Remove comentários
+    existentes = indices_existentes(con)
+    cursor = con.cursor()
+    for comando in (c.strip() for c in texto.split(';')):
+        if not comando.upper().startswith('CREATE'):
+            continue
+        nome = re.search(r'INDEX\s+(\w+)', comando, re.I).group(1).upper()
+        if nome in existentes:
+            print(f"  já existe: {nome}")
+            continue
+        cursor.execute(comando)
+        con.commit()
+        print(f"  criado:    {nome}")
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=f"{config.DB_HOST}:{config.DB_NAME}")
+    parser.add_argument('--user', default=config.DB_USER)
+    parser.add_argument('--password', default=config.DB_PASSWORD)
+    parser.add_argument('--aplicar', action='store_true', help="Cria os índices que faltam e compara os tempos")
+    parser.add_argument('--repeticoes', type=int, default=20, help="Execuções de cada consulta na medição")
+    args = parser.parse_args()
+
+    con = fdb.connect(dsn=args.dsn, user=args.user, password=args.password, charset='UTF8')
+
+    print("== Planos das consultas ==")
+    naturais = auditar(con)
+    print(f"\n{naturais} comando(s) com leitura NATURAL\n")
+    if not args.aplicar:
+        con.close()
+        return
+
+    print("== Tempos antes ==")
+    antes = medir(con, args.repeticoes)
+    print("\n== Criando índices ==")
+    criar_indices(con)
+    print("\n== Planos depois ==")
+    auditar(con)
+    depois = medir(con, args.repeticoes)
+
+    print(f"\n== Tempos (mediana de {args.repeticoes} execuções) ==")
+    print(f"{'consulta':<28}{'antes (ms)':>12}{'depois (ms)':>13}{'ganho':>9}")
+    for nome, _, _ in CONSULTAS_QUENTES:
+        a, d = antes.get(nome), depois.get(nome)
+        if a is None or d is None:
+            print(f"{nome:<28}{'sem dados':>12}")
+            continue
+        print(f"{nome:<28}{a:>12.2f}{d:>13.2f}{(a / d if d else 0):>8.1f}x")
+    con.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark do hash de senhas: quantos logins (check_password_hash) por segundo cada núcleo aguenta.
+
+Uso:
+    python ferramentas/bench_hash.py --metodo pbkdf2:sha256:600000 --processos 4 --duracao 5
+"""
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hashing import ServicoHash  # noqa: E402
+
+SENHA = 'Senha@123'
+
+
+def medir_serial(senha_hash, duracao):
+    """Confere a senha em loop na thread atual e retorna logins/s."""
+    inicio = time.perf_counter()
+    feitos = 0
+    while time.perf_counter() - inicio < duracao:
+        check_password_hash(senha_hash, SENHA)
+        feitos += 1
+    return feitos / (time.perf_counter() - inicio)
+
+
+def medir_pool(senha_hash, processos, duracao):
+    """Mantém todos os processos ocupados durante `duracao` segundos e retorna logins/s."""
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        executor.submit(check_password_hash, senha_hash, SENHA).result()  # Aquece os processos
+        inicio = time.perf_counter()
+        feitos = 0
+        while time.perf_counter() - inicio < duracao:
+            lote = [executor.submit(check_password_hash, senha_hash, SENHA) for _ in range(processos * 4)]
+            for futuro in lote:
+                futuro.result()
+            feitos += len(lote)
+        return feitos / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metodo', default='pbkdf2:sha256:600000', help="Método do werkzeug (algoritmo:iterações)")
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1, help="Processos do pool")
+    parser.add_argument('--duracao', type=float, default=5.0, help="Segundos de cada medição")
+    args = parser.parse_args()
+
+    senha_hash = generate_password_hash(SENHA, args.metodo)
+    servico = ServicoHash(args.metodo, processos=0)
+    print(f"Método: {args.metodo} (rehash necessário para este método: {servico.precisa_rehash(senha_hash)})")
+
+    serial = medir_serial(senha_hash, args.duracao)
+    print(f"1 núcleo (thread atual): {serial:.1f} logins/s  ({1000 / serial:.1f} ms por login)")
+
+    em_pool = medir_pool(senha_hash, args.processos, args.duracao)
+    print(f"Pool com {args.processos} processos: {em_pool:.1f} logins/s  "
+          f"({em_pool / args.processos:.1f} logins/s por núcleo)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""
+Teste de carga da API: usuários virtuais executando uma mistura de operações por um tempo fixo.
+
+Cada usuário virtual é uma thread com conexão HTTP persistente (keep-alive) que sorteia a próxima
+operação conforme os pesos da mistura escolhida. Ao final mostra, por operação e no total,
+requisições/s e latência p50/p95/p99 (ms), e grava tudo em JSON para comparar execuções.
+
+Os usuários são os gerados por ferramentas/gerar_dados.py (cliente<N>@carga.teste, senha Senha@123).
+O login tem limite por IP (LOGIN_LIMITE_IP em view.py): vindo de uma máquina só, parte dos logins
+responde 429, o que aparece na contagem de códigos. Carrinho e venda exigem token: o usuário que ficou
+sem login recebe 401 nessas operações (também aparece na contagem de códigos).
+
+Uso:
+    python ferramentas/carga.py --url http://localhost:5000 --mistura compras --usuarios 32 --duracao 60
+    python ferramentas/carga.py --comparar resultados/antes.json resultados/depois.json
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import datetime
+import http.client
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RESULTADOS = os.path.join(RAIZ, 'ferramentas', 'resultados')
+DOMINIO = 'carga.teste'  # Mesmo de gerar_dados.py
+SENHA_PADRAO = 'Senha@123'
+RELATORIOS = ('clientes', 'vendedores', 'adms')
+PERCENTIS = (50, 95, 99)
+
+# Misturas de operações: nome da operação -> peso
+MISTURAS = {
+    'navegacao': {'produtos': 60, 'produto': 30, 'login': 5, 'carrinho_adicionar': 5},
+    'compras': {'produtos': 30, 'produto': 20, 'carrinho_adicionar': 25, 'venda': 15, 'login': 10},
+    'misto': {'produtos': 35, 'produto': 20, 'carrinho_adicionar': 15, 'venda': 10, 'login': 10,
+              'pdf': 5, 'pdf_job': 5},
+    'relatorios': {'pdf': 50, 'pdf_job': 20, 'produtos': 30},
+}
+
+
+class UsuarioVirtual:
+    """Uma conexão HTTP persistente com a API, com o e-mail (e token, se o login passou) de um cliente."""
+
+    def __init__(self, url, email, produtos, rnd, timeout):
+        partes = urllib.parse.urlsplit(url)
+        self.host, self.porta = partes.hostname, partes.port or (443 if partes.scheme == 'https' else 80)
+        self.https = partes.scheme == 'https'
+        self.email = email
+        self.produtos = produtos
+        self.rnd = rnd
+        self.timeout = timeout
+        self.token = None
+        self.amostras = []  # (operação, status, ms, bytes, instante)
+        self._con = None
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        """Faz a requisição e retorna (status, corpo em bytes). Reconecta se o servidor fechou a conexão."""
+        cabecalhos = {'Content-Type': 'application/json'} if corpo is not None else {}
+        if self.token:
+            cabecalhos['Authorization'] = f"Bearer {self.token}"
+        dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+        for tentativa in (1, 2):
+            if self._con is None:
+                classe = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self._con = classe(self.host, self.porta, timeout=self.timeout)
+            try:
+                self._con.request(metodo, caminho, body=dados, headers=cabecalhos)
+                resposta = self._con.getresponse()
+                return resposta.status, resposta.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.fechar()
+                if tentativa == 2:
+                    raise
+            except Exception:
+                self.fechar()
+                raise
+
+    def medir(self, operacao, funcao):
+        """Executa a operação e guarda a amostra (status 0 = erro de rede/timeout)."""
+        inicio = time.perf_counter()
+        try:
+            status, corpo = funcao()
+            tamanho = len(corpo)
+        except Exception:
+            status, tamanho = 0, 0
+        self.amostras.append((operacao, status, (time.perf_counter() - inicio) * 1000, tamanho, time.time()))
+
+    def fechar(self):
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    # ---------- operações ----------
+    def login(self):
+        status, corpo = self.requisitar('POST', '/login', {'email': self.email, 'senha': SENHA_PADRAO})
+        if status == 200:
+            self.token = json.loads(corpo).get('token')
+        return status, corpo
+
+    def produtos_pagina(self):
+        # Primeira página do catálogo, com tamanhos variados e metade das vezes com projeção (fields)
+        caminho = f"/produtos?limite={self.rnd.choice((20, 50, 100))}"
+        if self.rnd.random() < 0.5:
+            caminho += '&fields=id,nome,preco,imagem'
+        return self.requisitar('GET', caminho)
+
+    def produto(self):
+        return self.requisitar('GET', f"/produto/{self.rnd.choice(self.produtos)}")
+
+    def carrinho_adicionar(self):
+        return self.requisitar('POST', '/carrinho/adicionar', {
+            'email_cliente': self.email, 'id_produto': self.rnd.choice(self.produtos),
+            'quantidade': self.rnd.randint(1, 3)})
+
+    def venda(self):
+        return self.requisitar('POST', '/venda', {
+            'email_cliente': self.email, 'id_produto': self.rnd.choice(self.produtos),
+            'quantidade': self.rnd.randint(1, 3)})
+
+    def pdf(self):
+        return self.requisitar('GET', f"/pdf/{self.rnd.choice(RELATORIOS)}")
+
+    def pdf_job(self):
+        """Enfileira o relatório e espera ficar pronto (long-poll): mede o tempo de ponta a ponta."""
+        status, corpo = self.requisitar('POST', f"/pdf/{self.rnd.choice(RELATORIOS)}/job")
+        if status != 202:
+            return status, corpo
+        id_job = json.loads(corpo)['id_job']
+        status, corpo = self.requisitar('GET', f"/jobs/{id_job}?esperar=30")
+        if status == 200 and json.loads(corpo).get('status') == 'concluido':
+            return self.requisitar('GET', f"/jobs/{id_job}/download")
+        return (status if status != 200 else 504), corpo  # Não terminou dentro da espera
+
+
+OPERACOES = {
+    'login': UsuarioVirtual.login,
+    'produtos': UsuarioVirtual.produtos_pagina,
+    'produto': UsuarioVirtual.produto,
+    'carrinho_adicionar': UsuarioVirtual.carrinho_adicionar,
+    'venda': UsuarioVirtual.venda,
+    'pdf': UsuarioVirtual.pdf,
+    'pdf_job': UsuarioVirtual.pdf_job,
+}
+
+
+def percentil(valores_ordenados, p):
+    """Percentil pelo método nearest-rank."""
+    if not valores_ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(valores_ordenados)) - 1)
+    return valores_ordenados[indice]
+
+
+def resumir(amostras, segundos):
+    """Estatísticas de um conjunto de amostras (operação, status, ms, bytes, instante)."""
+    tempos = sorted(a[2] for a in amostras)
+    codigos = {}
+    for a in amostras:
+        codigos[str(a[1])] = codigos.get(str(a[1]), 0) + 1
+    erros = sum(1 for a in amostras if a[1] == 0 or a[1] >= 500)
+    resumo = {
+        'requisicoes': len(amostras),
+        'requisicoes_por_segundo': round(len(amostras) / segundos, 2) if segundos else 0,
+        'erros': erros,
+        'taxa_erro': round(erros / len(amostras), 4) if amostras else 0,
+        'codigos': codigos,
+        'bytes_recebidos': sum(a[3] for a in amostras),
+        'ms_media': round(sum(tempos) / len(tempos), 2) if tempos else None,
+        'ms_max': round(tempos[-1], 2) if tempos else None,
+    }
+    for p in PERCENTIS:
+        valor = percentil(tempos, p)
+        resumo[f"ms_p{p}"] = round(valor, 2) if valor is not None else None
+    return resumo
+
+
+def amostra_produtos(url, quantidade, timeout):
+    """IDs de produtos reais, lidos por GET /produtos seguindo o next_cursor."""
+    usuario = UsuarioVirtual(url, None, [], random.Random(), timeout)
+    ids, cursor = [], None
+    while len(ids) < quantidade:
+        caminho = '/produtos?limite=200&fields=id' + (f"&cursor={urllib.parse.quote(cursor)}" if cursor else '')
+        status, corpo = usuario.requisitar('GET', caminho)
+        if status != 200:
+            sys.exit(f"GET /produtos respondeu {status}: {corpo[:200]!r}")
+        dados = json.loads(corpo)
+        ids += [p['id'] for p in dados['produtos']]
+        cursor = dados.get('next_cursor')
+        if not cursor:
+            break
+    usuario.fechar()
+    return ids[:quantidade]
+
+
+def executar(args):
+    mistura = MISTURAS[args.mistura]
+    operacoes, pesos = list(mistura), list(mistura.values())
+    produtos = amostra_produtos(args.url, args.produtos_amostra, args.timeout)
+    if not produtos:
+        sys.exit("Nenhum produto encontrado: rode ferramentas/gerar_dados.py antes")
+
+    usuarios = [UsuarioVirtual(args.url, f"cliente{n % args.clientes + 1}@{DOMINIO}", produtos,
+                               random.Random(args.semente + n), args.timeout)
+                for n in range(args.usuarios)]
+    for usuario in usuarios:  # Login inicial (se o limite por IP barrar, segue sem token)
+        usuario.medir('login_inicial', usuario.login)
+
+    print(f"{args.usuarios} usuários, mistura '{args.mistura}', {args.aquecimento:.0f}s de aquecimento "
+          f"+ {args.duracao:.0f}s de medição em {args.url}")
+    inicio_medicao = time.time() + args.aquecimento
+    fim = inicio_medicao + args.duracao
+    parar = threading.Event()
+
+    def loop(usuario):
+        while not parar.is_set() and time.time() < fim:
+            operacao = usuario.rnd.choices(operacoes, weights=pesos)[0]
+            usuario.medir(operacao, lambda: OPERACOES[operacao](usuario))
+            if args.pausa:
+                time.sleep(usuario.rnd.expovariate(1 / args.pausa))  # "Tempo de leitura" entre cliques
+        usuario.fechar()
+
+    with ThreadPoolExecutor(max_workers=args.usuarios) as executor:
+        try:
+            for futuro in [executor.submit(loop, u) for u in usuarios]:
+                futuro.result()
+        except KeyboardInterrupt:
+            parar.set()
+    duracao_real = min(time.time(), fim) - inicio_medicao
+
+    medidas = [a for u in usuarios for a in u.amostras if a[0] != 'login_inicial' and a[4] >= inicio_medicao]
+    por_operacao = {op: resumir([a for a in medidas if a[0] == op], duracao_real) for op in operacoes}
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': versao_codigo(),
+        'url': args.url,
+        'mistura': args.mistura,
+        'pesos': mistura,
+        'usuarios': args.usuarios,
+        'duracao': round(duracao_real, 2),
+        'aquecimento': args.aquecimento,
+        'pausa': args.pausa,
+        'logins_iniciais_com_token': sum(1 for u in usuarios if u.token),
+        'total': resumir(medidas, duracao_real),
+        'operacoes': por_operacao,
+    }
+
+
+def versao_codigo():
+    """Commit atual do repositório (para saber qual código foi medido)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def imprimir(resultado):
+    print(f"\n{'operação':<20}{'req':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'erros':>7}  códigos")
+    linhas = list(resultado['operacoes'].items()) + [('TOTAL', resultado['total'])]
+    for nome, r in linhas:
+        if not r['requisicoes']:
+            print(f"{nome:<20}{0:>8}")
+            continue
+        codigos = ' '.join(f"{c}:{n}" for c, n in sorted(r['codigos'].items()))
+        print(f"{nome:<20}{r['requisicoes']:>8}{r['requisicoes_por_segundo']:>9.1f}{r['ms_p50']:>9.1f}"
+              f"{r['ms_p95']:>9.1f}{r['ms_p99']:>9.1f}{r['erros']:>7}  {codigos}")
+
+
+def comparar(caminho_antes, caminho_depois):
+    """Mostra a variação de req/s e dos percentis entre duas execuções gravadas."""
+    with open(caminho_antes, encoding='utf-8') as f:
+        antes = json.load(f)
+    with open(caminho_depois, encoding='utf-8') as f:
+        depois = json.load(f)
+    print(f"antes:  {caminho_antes} (commit {antes.get('commit')}, mistura {antes['mistura']})")
+    print(f"depois: {caminho_depois} (commit {depois.get('commit')}, mistura {depois['mistura']})\n")
+
+    def variacao(a, d):
+        if a is None or d is None or not a:
+            return f"{'-':>20}"
+        return f"{a:>8.1f} -> {d:<8.1f}{(d - a) / a * 100:>+6.0f}%"
+
+    campos = ('requisicoes_por_segundo',) + tuple(f"ms_p{p}" for p in PERCENTIS)
+    print(f"{'operação':<20}" + ''.join(f"{c.replace('requisicoes_por_segundo', 'req/s'):>26}" for c in campos))
+    nomes = [n for n in antes['operacoes'] if n in depois['operacoes']] + ['TOTAL']
+    for nome in nomes:
+        a = antes['total'] if nome == 'TOTAL' else antes['operacoes'][nome]
+        d = depois['total'] if nome == 'TOTAL' else depois['operacoes'][nome]
+        print(f"{nome:<20}" + ''.join(f"{variacao(a.get(c), d.get(c)):>26}" for c in campos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--mistura', choices=sorted(MISTURAS), default='misto')
+    parser.add_argument('--usuarios', type=int, default=16, help="Usuários virtuais simultâneos")
+    parser.add_argument('--duracao', type=float, default=30, help="Segundos de medição")
+    parser.add_argument('--aquecimento', type=float, default=5, help="Segundos iniciais descartados")
+    parser.add_argument('--pausa', type=float, default=0, help="Pausa média entre operações (s); 0 = sem pausa")
+    parser.add_argument('--clientes', type=int, default=1000, help="Clientes gerados por gerar_dados.py")
+    parser.add_argument('--produtos-amostra', type=int, default=2000, help="Produtos sorteados pelas operações")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help="Arquivo JSON do resultado (padrão: ferramentas/resultados/carga-<data>.json)")
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DEPOIS'), help="Compara dois resultados e sai")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    resultado = executar(args)
+    imprimir(resultado)
+    saida = args.saida or os.path.join(
+        PASTA_RESULTADOS, f"carga-{args.mistura}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultado gravado em {saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Gera dados sintéticos no AUTOPRIME.FDB para benchmarks e testes de carga.
+
+Preenche CADASTRO (clientes, vendedores e adms), PRODUTOS, VENDAS (+ CASHBACKS) e CARRINHO
+com volumes configuráveis. Os dados são determinísticos para a mesma --semente.
+Todos os usuários gerados usam a senha SENHA_PADRAO e e-mails no domínio DOMINIO,
+que é o que ferramentas/carga.py usa para fazer login.
+
+Uso:
+    python ferramentas/gerar_dados.py --clientes 10000 --produtos 5000 --vendas 1000000
+    python ferramentas/gerar_dados.py --vendas 0 --carrinho 3        # só cadastros, produtos e carrinhos
+    python ferramentas/gerar_dados.py --limpar                        # remove os dados gerados antes
+"""
+from werkzeug.security import generate_password_hash
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+import fdb
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+import config  # noqa: E402
+
+SENHA_PADRAO = 'Senha@123'
+DOMINIO = 'carga.teste'  # Identifica os dados gerados (usado também pelo --limpar)
+VENDEDOR_PADRAO_EMAIL = 'vendedor@gmail.com'  # Mesmo de view.py: POST /venda exige que exista
+CASHBACK_PERCENTUAL = 0.05
+
+MARCAS = ['Bosch', 'Pirelli', 'Michelin', 'Mobil', 'Castrol', 'NGK', 'Valeo', 'Magneti Marelli', 'Cofap', 'Fras-le']
+ACABAMENTOS = ['Fosco', 'Brilhante', 'Cromado', 'Acetinado', 'Metálico', 'Sem acabamento']
+PECAS = ['Pastilha de freio', 'Filtro de óleo', 'Vela de ignição', 'Amortecedor', 'Pneu aro 15', 'Óleo 5W30',
+         'Correia dentada', 'Bateria 60Ah', 'Palheta', 'Farol', 'Retrovisor', 'Radiador', 'Embreagem']
+
+
+def em_lotes(cursor, con, sql, linhas, lote, rotulo):
+    """executemany em lotes de `lote` linhas, com commit e progresso a cada lote."""
+    inicio = time.perf_counter()
+    total = 0
+    for i in range(0, len(linhas), lote):
+        parte = linhas[i:i + lote]
+        cursor.executemany(sql, parte)
+        con.commit()
+        total += len(parte)
+        print(f"\r  {rotulo}: {total}/{len(linhas)}", end='', flush=True)
+    decorrido = time.perf_counter() - inicio
+    print(f"\r  {rotulo}: {total} em {decorrido:.1f}s ({total / decorrido if decorrido else 0:.0f}/s)")
+
+
+def ids_gerados(cursor, sql):
+    cursor.execute(sql, (f"%@{DOMINIO}",))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def limpar(con):
+    """
+    Remove tudo o que foi gerado (identificado pelo domínio dos e-mails).
+    RESUMO_VENDAS continua com os totais antigos: para zerá-los, rode de novo o backfill de
+    sql/001_resumos_vendas.sql depois de apagar a tabela.
+    """
+    cursor = con.cursor()
+    filtro = f"SELECT ID_CADASTRO FROM CADASTRO WHERE EMAIL LIKE '%@{DOMINIO}'"
+    for sql in (f"DELETE FROM CARRINHO WHERE ID_CLIENTE IN ({filtro})",
+                f"DELETE FROM CASHBACK_LANCAMENTOS WHERE ID_CLIENTE IN ({filtro})",
+                f"DELETE FROM CASHBACK_SALDO WHERE ID_CLIENTE IN ({filtro})",
+                f"DELETE FROM CASHBACKS WHERE ID_CLIENTE IN ({filtro})",
+                f"DELETE FROM VENDAS WHERE ID_CLIENTE IN ({filtro}) OR ID_VENDEDOR IN ({filtro})",
+                f"DELETE FROM PRODUTOS WHERE ID_VENDEDOR IN ({filtro})",
+                f"DELETE FROM CADASTRO WHERE EMAIL LIKE '%@{DOMINIO}'"):
+        cursor.execute(sql)
+        print(f"  {sql.split(' WHERE')[0]}: {cursor.rowcount} linha(s)")
+    con.commit()
+    cursor.close()
+
+
+def gerar_usuarios(con, rnd, args):
+    cursor = con.cursor()
+    senha_hash = generate_password_hash(SENHA_PADRAO, args.metodo_hash)  # Um hash só, reaproveitado por todos
+    linhas = []
+    for cargo, qtd in (('cliente', args.clientes), ('vendedor', args.vendedores), ('adm', args.adms)):
+        for n in range(1, qtd + 1):
+            linhas.append((f"{cargo.capitalize()} {n}", f"{cargo}{n}@{DOMINIO}", cargo, senha_hash, 1))
+    em_lotes(cursor, con, "INSERT INTO CADASTRO (NOME, EMAIL, CARGO, SENHA, ATIVO) VALUES (?, ?, ?, ?, ?)",
+             linhas, args.lote, "CADASTRO")
+
+    # POST /venda sempre usa o vendedor padrão: garante que ele exista
+    cursor.execute("SELECT 1 FROM CADASTRO WHERE EMAIL = ?", (VENDEDOR_PADRAO_EMAIL,))
+    if not cursor.fetchone():
+        cursor.execute("INSERT INTO CADASTRO (NOME, EMAIL, CARGO, SENHA, ATIVO) VALUES (?, ?, ?, ?, ?)",
+                       ('Vendedor Padrão', VENDEDOR_PADRAO_EMAIL, 'vendedor', senha_hash, 1))
+        con.commit()
+        print(f"  vendedor padrão {VENDEDOR_PADRAO_EMAIL} criado")
+
+    clientes = ids_gerados(cursor, "SELECT ID_CADASTRO FROM CADASTRO WHERE CARGO = 'cliente' AND EMAIL LIKE ?")
+    vendedores = ids_gerados(cursor, "SELECT ID_CADASTRO FROM CADASTRO WHERE CARGO = 'vendedor' AND EMAIL LIKE ?")
+    cursor.close()
+    return clientes, vendedores
+
+
+def gerar_produtos(con, rnd, args, vendedores):
+    cursor = con.cursor()
+    cursor.execute("SELECT COALESCE(MAX(ID), 0) FROM PRODUTOS")
+    ultimo = cursor.fetchone()[0]
+    linhas = []
+    for n in range(1, args.produtos + 1):
+        marca = rnd.choice(MARCAS)
+        peca = rnd.choice(PECAS)
+        linhas.append((f"{peca} {marca} #{ultimo + n}", f"{peca} da marca {marca} (gerado para teste de carga)",
+                       round(rnd.uniform(15, 2500), 2), rnd.choice(ACABAMENTOS), marca, rnd.choice(vendedores)))
+    em_lotes(cursor, con, """
+        INSERT INTO PRODUTOS (NOME, DESCRICAO, PRECO, ACABAMENTO, MARCA, ID_VENDEDOR)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, linhas, args.lote, "PRODUTOS")
+    cursor.execute("SELECT ID, PRECO FROM PRODUTOS WHERE ID > ?", (ultimo,))
+    produtos = [(row[0], float(row[1])) for row in cursor.fetchall()]
+    cursor.close()
+    return produtos
+
+
+def gerar_vendas(con, rnd, args, clientes, vendedores, produtos):
+    """
+    Insere as vendas em lotes e, a cada lote, os cashbacks correspondentes num único INSERT ... SELECT
+    (os triggers de resumos e do saldo de cashback rodam normalmente para cada linha).
+    """
+    cursor = con.cursor()
+    agora = datetime.datetime.now()
+    # Alguns clientes compram muito mais que outros (distribuição parecida com a real)
+    pesos = [1 / (i + 1) for i in range(len(clientes))]
+    inicio = time.perf_counter()
+    feitas = 0
+    while feitas < args.vendas:
+        qtd = min(args.lote, args.vendas - feitas)
+        compradores = rnd.choices(clientes, weights=pesos, k=qtd)
+        linhas = []
+        for id_cliente in compradores:
+            id_produto, preco = rnd.choice(produtos)
+            quantidade = rnd.randint(1, 5)
+            data = agora - datetime.timedelta(seconds=rnd.randint(0, args.dias * 86400))
+            linhas.append((id_produto, id_cliente, rnd.choice(vendedores), quantidade,
+                           round(preco * quantidade, 2), data))
+        cursor.execute("SELECT COALESCE(MAX(ID_VENDA), 0) FROM VENDAS")
+        ultimo = cursor.fetchone()[0]
+        cursor.executemany("""
+            INSERT INTO VENDAS (ID_PRODUTO, ID_CLIENTE, ID_VENDEDOR, QUANTIDADE, VALOR_TOTAL, DATA_VENDA)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, linhas)
+        cursor.execute("""
+            INSERT INTO CASHBACKS (ID_CLIENTE, ID_VENDA, VALOR_CASHBACK, DATA_GERACAO)
+            SELECT ID_CLIENTE, ID_VENDA, CAST(VALOR_TOTAL * ? AS DECIMAL(18, 2)), DATA_VENDA
+            FROM VENDAS WHERE ID_VENDA > ?
+        """, (CASHBACK_PERCENTUAL, ultimo))
+        con.commit()
+        feitas += qtd
+        decorrido = time.perf_counter() - inicio
+        print(f"\r  VENDAS + CASHBACKS: {feitas}/{args.vendas} ({feitas / decorrido:.0f}/s)", end='', flush=True)
+    print(f"\r  VENDAS + CASHBACKS: {feitas} em {time.perf_counter() - inicio:.1f}s" + ' ' * 20)
+    cursor.close()
+
+
+def gerar_carrinhos(con, rnd, args, clientes, produtos):
+    cursor = con.cursor()
+    linhas = []
+    for id_cliente in clientes:
+        for id_produto, preco in rnd.sample(produtos, min(rnd.randint(0, args.carrinho * 2), len(produtos))):
+            quantidade = rnd.randint(1, 3)
+            linhas.append((id_cliente, id_produto, quantidade, preco, round(preco * quantidade, 2)))
+    em_lotes(cursor, con, """
+        INSERT INTO CARRINHO (ID_CLIENTE, ID_PRODUTO, QUANTIDADE, VALOR_UNITARIO, VALOR_TOTAL)
+        VALUES (?, ?, ?, ?, ?)
+    """, linhas, args.lote, "CARRINHO")
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=f"{config.DB_HOST}:{config.DB_NAME}")
+    parser.add_argument('--user', default=config.DB_USER)
+    parser.add_argument('--password', default=config.DB_PASSWORD)
+    parser.add_argument('--clientes', type=int, default=1000)
+    parser.add_argument('--vendedores', type=int, default=50)
+    parser.add_argument('--adms', type=int, default=5)
+    parser.add_argument('--produtos', type=int, default=2000)
+    parser.add_argument('--vendas', type=int, default=100000, help="Vendas (cada uma com seu cashback)")
+    parser.add_argument('--carrinho', type=int, default=2, help="Média de itens no carrinho de cada cliente")
+    parser.add_argument('--dias', type=int, default=365, help="Período em que as datas das vendas são espalhadas")
+    parser.add_argument('--lote', type=int, default=5000, help="Linhas por commit")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--metodo-hash', default='pbkdf2:sha256:600000', help="Mesmo HASH_METODO de view.py")
+    parser.add_argument('--limpar', action='store_true', help=f"Remove os dados @{DOMINIO} antes de gerar")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semente)
+    con = fdb.connect(dsn=args.dsn, user=args.user, password=args.password, charset='UTF8')
+    if args.limpar:
+        print("== Removendo dados gerados anteriormente ==")
+        limpar(con)
+
+    print("== Gerando ==")
+    clientes, vendedores = gerar_usuarios(con, rnd, args)
+    if not clientes or not vendedores:
+        sys.exit("É preciso ao menos 1 cliente e 1 vendedor")
+    produtos = gerar_produtos(con, rnd, args, vendedores)
+    if produtos and args.vendas:
+        gerar_vendas(con, rnd, args, clientes, vendedores, produtos)
+    if produtos and args.carrinho:
+        gerar_carrinhos(con, rnd, args, clientes, produtos)
+    con.close()
+    print(f"\nLogin dos usuários gerados: cliente<N>@{DOMINIO} / vendedor<N>@{DOMINIO} / adm<N>@{DOMINIO}, "
+          f"senha {SENHA_PADRAO}")
+
+
+if __name__ == '__main__':
+    main()
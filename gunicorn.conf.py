@@ -0,0 +1,41 @@
+# ==============================================
+#  CONFIGURAÇÃO DO GUNICORN (gunicorn -c gunicorn.conf.py wsgi:app)
+# ==============================================
+# Vários processos (workers) com várias threads cada. Com preload, o app é importado uma vez no
+# processo mestre e compartilhado com os workers pelo fork (sobe mais rápido e usa menos memória).
+# Restart sem derrubar requisições: kill -HUP <pid do mestre> (workers novos sobem antes dos antigos saírem).
+import config
+
+bind = config.SERVIDOR_BIND
+workers = config.SERVIDOR_WORKERS
+threads = config.SERVIDOR_THREADS
+worker_class = 'gthread'
+preload_app = True
+timeout = config.SERVIDOR_TIMEOUT
+graceful_timeout = config.SERVIDOR_GRACEFUL
+max_requests = config.SERVIDOR_MAX_REQUISICOES
+max_requests_jitter = max_requests // 10  # Evita que todos os workers reciclem ao mesmo tempo
+keepalive = 5
+
+
+def when_ready(server):
+    # No mestre, depois do preload: nenhuma conexão do banco pode ser herdada pelos workers
+    from view import pool
+    pool.fechar_todas()
+
+
+def post_worker_init(worker):
+    # Em cada worker, já com o app carregado: recria o pool e sobe as threads de fundo.
+    # Todos tentam retomar os jobs de workers que já saíram; a fila garante um dono só por job.
+    from view import iniciar_servicos
+    iniciar_servicos()
+
+
+def worker_exit(server, worker):
+    from view import pool, compactador_resumos, recarregador_busca, feed_eventos, servico_hash, fila_jobs
+    compactador_resumos.parar()
+    recarregador_busca.parar()
+    feed_eventos.parar()
+    servico_hash.fechar()
+    fila_jobs.fechar()  # Jobs não iniciados ficam pendentes e são assumidos pelo próximo worker
+    pool.fechar_todas()
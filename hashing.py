@@ -0,0 +1,54 @@
+# ==============================================
+#  SERVIÇO DE HASH DE SENHAS
+# ==============================================
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from processos import contexto_processos
+import threading
+
+
+class ServicoHash:
+    """
+    Gera e confere hashes de senha fora da thread da requisição.
+    - metodo: formato do werkzeug, ex: 'pbkdf2:sha256:600000' (algoritmo e iterações)
+    - processos: tamanho do pool de processos; 0 calcula na própria thread
+    O PBKDF2 segura o GIL enquanto calcula; rodando em outro processo, a thread da
+    requisição só espera o resultado e as outras rotas continuam sendo atendidas.
+    """
+
+    def __init__(self, metodo='pbkdf2:sha256:600000', processos=2):
+        self.metodo = metodo
+        self.num_processos = processos
+        self._executor = None  # Criado no primeiro uso, já dentro do worker
+        self._lock = threading.Lock()
+
+    def gerar(self, senha):
+        """Retorna o hash da senha com o método configurado."""
+        return self._rodar(generate_password_hash, senha, self.metodo)
+
+    def verificar(self, senha_hash, senha):
+        """Confere a senha contra o hash guardado (qualquer método suportado pelo werkzeug)."""
+        if not senha_hash or senha is None:
+            return False
+        return self._rodar(check_password_hash, senha_hash, senha)
+
+    def precisa_rehash(self, senha_hash):
+        """True se o hash foi gerado com outro algoritmo/número de iterações que o configurado."""
+        metodo_hash = senha_hash.split('$', 1)[0]
+        return metodo_hash != self.metodo
+
+    def _rodar(self, funcao, *args):
+        if not self.num_processos:
+            return funcao(*args)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.num_processos,
+                                                     mp_context=contexto_processos())
+        return self._executor.submit(funcao, *args).result()
+
+    def fechar(self):
+        """Encerra o pool de processos (saída do worker); um novo uso cria outro."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+# ==============================================
+#  PIPELINE DE IMAGENS DOS PRODUTOS
+# ==============================================
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+import json
+import io
+import os
+
+try:
+    from PIL import Image
+except ImportError:  # Sem Pillow: guarda só o original, sem variantes
+    Image = None
+
+# Variantes geradas: nome -> maior lado em pixels (da maior para a menor)
+VARIANTES = (('full', 1600), ('medium', 600), ('thumb', 160))
+# Formatos de saída: nome -> (formato do Pillow, extensão, opções de gravação)
+FORMATOS = {
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', '.jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+class ProcessadorImagens:
+    """
+    Recebe o upload, grava o original com nome baseado no hash do conteúdo e gera, em segundo plano,
+    as variantes thumb/medium/full em WebP e JPEG. O mapa das variantes fica em '<hash>.json'.
+    Como o nome muda sempre que o conteúdo muda, os arquivos nunca são sobrescritos e podem ter cache eterno.
+    - pasta: pasta física das imagens (ex: static/imagens/produto)
+    - prefixo: prefixo do caminho gravado no banco (ex: 'produto')
+    """
+
+    def __init__(self, pasta, prefixo, threads=2):
+        self.pasta = pasta
+        self.prefixo = prefixo
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='imagem')
+        os.makedirs(pasta, exist_ok=True)
+        if Image is None:
+            logging.warning("Pillow não instalado: imagens serão salvas sem variantes")
+
+    def salvar(self, conteudo, extensao, ao_concluir=None):
+        """
+        Grava o original e agenda as variantes. Retorna o caminho relativo do original (para o banco).
+        `ao_concluir(mapa)` é chamado na thread de fundo quando as variantes ficam prontas.
+        """
+        base = hashlib.sha256(conteudo).hexdigest()[:32]
+        nome_original = f"{base}{extensao.lower()}"
+        caminho = os.path.join(self.pasta, nome_original)
+        if not os.path.exists(caminho):  # Mesmo conteúdo já enviado antes: nada a gravar
+            self._gravar(caminho, conteudo)
+        if Image is not None and not os.path.exists(os.path.join(self.pasta, f"{base}.json")):
+            self._executor.submit(self._processar, conteudo, base, nome_original, ao_concluir)
+        return f"{self.prefixo}/{nome_original}"
+
+    def mapa(self, imagem):
+        """Lê o mapa de variantes de uma imagem ('produto/<hash>.ext'); None se ainda não existir."""
+        if not imagem:
+            return None
+        base = os.path.splitext(os.path.basename(imagem))[0]
+        try:
+            with open(os.path.join(self.pasta, f"{base}.json"), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def remover(self, imagem):
+        """
+        Apaga o original, o mapa e as variantes de uma imagem ('produto/<hash>.ext') que deixou de ser usada.
+        Imagens sem hash no nome (enviadas antes deste pipeline) não são apagadas.
+        """
+        nome_original = os.path.basename(imagem or '')
+        base = os.path.splitext(nome_original)[0]
+        if len(base) != 32 or any(c not in '0123456789abcdef' for c in base):
+            return
+        nomes = [nome_original, f"{base}.json"]  # O mapa sai junto: sem ele a imagem volta a ser "sem variantes"
+        nomes += [f"{base}_{variante}{extensao}" for variante, _ in VARIANTES for _, extensao, _ in FORMATOS.values()]
+        for nome in nomes:
+            try:
+                os.remove(os.path.join(self.pasta, nome))
+            except OSError:
+                pass  # Variante que nunca foi gerada (ou já apagada por outro worker)
+
+    # ---------- auxiliares internos ----------
+    def _processar(self, conteudo, base, nome_original, ao_concluir):
+        try:
+            imagem = Image.open(io.BytesIO(conteudo))  # Decodifica uma única vez
+            imagem.load()
+            if imagem.mode not in ('RGB', 'RGBA'):
+                imagem = imagem.convert('RGBA' if 'transparency' in imagem.info else 'RGB')
+
+            mapa = {'original': f"{self.prefixo}/{nome_original}"}
+            atual = imagem
+            for variante, lado in VARIANTES:
+                # Cada variante é reduzida a partir da anterior (mais rápido que partir do original)
+                if max(atual.size) > lado:
+                    atual = atual.copy()
+                    atual.thumbnail((lado, lado), Image.LANCZOS)
+                mapa[variante] = {'largura': atual.size[0], 'altura': atual.size[1]}
+                for formato, (formato_pil, extensao, opcoes) in FORMATOS.items():
+                    saida = atual
+                    if formato_pil == 'JPEG' and saida.mode == 'RGBA':
+                        fundo = Image.new('RGB', saida.size, (255, 255, 255))  # JPEG não tem transparência
+                        fundo.paste(saida, mask=saida.split()[3])
+                        saida = fundo
+                    buffer = io.BytesIO()
+                    saida.save(buffer, formato_pil, **opcoes)
+                    nome = f"{base}_{variante}{extensao}"
+                    self._gravar(os.path.join(self.pasta, nome), buffer.getvalue())
+                    mapa[variante][formato] = f"{self.prefixo}/{nome}"
+
+            # O mapa é gravado por último: se existe, todas as variantes existem
+            self._gravar(os.path.join(self.pasta, f"{base}.json"), json.dumps(mapa).encode('utf-8'))
+            if ao_concluir:
+                ao_concluir(mapa)
+        except Exception as e:
+            logging.error(f"Erro ao gerar variantes da imagem {nome_original}: {str(e)}")
+
+    @staticmethod
+    def _gravar(caminho, conteudo):
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)  # O arquivo só aparece completo
@@ -0,0 +1,236 @@
+# ==============================================
+#  FILA DE TAREFAS EM SEGUNDO PLANO
+# ==============================================
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import sqlite3
+import threading
+import logging
+import json
+import time
+import uuid
+import os
+from processos import contexto_processos
+
+# Situações possíveis de um job
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+
+class FilaJobs:
+    """
+    Executa tarefas pesadas (ex: geração de relatórios) fora da thread da requisição.
+    - Os jobs ficam registrados numa tabela SQLite, visível para todos os workers.
+    - O resultado (bytes) de cada job é gravado em `pasta` e pode ser baixado depois.
+    - `concorrencia` limita quantos jobs rodam ao mesmo tempo neste processo.
+    - `processos` > 0 cria um pool de processos para a parte que consome CPU.
+    - Jobs terminados há mais de `retencao` segundos são apagados (registro e arquivo).
+    - Cada job tem um dono (PID do worker que vai executá-lo). Jobs de um dono que não existe mais
+      são assumidos por retomar_pendentes() em qualquer worker, um UPDATE condicional por job:
+      exatamente um worker fica com cada um, e os jobs de workers ainda vivos (ex: os antigos
+      terminando depois de um HUP) não são tocados.
+    """
+
+    def __init__(self, banco, pasta, concorrencia=2, processos=0, retencao=3600):
+        self.banco = banco
+        self.pasta = pasta
+        self.retencao = retencao
+        self.num_processos = processos
+        self._tarefas = {}  # tipo -> função(params) que devolve bytes
+        self._executor = ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='job')
+        self._processos = None  # Criado só quando for usado
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()  # Acorda quem está esperando um job terminar
+        os.makedirs(pasta, exist_ok=True)
+        with self._conectar() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS JOBS (
+                    ID TEXT PRIMARY KEY,
+                    TIPO TEXT NOT NULL,
+                    PARAMS TEXT NOT NULL,
+                    STATUS TEXT NOT NULL,
+                    ERRO TEXT,
+                    ARQUIVO TEXT,
+                    CRIADO_EM REAL NOT NULL,
+                    INICIADO_EM REAL,
+                    CONCLUIDO_EM REAL,
+                    DONO INTEGER
+                )
+            """)
+            try:
+                db.execute("ALTER TABLE JOBS ADD COLUMN DONO INTEGER")  # Tabela criada antes da coluna existir
+            except sqlite3.OperationalError:
+                pass  # Já existe
+
+    # ---------- cadastro e envio ----------
+    def registrar(self, tipo, funcao):
+        """Associa um tipo de job à função que o executa."""
+        self._tarefas[tipo] = funcao
+
+    def retomar_pendentes(self):
+        """
+        Assume os jobs cujo dono já saiu (worker reciclado, HUP, reinício): reenvia os pendentes e marca
+        como erro os que foram interrompidos no meio. Pode ser chamado por todos os workers ao subir.
+        """
+        with self._conectar() as db:
+            abertos = db.execute("SELECT ID, TIPO, PARAMS, STATUS, DONO FROM JOBS WHERE STATUS IN (?, ?)",
+                                 (PENDENTE, EXECUTANDO)).fetchall()
+        eu = os.getpid()
+        for id_job, tipo, params, status, dono in abertos:
+            if _processo_vivo(dono) or (status == PENDENTE and tipo not in self._tarefas):
+                continue
+            with self._conectar() as db:
+                if status == EXECUTANDO:
+                    cursor = db.execute("""
+                        UPDATE JOBS SET DONO = ?, STATUS = ?, ERRO = ?, CONCLUIDO_EM = ?
+                        WHERE ID = ? AND STATUS = ? AND DONO IS ?
+                    """, (eu, ERRO, 'Interrompido pelo reinício do worker', time.time(), id_job, EXECUTANDO, dono))
+                else:
+                    cursor = db.execute("UPDATE JOBS SET DONO = ? WHERE ID = ? AND STATUS = ? AND DONO IS ?",
+                                        (eu, id_job, PENDENTE, dono))
+                assumiu = cursor.rowcount == 1  # 0: outro worker assumiu primeiro
+            if assumiu and status == PENDENTE:
+                self._executor.submit(self._executar, id_job, tipo, json.loads(params))
+
+    def enviar(self, tipo, params):
+        """Coloca um job na fila e retorna o seu ID."""
+        if tipo not in self._tarefas:
+            raise ValueError(f"Tipo de job desconhecido: {tipo}")
+        self.limpar_antigos()
+        id_job = uuid.uuid4().hex
+        with self._conectar() as db:
+            db.execute("INSERT INTO JOBS (ID, TIPO, PARAMS, STATUS, CRIADO_EM, DONO) VALUES (?, ?, ?, ?, ?, ?)",
+                       (id_job, tipo, json.dumps(params), PENDENTE, time.time(), os.getpid()))
+        self._executor.submit(self._executar, id_job, tipo, params)
+        return id_job
+
+    def em_processo(self, funcao, *args):
+        """Roda `funcao(*args)` no pool de processos (se configurado) e espera o resultado."""
+        if not self.num_processos:
+            return funcao(*args)
+        with self._lock:
+            if self._processos is None:
+                self._processos = ProcessPoolExecutor(max_workers=self.num_processos,
+                                                      mp_context=contexto_processos())
+        return self._processos.submit(funcao, *args).result()
+
+    def fechar(self):
+        """Encerra as threads e o pool de processos (saída do worker). Jobs não iniciados ficam PENDENTES."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            processos, self._processos = self._processos, None
+        if processos is not None:
+            processos.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- consulta ----------
+    def status(self, id_job):
+        """Retorna o dicionário com a situação do job, ou None se não existir."""
+        with self._conectar() as db:
+            row = db.execute("""
+                SELECT ID, TIPO, PARAMS, STATUS, ERRO, ARQUIVO, CRIADO_EM, INICIADO_EM, CONCLUIDO_EM
+                FROM JOBS WHERE ID = ?
+            """, (id_job,)).fetchone()
+        if not row:
+            return None
+        return {
+            "id_job": row[0],
+            "tipo": row[1],
+            "params": json.loads(row[2]),
+            "status": row[3],
+            "erro": row[4],
+            "arquivo": row[5],
+            "criado_em": row[6],
+            "iniciado_em": row[7],
+            "concluido_em": row[8],
+        }
+
+    def aguardar(self, id_job, timeout):
+        """Long-poll: espera até `timeout` segundos o job terminar e retorna o status."""
+        limite = time.monotonic() + timeout
+        while True:
+            job = self.status(id_job)
+            if job is None or job['status'] in (CONCLUIDO, ERRO):
+                return job
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return job
+            # Acorda quando um job deste processo terminar; o limite de 1s cobre jobs de outros workers
+            with self._cond:
+                self._cond.wait(min(restante, 1.0))
+
+    # ---------- retenção ----------
+    def limpar_antigos(self):
+        """Apaga jobs terminados há mais tempo que a retenção, junto com o arquivo gerado."""
+        limite = time.time() - self.retencao
+        with self._conectar() as db:
+            antigos = db.execute("SELECT ID, ARQUIVO FROM JOBS WHERE STATUS IN (?, ?) AND CONCLUIDO_EM < ?",
+                                 (CONCLUIDO, ERRO, limite)).fetchall()
+            for id_job, arquivo in antigos:
+                if arquivo:
+                    try:
+                        os.remove(os.path.join(self.pasta, arquivo))
+                    except OSError:
+                        pass
+                db.execute("DELETE FROM JOBS WHERE ID = ?", (id_job,))
+
+    # ---------- auxiliares internos ----------
+    def _executar(self, id_job, tipo, params):
+        self._atualizar(id_job, STATUS=EXECUTANDO, INICIADO_EM=time.time())
+        try:
+            conteudo = self._tarefas[tipo](params)
+            arquivo = f"{id_job}.bin"
+            caminho = os.path.join(self.pasta, arquivo)
+            with open(caminho + '.tmp', 'wb') as f:
+                f.write(conteudo)
+            os.replace(caminho + '.tmp', caminho)  # Arquivo só aparece quando está completo
+            self._atualizar(id_job, STATUS=CONCLUIDO, ARQUIVO=arquivo, CONCLUIDO_EM=time.time())
+        except Exception as e:
+            logging.error(f"Erro no job {id_job} ({tipo}): {str(e)}")
+            self._atualizar(id_job, STATUS=ERRO, ERRO=str(e), CONCLUIDO_EM=time.time())
+        with self._cond:
+            self._cond.notify_all()
+
+    def _atualizar(self, id_job, **campos):
+        sets = ', '.join(f"{campo} = ?" for campo in campos)
+        with self._conectar() as db:
+            db.execute(f"UPDATE JOBS SET {sets} WHERE ID = ?", (*campos.values(), id_job))
+
+    def _conectar(self):
+        # Uma conexão por operação: sqlite3 não compartilha conexões entre threads
+        db = sqlite3.connect(self.banco, timeout=10)
+        return _FecharAoSair(db)
+
+
+def _processo_vivo(pid):
+    """True se o processo `pid` ainda existe (dono de um job)."""
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        return False  # No Windows os.kill encerraria o processo; lá roda um processo só (main.py)
+    try:
+        os.kill(pid, 0)  # Sinal 0: só confere se o processo existe
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Existe, mas é de outro usuário
+    return True
+
+
+class _FecharAoSair:
+    """Context manager que faz commit (ou rollback) e fecha a conexão SQLite."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, tipo, valor, tb):
+        if tipo is None:
+            self.db.commit()
+        else:
+            self.db.rollback()
+        self.db.close()
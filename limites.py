@@ -0,0 +1,121 @@
+# ==============================================
+#  LIMITE DE TENTATIVAS (JANELA DESLIZANTE)
+# ==============================================
+import collections
+import threading
+import sqlite3
+import time
+
+
+class BackendMemoria:
+    """
+    Guarda os eventos no próprio processo. Cada worker tem sua contagem: com N workers, um limite de
+    L tentativas vira até N x L na prática. Só serve para rodar com um processo (main.py).
+    """
+
+    def __init__(self, max_chaves=100000):
+        self.max_chaves = max_chaves  # Limita a memória usada por chaves abandonadas
+        self._eventos = collections.OrderedDict()  # chave -> deque de instantes
+        self._lock = threading.Lock()
+
+    def registrar(self, chave, agora, janela):
+        """Registra um evento e retorna quantos existem dentro da janela."""
+        with self._lock:
+            eventos = self._podar(chave, agora, janela)
+            if eventos is None:
+                eventos = self._eventos[chave] = collections.deque()
+                while len(self._eventos) > self.max_chaves:
+                    self._eventos.popitem(last=False)
+            eventos.append(agora)
+            self._eventos.move_to_end(chave)
+            return len(eventos)
+
+    def limpar(self, chave):
+        with self._lock:
+            self._eventos.pop(chave, None)
+
+    def _podar(self, chave, agora, janela):
+        eventos = self._eventos.get(chave)
+        if eventos is not None:
+            while eventos and agora - eventos[0] >= janela:
+                eventos.popleft()
+        return eventos
+
+
+class BackendSQLite:
+    """
+    Guarda os eventos num arquivo SQLite local, compartilhado por todos os workers da máquina.
+    Serve de substituto local para um backend compartilhado (ex: Redis).
+    Cada registro só poda a própria chave; a cada `limpar_a_cada` registros (por processo) uma poda geral
+    apaga os eventos vencidos de todas as chaves, para IPs e e-mails que não voltam não ficarem para sempre.
+    """
+
+    def __init__(self, caminho, limpar_a_cada=1000):
+        self.caminho = caminho
+        self.limpar_a_cada = limpar_a_cada
+        self._registros = 0
+        self._janela_max = 0  # Maior janela já usada: a poda geral não pode apagar o que outra janela ainda conta
+        with self._conectar() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS EVENTOS_LIMITE (CHAVE TEXT NOT NULL, INSTANTE REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS IDX_EVENTOS_LIMITE ON EVENTOS_LIMITE (CHAVE, INSTANTE)")
+            db.execute("CREATE INDEX IF NOT EXISTS IDX_EVENTOS_LIMITE_INSTANTE ON EVENTOS_LIMITE (INSTANTE)")
+
+    def registrar(self, chave, agora, janela):
+        self._janela_max = max(self._janela_max, janela)
+        self._registros += 1
+        with self._conectar() as db:
+            db.execute("DELETE FROM EVENTOS_LIMITE WHERE CHAVE = ? AND INSTANTE <= ?", (chave, agora - janela))
+            if self._registros % self.limpar_a_cada == 0:
+                db.execute("DELETE FROM EVENTOS_LIMITE WHERE INSTANTE <= ?", (agora - self._janela_max,))
+            db.execute("INSERT INTO EVENTOS_LIMITE (CHAVE, INSTANTE) VALUES (?, ?)", (chave, agora))
+            return db.execute("SELECT COUNT(*) FROM EVENTOS_LIMITE WHERE CHAVE = ?", (chave,)).fetchone()[0]
+
+    def limpar(self, chave):
+        # Confere antes sem trava de escrita: no caso comum (chave sem eventos) não escreve nada
+        db = sqlite3.connect(self.caminho, timeout=10)
+        try:
+            existe = db.execute("SELECT 1 FROM EVENTOS_LIMITE WHERE CHAVE = ? LIMIT 1", (chave,)).fetchone()
+        finally:
+            db.close()
+        if existe:
+            with self._conectar() as db:
+                db.execute("DELETE FROM EVENTOS_LIMITE WHERE CHAVE = ?", (chave,))
+
+    def _conectar(self):
+        db = sqlite3.connect(self.caminho, timeout=10)
+        db.isolation_level = None  # Controle manual: cada operação numa transação IMMEDIATE
+        return _Transacao(db)
+
+
+class _Transacao:
+    """Abre uma transação IMMEDIATE (serializa escritas entre processos) e fecha a conexão ao sair."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, tipo, valor, tb):
+        self.db.execute("COMMIT" if tipo is None else "ROLLBACK")
+        self.db.close()
+
+
+class JanelaDeslizante:
+    """
+    Conta eventos por chave (ex: 'ip:1.2.3.4', 'email:fulano@x.com') nos últimos `janela` segundos.
+    """
+
+    def __init__(self, backend, limite, janela):
+        self.backend = backend
+        self.limite = limite
+        self.janela = janela
+
+    def registrar(self, chave):
+        """Registra um evento e retorna o total na janela (incluindo este)."""
+        return self.backend.registrar(chave, time.time(), self.janela)
+
+    def limpar(self, chave):
+        """Zera a contagem da chave (ex: após login com sucesso)."""
+        self.backend.limpar(chave)
@@ -1,24 +1,19 @@
-from flask import Flask
-import fdb
-from flask_cors import CORS
+# Servidor de desenvolvimento (um processo). Em produção: gunicorn -c gunicorn.conf.py wsgi:app
+from aplicacao import criar_app
+from view import pool, iniciar_servicos
+import config
 
-app = Flask(__name__)
-CORS(app, origins=["*"])
-
-app.config.from_pyfile('config.py')
-
-host = app.config['DB_HOST']
-database = app.config['DB_NAME']
-user = app.config['DB_USER']
-password = app.config['DB_PASSWORD']
+app = criar_app()
+iniciar_servicos()
 
+# Testa o banco pegando uma conexão do mesmo pool usado pelas rotas;
+# ela volta para o pool e fica pronta para a primeira requisição
 try:
-    con = fdb.connect(host=host, database=database, user=user, password=password)
+    con = pool.obter()
+    con.close()
     print("Conexao estabelicida com sucesso")
 except Exception as e:
     print(f"Erroooooo {e}")
 
-from view import *
-
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=config.DEBUG, use_reloader=False, threaded=True)
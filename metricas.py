@@ -0,0 +1,146 @@
+# ==============================================
+#  MÉTRICAS NO FORMATO DO PROMETHEUS
+# ==============================================
+import functools
+import threading
+import logging
+import bisect
+import re
+
+# Limites dos buckets dos histogramas de tempo (segundos)
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites do histograma de comandos SQL por requisição
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _rotulos(nomes, valores):
+    if not nomes:
+        return ''
+    pares = []
+    for nome, valor in zip(nomes, valores):
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{nome}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Valor que só cresce (ex: total de requisições), um por combinação de rótulos."""
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def somar(self, *valores_rotulos, valor=1):
+        with self._lock:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0) + valor
+
+    def linhas(self):
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [f"{self.nome}{_rotulos(self.rotulos, r)} {_numero(v)}" for r, v in itens]
+
+
+class Medidor(Contador):
+    """Valor que sobe e desce (ex: requisições em andamento)."""
+    tipo = 'gauge'
+
+    def definir(self, *valores_rotulos, valor):
+        with self._lock:
+            self._valores[valores_rotulos] = valor
+
+
+class Histograma:
+    """Distribuição de valores em buckets cumulativos (com _sum e _count), por combinação de rótulos."""
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_SEGUNDOS):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self.buckets = tuple(buckets)
+        self._series = {}  # rótulos -> [contagens por bucket (+Inf no fim), soma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, *valores_rotulos, valor):
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][bisect.bisect_left(self.buckets, valor)] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def linhas(self):
+        with self._lock:
+            itens = sorted((r, (list(s[0]), s[1], s[2])) for r, s in self._series.items())
+        saida = []
+        nomes_bucket = self.rotulos + ('le',)
+        for r, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, qtd in zip(self.buckets + ('+Inf',), contagens):
+                acumulado += qtd
+                saida.append(f"{self.nome}_bucket{_rotulos(nomes_bucket, r + (limite,))} {acumulado}")
+            saida.append(f"{self.nome}_sum{_rotulos(self.rotulos, r)} {_numero(soma)}")
+            saida.append(f"{self.nome}_count{_rotulos(self.rotulos, r)} {total}")
+        return saida
+
+
+class RegistroMetricas:
+    """
+    Guarda as métricas do processo e gera o texto de /metrics.
+    Coletores são funções chamadas na hora da coleta que devolvem [(nome, ajuda, tipo, {rótulos: valor})],
+    usados para expor números que já existem em outros objetos (pool, caches).
+    Cada worker tem o próprio registro: o Prometheus deve coletar de cada processo.
+    """
+
+    def __init__(self):
+        self._metricas = []
+        self._coletores = []
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def medidor(self, nome, ajuda, rotulos=()):
+        return self._registrar(Medidor(nome, ajuda, rotulos))
+
+    def histograma(self, nome, ajuda, rotulos=(), buckets=BUCKETS_SEGUNDOS):
+        return self._registrar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def coletor(self, funcao):
+        self._coletores.append(funcao)
+        return funcao
+
+    def texto(self):
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)."""
+        saida = []
+        for metrica in self._metricas:
+            saida += [f"# HELP {metrica.nome} {metrica.ajuda}", f"# TYPE {metrica.nome} {metrica.tipo}"]
+            saida += metrica.linhas()
+        for coletor in self._coletores:
+            try:
+                familias = coletor()
+            except Exception as e:
+                logging.warning(f"Coletor de métricas falhou: {str(e)}")
+                continue
+            for nome, ajuda, tipo, valores in familias:
+                saida += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+                for rotulos, valor in valores.items():
+                    saida.append(f"{nome}{_rotulos(*zip(*rotulos)) if rotulos else ''} {_numero(valor)}")
+        return '\n'.join(saida) + '\n'
+
+    def _registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+
+@functools.lru_cache(maxsize=2048)
+def resumir_sql(sql):
+    """Tipo do comando (SELECT, INSERT...) e a tabela principal, para rotular as métricas sem explodir a cardinalidade."""
+    texto = ' '.join((sql or '').split())
+    comando = texto.split(' ', 1)[0].upper() if texto else 'DESCONHECIDO'
+    tabela = re.search(r'\b(?:FROM|INTO|UPDATE)\s+([\w$]+)', texto, re.IGNORECASE)
+    return comando, tabela.group(1).upper() if tabela else ''
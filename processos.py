@@ -0,0 +1,16 @@
+# ==============================================
+#  POOLS DE PROCESSOS AUXILIARES (HASH E PDFs)
+# ==============================================
+import multiprocessing
+
+
+def contexto_processos():
+    """
+    Contexto de multiprocessing para os ProcessPoolExecutor do app.
+    Nunca 'fork': os pools nascem dentro de um worker que já tem várias threads (gthread, feed,
+    recarregador da busca...), e um filho copiado por fork herda os locks que outra thread segurava
+    naquele instante, podendo travar para sempre. 'forkserver' parte de um processo limpo e ainda
+    sobe rápido; onde ele não existe (Windows), usa 'spawn'.
+    """
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo)
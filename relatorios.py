@@ -0,0 +1,107 @@
+# ==============================================
+#  MOTOR DE RELATÓRIOS EM PDF
+# ==============================================
+from collections import namedtuple
+from fpdf import FPDF
+import hashlib
+import datetime
+
+# Definição de uma coluna da tabela do relatório:
+#   titulo: texto do cabeçalho
+#   largura: largura da célula em mm
+#   alinhamento: "L", "C" ou "R"
+#   valor: função linha -> texto da célula
+#   cor: função linha -> (r, g, b) do texto, ou None para preto
+Coluna = namedtuple('Coluna', 'titulo largura alinhamento valor cor')
+
+
+def _cor_status(linha):
+    """Verde para ativo, vermelho para inativo."""
+    return (0, 180, 0) if linha[3] == 1 else (200, 0, 0)
+
+
+# Colunas dos relatórios de usuários (linhas: ID_CADASTRO, NOME, EMAIL, ATIVO)
+COLUNAS_USUARIOS = [
+    Coluna("ID", 20, "C", lambda u: str(u[0]), None),
+    Coluna("NOME", 60, "L", lambda u: str(u[1]), None),
+    Coluna("EMAIL", 70, "L", lambda u: str(u[2]), None),
+    Coluna("STATUS", 30, "C", lambda u: "ATIVO" if u[3] == 1 else "INATIVO", _cor_status),
+]
+
+# Relatórios disponíveis: nome -> (título, colunas, consulta, nome do arquivo para download)
+SQL_USUARIOS_POR_CARGO = """
+    SELECT ID_CADASTRO, NOME, EMAIL, ATIVO
+    FROM CADASTRO
+    WHERE UPPER(CARGO) = '{cargo}'
+    ORDER BY NOME
+"""
+RELATORIOS = {
+    'clientes': ("Relatório de Clientes", COLUNAS_USUARIOS,
+                 SQL_USUARIOS_POR_CARGO.format(cargo='CLIENTE'), "relatorio_clientes.pdf"),
+    'vendedores': ("Relatório de Vendedores", COLUNAS_USUARIOS,
+                   SQL_USUARIOS_POR_CARGO.format(cargo='VENDEDOR'), "relatorio_vendedor.pdf"),
+    'adms': ("Relatório de Administradores", COLUNAS_USUARIOS,
+             SQL_USUARIOS_POR_CARGO.format(cargo='ADM'), "relatorio_adms.pdf"),
+}
+
+
+def hash_relatorio(titulo, linhas):
+    """Gera o identificador do relatório a partir do título e dos dados (usado como ETag e chave de cache)."""
+    h = hashlib.sha256(titulo.encode('utf-8'))
+    for linha in linhas:
+        h.update(repr(tuple(linha)).encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+def renderizar_pdf(titulo, colunas, linhas):
+    """Monta o PDF em memória (tabela com cabeçalho escuro e linhas alternadas) e retorna os bytes."""
+    pdf = FPDF()  # Cria objeto PDF
+    pdf.add_page()  # Adiciona uma página
+
+    # Define fonte para o título e escreve o título centralizado
+    pdf.set_font("Helvetica", "B", 18)
+    pdf.cell(0, 10, titulo, ln=True, align="C")
+    pdf.ln(8)  # Adiciona espaço vertical
+
+    # Cabeçalho da tabela com fundo escuro e texto branco
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.set_fill_color(40, 40, 40)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_draw_color(70, 70, 70)
+    for i, coluna in enumerate(colunas):
+        ultima = i == len(colunas) - 1
+        pdf.cell(coluna.largura, 10, coluna.titulo, 1, 1 if ultima else 0, "C", True)
+
+    # Corpo da tabela
+    pdf.set_font("Helvetica", "B", 11)
+    fill = False  # Controle para alternar cor de fundo das linhas
+    for linha in linhas:
+        # Alterna cor de fundo entre azul claro e branco
+        pdf.set_fill_color(197, 220, 255) if fill else pdf.set_fill_color(255, 255, 255)
+        pdf.set_draw_color(60, 60, 60)  # Cor da borda da célula
+        for i, coluna in enumerate(colunas):
+            ultima = i == len(colunas) - 1
+            pdf.set_text_color(*(coluna.cor(linha) if coluna.cor else (0, 0, 0)))
+            pdf.cell(coluna.largura, 10, coluna.valor(linha), 1, 1 if ultima else 0, coluna.alinhamento, fill)
+        fill = not fill  # Alterna a cor da linha
+
+    # Linha em branco e informações finais do relatório
+    pdf.ln(5)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 10, f"Total de registros: {len(linhas)}", ln=True)
+    pdf.cell(0, 10, f"Gerado em {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
+
+    # pyfpdf devolve str (latin-1) e fpdf2 devolve bytearray
+    saida = pdf.output(dest='S')
+    return saida.encode('latin-1') if isinstance(saida, str) else bytes(saida)
+
+
+def renderizar_relatorio(nome, linhas):
+    """
+    Gera o PDF de um relatório de RELATORIOS pelo nome.
+    Recebe só dados simples, então pode rodar em outro processo (ProcessPoolExecutor).
+    """
+    titulo, colunas, _, _ = RELATORIOS[nome]
+    return renderizar_pdf(titulo, colunas, linhas)
@@ -0,0 +1,98 @@
+# ==============================================
+#  RESUMOS DE VENDAS (ver sql/001_resumos_vendas.sql)
+# ==============================================
+import threading
+import logging
+
+# Dimensões disponíveis: nome na URL -> TIPO na tabela RESUMO_VENDAS
+DIMENSOES = {
+    'clientes': 'CLIENTE',
+    'vendedores': 'VENDEDOR',
+    'produtos': 'PRODUTO',
+    'dias': 'DIA',
+}
+
+
+def ler_resumo(cursor, tipo, chave):
+    """Soma as poucas linhas (resumo compactado + deltas recentes) de uma chave."""
+    cursor.execute("""
+        SELECT COALESCE(SUM(QTD_VENDAS), 0), COALESCE(SUM(UNIDADES), 0),
+               COALESCE(SUM(VALOR_TOTAL), 0), COALESCE(SUM(CASHBACK), 0)
+        FROM RESUMO_VENDAS
+        WHERE TIPO = ? AND CHAVE = ?
+    """, (tipo, str(chave)))
+    qtd_vendas, unidades, valor_total, cashback = cursor.fetchone()
+    return {
+        "qtd_vendas": qtd_vendas,
+        "unidades": unidades,
+        "valor_total": float(valor_total),
+        "cashback_total": float(cashback),
+    }
+
+
+def compactar(con):
+    """
+    Junta as linhas de delta de cada chave em uma única linha.
+    Só mexe nas linhas com ID até o maior ID visto no início, então os deltas
+    gravados durante a compactação ficam para a próxima rodada.
+    Retorna quantas chaves foram compactadas.
+    """
+    cursor = con.cursor()
+    try:
+        cursor.execute("SELECT MAX(ID) FROM RESUMO_VENDAS")
+        limite = cursor.fetchone()[0]
+        if limite is None:
+            return 0
+        cursor.execute("""
+            SELECT TIPO, CHAVE, SUM(QTD_VENDAS), SUM(UNIDADES), SUM(VALOR_TOTAL), SUM(CASHBACK)
+            FROM RESUMO_VENDAS
+            WHERE ID <= ?
+            GROUP BY TIPO, CHAVE
+            HAVING COUNT(*) > 1
+        """, (limite,))
+        grupos = cursor.fetchall()
+        for tipo, chave, qtd_vendas, unidades, valor_total, cashback in grupos:
+            cursor.execute("DELETE FROM RESUMO_VENDAS WHERE TIPO = ? AND CHAVE = ? AND ID <= ?",
+                           (tipo, chave, limite))
+            cursor.execute("""
+                INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL, CASHBACK)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (tipo, chave, qtd_vendas, unidades, valor_total, cashback))
+        con.commit()
+        return len(grupos)
+    except Exception:
+        con.rollback()  # Ex: outro worker compactando ao mesmo tempo; tenta de novo na próxima rodada
+        raise
+    finally:
+        cursor.close()
+
+
+class CompactadorResumos:
+    """Thread de fundo que chama compactar() a cada `intervalo` segundos."""
+
+    def __init__(self, pool, intervalo=60):
+        self.pool = pool
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name='compactador-resumos', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            con = None
+            try:
+                con = self.pool.obter()
+                compactar(con)
+            except Exception as e:
+                logging.warning(f"Compactação dos resumos adiada: {str(e)}")
+            finally:
+                if con:
+                    con.close()
@@ -0,0 +1,85 @@
+/* ==============================================
+   RESUMOS DE VENDAS E CASHBACK
+   ==============================================
+   Totais por cliente, vendedor, produto e dia, mantidos por triggers
+   na mesma transação de cada venda/cashback.
+
+   Cada venda grava linhas de "delta" (só INSERT), assim vendas simultâneas
+   do mesmo vendedor ou do mesmo dia nunca disputam a mesma linha.
+   A aplicação junta periodicamente os deltas de cada chave em uma linha
+   (resumos.compactar), então a leitura de uma chave soma poucas linhas.
+
+   Aplicar com:  isql -user SYSDBA -password sysdba AUTOPRIME.FDB -i sql/001_resumos_vendas.sql
+*/
+
+CREATE GENERATOR GEN_RESUMO_VENDAS;
+
+CREATE TABLE RESUMO_VENDAS (
+    ID          INTEGER NOT NULL PRIMARY KEY,
+    TIPO        VARCHAR(10) NOT NULL,      /* CLIENTE, VENDEDOR, PRODUTO ou DIA */
+    CHAVE       VARCHAR(20) NOT NULL,      /* ID correspondente ou data AAAA-MM-DD */
+    QTD_VENDAS  INTEGER DEFAULT 0 NOT NULL,
+    UNIDADES    INTEGER DEFAULT 0 NOT NULL,
+    VALOR_TOTAL DECIMAL(18, 2) DEFAULT 0 NOT NULL,
+    CASHBACK    DECIMAL(18, 2) DEFAULT 0 NOT NULL
+);
+
+CREATE INDEX IDX_RESUMO_VENDAS_CHAVE ON RESUMO_VENDAS (TIPO, CHAVE);
+
+SET TERM ^ ;
+
+CREATE TRIGGER TRG_RESUMO_VENDAS_ID FOR RESUMO_VENDAS
+ACTIVE BEFORE INSERT POSITION 0
+AS
+BEGIN
+    IF (NEW.ID IS NULL) THEN
+        NEW.ID = GEN_ID(GEN_RESUMO_VENDAS, 1);
+END^
+
+CREATE TRIGGER TRG_VENDAS_RESUMO FOR VENDAS
+ACTIVE AFTER INSERT POSITION 10
+AS
+DECLARE VARIABLE DIA VARCHAR(20);
+BEGIN
+    DIA = CAST(CAST(COALESCE(NEW.DATA_VENDA, CURRENT_TIMESTAMP) AS DATE) AS VARCHAR(20));
+    INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    VALUES ('CLIENTE', NEW.ID_CLIENTE, 1, NEW.QUANTIDADE, NEW.VALOR_TOTAL);
+    INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    VALUES ('VENDEDOR', NEW.ID_VENDEDOR, 1, NEW.QUANTIDADE, NEW.VALOR_TOTAL);
+    INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    VALUES ('PRODUTO', NEW.ID_PRODUTO, 1, NEW.QUANTIDADE, NEW.VALOR_TOTAL);
+    INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    VALUES ('DIA', :DIA, 1, NEW.QUANTIDADE, NEW.VALOR_TOTAL);
+END^
+
+CREATE TRIGGER TRG_CASHBACKS_RESUMO FOR CASHBACKS
+ACTIVE AFTER INSERT POSITION 10
+AS
+DECLARE VARIABLE DIA VARCHAR(20);
+BEGIN
+    DIA = CAST(CAST(COALESCE(NEW.DATA_GERACAO, CURRENT_TIMESTAMP) AS DATE) AS VARCHAR(20));
+    INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, CASHBACK)
+    VALUES ('CLIENTE', NEW.ID_CLIENTE, NEW.VALOR_CASHBACK);
+    INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, CASHBACK)
+    VALUES ('DIA', :DIA, NEW.VALOR_CASHBACK);
+END^
+
+SET TERM ; ^
+
+/* Carga inicial com o histórico já existente */
+INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    SELECT 'CLIENTE', ID_CLIENTE, COUNT(*), SUM(QUANTIDADE), SUM(VALOR_TOTAL) FROM VENDAS GROUP BY ID_CLIENTE;
+INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    SELECT 'VENDEDOR', ID_VENDEDOR, COUNT(*), SUM(QUANTIDADE), SUM(VALOR_TOTAL) FROM VENDAS GROUP BY ID_VENDEDOR;
+INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    SELECT 'PRODUTO', ID_PRODUTO, COUNT(*), SUM(QUANTIDADE), SUM(VALOR_TOTAL) FROM VENDAS GROUP BY ID_PRODUTO;
+INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, QTD_VENDAS, UNIDADES, VALOR_TOTAL)
+    SELECT 'DIA', CAST(CAST(DATA_VENDA AS DATE) AS VARCHAR(20)), COUNT(*), SUM(QUANTIDADE), SUM(VALOR_TOTAL)
+    FROM VENDAS GROUP BY CAST(CAST(DATA_VENDA AS DATE) AS VARCHAR(20));
+INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, CASHBACK)
+    SELECT 'CLIENTE', ID_CLIENTE, SUM(VALOR_CASHBACK) FROM CASHBACKS GROUP BY ID_CLIENTE;
+INSERT INTO RESUMO_VENDAS (TIPO, CHAVE, CASHBACK)
+    SELECT 'DIA', CAST(CAST(DATA_GERACAO AS DATE) AS VARCHAR(20)), SUM(VALOR_CASHBACK)
+    FROM CASHBACKS GROUP BY CAST(CAST(DATA_GERACAO AS DATE) AS VARCHAR(20));
+
+COMMIT;
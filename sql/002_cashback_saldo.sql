@@ -0,0 +1,75 @@
+/* ==============================================
+   LIVRO-RAZÃO DE CASHBACK COM SALDO MATERIALIZADO
+   ==============================================
+   CASHBACK_LANCAMENTOS: um lançamento por crédito (C, gerado por cada cashback)
+                         ou resgate (D, feito por POST /cashback/resgatar).
+   CASHBACK_SALDO:       saldo atual de cada cliente, atualizado pelo trigger de
+                         CASHBACK_LANCAMENTOS na mesma transação do lançamento.
+   Ler o saldo é uma busca pela chave primária, não importa o tamanho do histórico.
+   O trigger de CASHBACK_LANCAMENTOS é substituído em sql/006 (primeiro crédito simultâneo).
+
+   Aplicar com:  isql -user SYSDBA -password sysdba AUTOPRIME.FDB -i sql/002_cashback_saldo.sql
+*/
+
+CREATE GENERATOR GEN_CASHBACK_LANCAMENTOS;
+
+CREATE TABLE CASHBACK_SALDO (
+    ID_CLIENTE    INTEGER NOT NULL PRIMARY KEY,
+    SALDO         DECIMAL(18, 2) DEFAULT 0 NOT NULL CHECK (SALDO >= 0),
+    ATUALIZADO_EM TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+CREATE TABLE CASHBACK_LANCAMENTOS (
+    ID         INTEGER NOT NULL PRIMARY KEY,
+    ID_CLIENTE INTEGER NOT NULL,
+    TIPO       CHAR(1) NOT NULL CHECK (TIPO IN ('C', 'D')),   /* C = crédito, D = resgate */
+    VALOR      DECIMAL(18, 2) NOT NULL CHECK (VALOR >= 0),
+    ID_VENDA   INTEGER,
+    SALDO_APOS DECIMAL(18, 2),
+    DATA       TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IDX_CASHBACK_LANC_CLIENTE ON CASHBACK_LANCAMENTOS (ID_CLIENTE, ID);
+
+SET TERM ^ ;
+
+/* Cada lançamento atualiza o saldo do cliente e guarda o saldo resultante */
+CREATE TRIGGER TRG_CASHBACK_LANCAMENTOS_BI FOR CASHBACK_LANCAMENTOS
+ACTIVE BEFORE INSERT POSITION 0
+AS
+DECLARE VARIABLE DELTA DECIMAL(18, 2);
+BEGIN
+    IF (NEW.ID IS NULL) THEN
+        NEW.ID = GEN_ID(GEN_CASHBACK_LANCAMENTOS, 1);
+    DELTA = IIF(NEW.TIPO = 'C', NEW.VALOR, -NEW.VALOR);
+
+    UPDATE CASHBACK_SALDO
+    SET SALDO = SALDO + :DELTA, ATUALIZADO_EM = CURRENT_TIMESTAMP
+    WHERE ID_CLIENTE = NEW.ID_CLIENTE
+    RETURNING SALDO INTO NEW.SALDO_APOS;
+
+    IF (ROW_COUNT = 0) THEN
+    BEGIN
+        INSERT INTO CASHBACK_SALDO (ID_CLIENTE, SALDO) VALUES (NEW.ID_CLIENTE, :DELTA);
+        NEW.SALDO_APOS = DELTA;
+    END
+END^
+
+/* Todo cashback gerado numa venda vira um crédito no livro-razão */
+CREATE TRIGGER TRG_CASHBACKS_LANCAMENTO FOR CASHBACKS
+ACTIVE AFTER INSERT POSITION 20
+AS
+BEGIN
+    INSERT INTO CASHBACK_LANCAMENTOS (ID_CLIENTE, TIPO, VALOR, ID_VENDA)
+    VALUES (NEW.ID_CLIENTE, 'C', NEW.VALOR_CASHBACK, NEW.ID_VENDA);
+END^
+
+SET TERM ; ^
+
+/* Carga inicial: cada cashback existente vira um crédito (o trigger monta o saldo) */
+INSERT INTO CASHBACK_LANCAMENTOS (ID_CLIENTE, TIPO, VALOR, ID_VENDA, DATA)
+    SELECT ID_CLIENTE, 'C', VALOR_CASHBACK, ID_VENDA, DATA_GERACAO
+    FROM CASHBACKS
+    ORDER BY ID_CASHBACK;
+
+COMMIT;
@@ -0,0 +1,31 @@
+/* ==============================================
+   ÍNDICES PARA AS CONSULTAS MAIS FREQUENTES
+   ==============================================
+   Gerado a partir da auditoria de planos (ferramentas/auditoria_indices.py).
+   Pode ser aplicado com a própria ferramenta (--aplicar) ou com:
+       isql -user SYSDBA -password sysdba AUTOPRIME.FDB -i sql/003_indices.sql
+*/
+
+/* Login, cadastro e todas as buscas de cliente/vendedor por e-mail */
+CREATE INDEX IDX_CADASTRO_EMAIL ON CADASTRO (EMAIL);
+
+/* Relatórios em PDF: WHERE UPPER(CARGO) = '...' */
+CREATE INDEX IDX_CADASTRO_CARGO_UPPER ON CADASTRO COMPUTED BY (UPPER(CARGO));
+
+/* Verificação de produto duplicado em criar_produto */
+CREATE INDEX IDX_PRODUTOS_NOME ON PRODUTOS (NOME);
+
+/* Filtros da listagem de produtos */
+CREATE INDEX IDX_PRODUTOS_MARCA ON PRODUTOS (MARCA);
+CREATE INDEX IDX_PRODUTOS_VENDEDOR ON PRODUTOS (ID_VENDEDOR);
+
+/* MERGE do carrinho e listagem/checkout do carrinho do cliente */
+CREATE INDEX IDX_CARRINHO_CLIENTE_PRODUTO ON CARRINHO (ID_CLIENTE, ID_PRODUTO);
+
+/* GET /vendas e GET /cashbacks: ORDER BY ... DESC e filtros de período */
+CREATE DESCENDING INDEX IDX_VENDAS_ID_DESC ON VENDAS (ID_VENDA);
+CREATE INDEX IDX_VENDAS_DATA ON VENDAS (DATA_VENDA);
+CREATE DESCENDING INDEX IDX_CASHBACKS_ID_DESC ON CASHBACKS (ID_CASHBACK);
+CREATE INDEX IDX_CASHBACKS_DATA ON CASHBACKS (DATA_GERACAO);
+
+COMMIT;
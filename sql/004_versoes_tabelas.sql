@@ -0,0 +1,65 @@
+/* ==============================================
+   VERSÃO DAS TABELAS PARA ETag / 304
+   ==============================================
+   GEN_VERSAO_<TABELA>: contador que cresce a cada INSERT/UPDATE/DELETE na tabela.
+   Generators não participam da transação (não há conflito de atualização entre
+   escritas simultâneas) e são lidos numa consulta a RDB$DATABASE, sem tocar na tabela.
+   O app lê as versões antes da consulta principal e responde 304 se o ETag do cliente
+   ainda é o mesmo (ver versoes.py).
+   Os triggers abaixo são trocados em sql/007: o incremento passa a acontecer no commit.
+
+   Aplicar com:  isql -user SYSDBA -password sysdba AUTOPRIME.FDB -i sql/004_versoes_tabelas.sql
+*/
+
+CREATE GENERATOR GEN_VERSAO_CADASTRO;
+CREATE GENERATOR GEN_VERSAO_PRODUTOS;
+CREATE GENERATOR GEN_VERSAO_VENDAS;
+CREATE GENERATOR GEN_VERSAO_CASHBACKS;
+CREATE GENERATOR GEN_VERSAO_CARRINHO;
+
+SET TERM ^ ;
+
+/* Também pega as escritas feitas fora do app (isql, ferramentas/gerar_dados.py, outros triggers) */
+CREATE TRIGGER TRG_CADASTRO_VERSAO FOR CADASTRO
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 90
+AS
+DECLARE VARIABLE V BIGINT;
+BEGIN
+    V = GEN_ID(GEN_VERSAO_CADASTRO, 1);
+END^
+
+CREATE TRIGGER TRG_PRODUTOS_VERSAO FOR PRODUTOS
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 90
+AS
+DECLARE VARIABLE V BIGINT;
+BEGIN
+    V = GEN_ID(GEN_VERSAO_PRODUTOS, 1);
+END^
+
+CREATE TRIGGER TRG_VENDAS_VERSAO FOR VENDAS
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 90
+AS
+DECLARE VARIABLE V BIGINT;
+BEGIN
+    V = GEN_ID(GEN_VERSAO_VENDAS, 1);
+END^
+
+CREATE TRIGGER TRG_CASHBACKS_VERSAO FOR CASHBACKS
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 90
+AS
+DECLARE VARIABLE V BIGINT;
+BEGIN
+    V = GEN_ID(GEN_VERSAO_CASHBACKS, 1);
+END^
+
+CREATE TRIGGER TRG_CARRINHO_VERSAO FOR CARRINHO
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 90
+AS
+DECLARE VARIABLE V BIGINT;
+BEGIN
+    V = GEN_ID(GEN_VERSAO_CARRINHO, 1);
+END^
+
+SET TERM ; ^
+
+COMMIT;
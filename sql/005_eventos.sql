@@ -0,0 +1,87 @@
+/* ==============================================
+   FEED DE ALTERAÇÕES (VENDAS, CASHBACKS E CARRINHO)
+   ==============================================
+   EVENTOS: uma linha por INSERT/UPDATE/DELETE nas tabelas acompanhadas, gravada
+            pelo trigger na mesma transação da alteração (só aparece após o commit,
+            e some junto num rollback).
+   Cada worker lê as linhas novas (ID > último lido, pela chave primária) e as
+   entrega em GET /eventos e /eventos/stream (ver eventos.py).
+   Um ID que falta (transação aberta) segura os seguintes até ser confirmado ou até não
+   restar transação com gravações mais antiga que a lacuna em MON$TRANSACTIONS (rollback).
+   Linhas mais antigas que FEED_RETENCAO são apagadas pelo próprio app.
+
+   Aplicar com:  isql -user SYSDBA -password sysdba AUTOPRIME.FDB -i sql/005_eventos.sql
+*/
+
+CREATE GENERATOR GEN_EVENTOS;
+
+CREATE TABLE EVENTOS (
+    ID          BIGINT NOT NULL PRIMARY KEY,
+    TABELA      VARCHAR(20) NOT NULL,          /* VENDAS, CASHBACKS ou CARRINHO */
+    OPERACAO    CHAR(1) NOT NULL,              /* I = inclusão, U = alteração, D = exclusão */
+    ID_REGISTRO INTEGER NOT NULL,              /* ID_VENDA, ID_CASHBACK ou ID_ITEM */
+    ID_CLIENTE  INTEGER,
+    ID_PRODUTO  INTEGER,
+    ID_VENDA    INTEGER,
+    QUANTIDADE  INTEGER,
+    VALOR       DECIMAL(18, 2),                /* VALOR_TOTAL, VALOR_CASHBACK ou VALOR_TOTAL do item */
+    DATA        TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+/* Limpeza por data */
+CREATE INDEX IDX_EVENTOS_DATA ON EVENTOS (DATA);
+
+SET TERM ^ ;
+
+CREATE TRIGGER TRG_EVENTOS_BI FOR EVENTOS
+ACTIVE BEFORE INSERT POSITION 0
+AS
+BEGIN
+    IF (NEW.ID IS NULL) THEN
+        NEW.ID = GEN_ID(GEN_EVENTOS, 1);
+END^
+
+/* Nos triggers de várias operações, NEW vem vazio no DELETE e OLD vem vazio no INSERT */
+CREATE TRIGGER TRG_VENDAS_EVENTOS FOR VENDAS
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 95
+AS
+BEGIN
+    IF (DELETING) THEN
+        INSERT INTO EVENTOS (TABELA, OPERACAO, ID_REGISTRO, ID_CLIENTE, ID_PRODUTO, ID_VENDA, QUANTIDADE, VALOR)
+        VALUES ('VENDAS', 'D', OLD.ID_VENDA, OLD.ID_CLIENTE, OLD.ID_PRODUTO, OLD.ID_VENDA,
+                OLD.QUANTIDADE, OLD.VALOR_TOTAL);
+    ELSE
+        INSERT INTO EVENTOS (TABELA, OPERACAO, ID_REGISTRO, ID_CLIENTE, ID_PRODUTO, ID_VENDA, QUANTIDADE, VALOR)
+        VALUES ('VENDAS', IIF(INSERTING, 'I', 'U'), NEW.ID_VENDA, NEW.ID_CLIENTE, NEW.ID_PRODUTO, NEW.ID_VENDA,
+                NEW.QUANTIDADE, NEW.VALOR_TOTAL);
+END^
+
+CREATE TRIGGER TRG_CASHBACKS_EVENTOS FOR CASHBACKS
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 95
+AS
+BEGIN
+    IF (DELETING) THEN
+        INSERT INTO EVENTOS (TABELA, OPERACAO, ID_REGISTRO, ID_CLIENTE, ID_VENDA, VALOR)
+        VALUES ('CASHBACKS', 'D', OLD.ID_CASHBACK, OLD.ID_CLIENTE, OLD.ID_VENDA, OLD.VALOR_CASHBACK);
+    ELSE
+        INSERT INTO EVENTOS (TABELA, OPERACAO, ID_REGISTRO, ID_CLIENTE, ID_VENDA, VALOR)
+        VALUES ('CASHBACKS', IIF(INSERTING, 'I', 'U'), NEW.ID_CASHBACK, NEW.ID_CLIENTE, NEW.ID_VENDA,
+                NEW.VALOR_CASHBACK);
+END^
+
+CREATE TRIGGER TRG_CARRINHO_EVENTOS FOR CARRINHO
+ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 95
+AS
+BEGIN
+    IF (DELETING) THEN
+        INSERT INTO EVENTOS (TABELA, OPERACAO, ID_REGISTRO, ID_CLIENTE, ID_PRODUTO, QUANTIDADE, VALOR)
+        VALUES ('CARRINHO', 'D', OLD.ID_ITEM, OLD.ID_CLIENTE, OLD.ID_PRODUTO, OLD.QUANTIDADE, OLD.VALOR_TOTAL);
+    ELSE
+        INSERT INTO EVENTOS (TABELA, OPERACAO, ID_REGISTRO, ID_CLIENTE, ID_PRODUTO, QUANTIDADE, VALOR)
+        VALUES ('CARRINHO', IIF(INSERTING, 'I', 'U'), NEW.ID_ITEM, NEW.ID_CLIENTE, NEW.ID_PRODUTO,
+                NEW.QUANTIDADE, NEW.VALOR_TOTAL);
+END^
+
+SET TERM ; ^
+
+COMMIT;
@@ -0,0 +1,65 @@
+/* ==============================================
+   SALDO DE CASHBACK: PRIMEIRO CRÉDITO SIMULTÂNEO
+   ==============================================
+   Em sql/002 o trigger do livro-razão fazia UPDATE no saldo e, sem linha (ROW_COUNT = 0),
+   INSERT. Dois primeiros créditos do mesmo cliente em transações simultâneas faziam os dois
+   INSERTs e o segundo falhava com violação da chave primária de CASHBACK_SALDO.
+   - Todo cadastro passa a nascer com o saldo zerado (trigger em CADASTRO + carga dos que
+     já existem): o lançamento encontra a linha e só faz UPDATE, que o Firebird serializa.
+   - O trigger do livro-razão usa MERGE e, se mesmo assim outra transação criou a linha
+     primeiro, soma no registro dela. Se a linha ainda não é visível para esta transação
+     (snapshot), o erro da chave é repassado e a venda pode ser repetida.
+
+   Aplicar com:  isql -user SYSDBA -password sysdba AUTOPRIME.FDB -i sql/006_cashback_saldo_concorrencia.sql
+*/
+
+/* Carga: saldo zerado para os cadastros que ainda não têm linha */
+INSERT INTO CASHBACK_SALDO (ID_CLIENTE, SALDO)
+    SELECT C.ID_CADASTRO, 0
+    FROM CADASTRO C
+    WHERE NOT EXISTS (SELECT 1 FROM CASHBACK_SALDO S WHERE S.ID_CLIENTE = C.ID_CADASTRO);
+
+SET TERM ^ ;
+
+CREATE TRIGGER TRG_CADASTRO_CASHBACK_SALDO FOR CADASTRO
+ACTIVE AFTER INSERT POSITION 20
+AS
+BEGIN
+    UPDATE OR INSERT INTO CASHBACK_SALDO (ID_CLIENTE, SALDO)
+    VALUES (NEW.ID_CADASTRO, 0)
+    MATCHING (ID_CLIENTE);
+END^
+
+ALTER TRIGGER TRG_CASHBACK_LANCAMENTOS_BI
+AS
+DECLARE VARIABLE DELTA DECIMAL(18, 2);
+BEGIN
+    IF (NEW.ID IS NULL) THEN
+        NEW.ID = GEN_ID(GEN_CASHBACK_LANCAMENTOS, 1);
+    DELTA = IIF(NEW.TIPO = 'C', NEW.VALOR, -NEW.VALOR);
+
+    BEGIN
+        MERGE INTO CASHBACK_SALDO S
+        USING (SELECT NEW.ID_CLIENTE AS ID_CLIENTE FROM RDB$DATABASE) N
+        ON S.ID_CLIENTE = N.ID_CLIENTE
+        WHEN MATCHED THEN
+            UPDATE SET SALDO = S.SALDO + :DELTA, ATUALIZADO_EM = CURRENT_TIMESTAMP
+        WHEN NOT MATCHED THEN
+            INSERT (ID_CLIENTE, SALDO) VALUES (N.ID_CLIENTE, :DELTA);
+        WHEN GDSCODE unique_key_violation DO
+        BEGIN
+            /* Outra transação criou o saldo ao mesmo tempo e já confirmou: soma nele */
+            UPDATE CASHBACK_SALDO
+            SET SALDO = SALDO + :DELTA, ATUALIZADO_EM = CURRENT_TIMESTAMP
+            WHERE ID_CLIENTE = NEW.ID_CLIENTE;
+            IF (ROW_COUNT = 0) THEN
+                EXCEPTION;  /* Linha invisível para esta transação: repassa a violação da chave */
+        END
+    END
+
+    SELECT SALDO FROM CASHBACK_SALDO WHERE ID_CLIENTE = NEW.ID_CLIENTE INTO NEW.SALDO_APOS;
+END^
+
+SET TERM ; ^
+
+COMMIT;
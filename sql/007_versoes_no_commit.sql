@@ -0,0 +1,69 @@
+/* ==============================================
+   VERSÃO DAS TABELAS: INCREMENTO NO COMMIT
+   ==============================================
+   Em sql/004 os triggers de cada tabela somavam 1 na versão no meio da transação. Um leitor
+   podia ler a versão nova antes do commit, com os dados antigos, e guardar esse ETag; o app
+   corrige isso somando de novo depois do commit, mas escritas feitas fora do app (isql,
+   ferramentas/gerar_dados.py) não tinham esse segundo incremento.
+   Agora:
+   - o trigger de cada tabela só marca a tabela como alterada na transação (RDB$SET_CONTEXT);
+   - o trigger de banco ON TRANSACTION COMMIT soma 1 na versão das tabelas marcadas. Ele roda no
+     fim da transação, já no commit: a janela entre a versão nova e os dados novos fica mínima
+     para qualquer cliente, e uma transação desfeita não muda versão nenhuma.
+   O app continua somando 1 depois do commit das próprias escritas (versoes.incrementar_versoes).
+
+   Aplicar com:  isql -user SYSDBA -password sysdba AUTOPRIME.FDB -i sql/007_versoes_no_commit.sql
+*/
+
+SET TERM ^ ;
+
+ALTER TRIGGER TRG_CADASTRO_VERSAO
+AS
+BEGIN
+    RDB$SET_CONTEXT('USER_TRANSACTION', 'VERSAO_CADASTRO', 1);
+END^
+
+ALTER TRIGGER TRG_PRODUTOS_VERSAO
+AS
+BEGIN
+    RDB$SET_CONTEXT('USER_TRANSACTION', 'VERSAO_PRODUTOS', 1);
+END^
+
+ALTER TRIGGER TRG_VENDAS_VERSAO
+AS
+BEGIN
+    RDB$SET_CONTEXT('USER_TRANSACTION', 'VERSAO_VENDAS', 1);
+END^
+
+ALTER TRIGGER TRG_CASHBACKS_VERSAO
+AS
+BEGIN
+    RDB$SET_CONTEXT('USER_TRANSACTION', 'VERSAO_CASHBACKS', 1);
+END^
+
+ALTER TRIGGER TRG_CARRINHO_VERSAO
+AS
+BEGIN
+    RDB$SET_CONTEXT('USER_TRANSACTION', 'VERSAO_CARRINHO', 1);
+END^
+
+CREATE TRIGGER TRG_VERSOES_COMMIT
+ACTIVE ON TRANSACTION COMMIT POSITION 0
+AS
+DECLARE VARIABLE V BIGINT;
+BEGIN
+    IF (RDB$GET_CONTEXT('USER_TRANSACTION', 'VERSAO_CADASTRO') IS NOT NULL) THEN
+        V = GEN_ID(GEN_VERSAO_CADASTRO, 1);
+    IF (RDB$GET_CONTEXT('USER_TRANSACTION', 'VERSAO_PRODUTOS') IS NOT NULL) THEN
+        V = GEN_ID(GEN_VERSAO_PRODUTOS, 1);
+    IF (RDB$GET_CONTEXT('USER_TRANSACTION', 'VERSAO_VENDAS') IS NOT NULL) THEN
+        V = GEN_ID(GEN_VERSAO_VENDAS, 1);
+    IF (RDB$GET_CONTEXT('USER_TRANSACTION', 'VERSAO_CASHBACKS') IS NOT NULL) THEN
+        V = GEN_ID(GEN_VERSAO_CASHBACKS, 1);
+    IF (RDB$GET_CONTEXT('USER_TRANSACTION', 'VERSAO_CARRINHO') IS NOT NULL) THEN
+        V = GEN_ID(GEN_VERSAO_CARRINHO, 1);
+END^
+
+SET TERM ; ^
+
+COMMIT;
@@ -0,0 +1,83 @@
+from busca import IndiceBusca, normalizar
+
+
+def produto(id_produto, nome, marca=None, descricao=None, preco=10.0):
+    return {'id': id_produto, 'nome': nome, 'marca': marca, 'descricao': descricao, 'preco': preco, 'imagem': None}
+
+
+def ids(resultado):
+    return [p['id'] for p in resultado[1]]
+
+
+def test_normalizar_tira_acento_e_caixa():
+    assert normalizar('Óleo de Câmbio 5W30') == ['oleo', 'de', 'cambio', '5w30']
+    assert normalizar(None) == []
+
+
+def test_busca_por_prefixo_e_palavra_inteira():
+    indice = IndiceBusca()
+    indice.reconstruir([produto(1, 'Pastilha de freio', 'Bosch'), produto(2, 'Pasta térmica'),
+                        produto(3, 'Disco de freio')])
+    assert sorted(ids(indice.buscar('past'))) == [1, 2]
+    assert ids(indice.buscar('freio bosch')) == [1]  # Todos os termos precisam aparecer
+    assert indice.buscar('inexistente') == (0, [])
+    assert indice.buscar('') == (0, [])
+
+
+def test_palavra_inteira_pontua_mais():
+    indice = IndiceBusca()
+    indice.reconstruir([produto(1, 'Filtros variados'), produto(2, 'Filtro de ar')])
+    assert ids(indice.buscar('filtro')) == [2, 1]
+
+
+def test_atualizar_e_remover_mantem_os_termos():
+    indice = IndiceBusca()
+    indice.reconstruir([produto(1, 'Amortecedor')])
+    indice.atualizar(produto(1, 'Bateria'))
+    assert indice.buscar('amort') == (0, [])
+    assert ids(indice.buscar('bat')) == [1]
+    indice.remover(1)
+    assert indice.buscar('bat') == (0, [])
+    assert indice.estatisticas()['termos'] == 0
+
+
+def test_preco_fica_numerico():
+    indice = IndiceBusca()
+    indice.atualizar(produto(1, 'Vela', preco='12.50'))
+    assert indice.buscar('vela')[1][0]['preco'] == 12.5
+
+
+def test_escritas_durante_a_reconstrucao_sao_reaplicadas():
+    indice = IndiceBusca()
+    indice.reconstruir([produto(1, 'Correia'), produto(2, 'Tensor')])
+    indice.iniciar_reconstrucao()  # Antes da consulta ao banco, como o RecarregadorIndice faz
+
+    def leitura_do_banco():
+        yield produto(1, 'Correia')
+        # Escritas confirmadas depois que a consulta começou: não vêm no resultado dela
+        indice.atualizar(produto(3, 'Radiador'))
+        indice.remover(2)
+        yield produto(2, 'Tensor')
+
+    indice.reconstruir(leitura_do_banco())
+    assert ids(indice.buscar('radiador')) == [3]
+    assert indice.buscar('tensor') == (0, [])
+    assert ids(indice.buscar('correia')) == [1]
+
+
+def test_falha_na_reconstrucao_mantem_o_indice_antigo():
+    indice = IndiceBusca()
+    indice.reconstruir([produto(1, 'Embreagem')])
+
+    def leitura_quebrada():
+        yield produto(2, 'Volante')
+        raise RuntimeError("conexão perdida")
+
+    try:
+        indice.reconstruir(leitura_quebrada())
+    except RuntimeError:
+        pass
+    assert ids(indice.buscar('embreagem')) == [1]
+    assert indice.buscar('volante') == (0, [])
+    indice.atualizar(produto(4, 'Coxim'))  # Sem reconstrução pendente: nada fica acumulado
+    assert indice._pendentes is None
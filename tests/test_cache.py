@@ -0,0 +1,52 @@
+import time
+
+from cache import CacheLRU
+
+
+def test_guarda_e_obtem():
+    cache = CacheLRU(tamanho_max=10, ttl=60)
+    cache.guardar('a', 1)
+    assert cache.obter('a') == 1
+    assert cache.obter('b', 'padrao') == 'padrao'
+    assert cache.estatisticas()['acertos'] == 1
+    assert cache.estatisticas()['falhas'] == 1
+
+
+def test_descarta_o_menos_usado():
+    cache = CacheLRU(tamanho_max=2, ttl=60)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obter('a')  # 'b' passa a ser o menos usado
+    cache.guardar('c', 3)
+    assert cache.obter('b') is None
+    assert cache.obter('a') == 1 and cache.obter('c') == 3
+    assert cache.estatisticas()['descartes'] == 1
+
+
+def test_expira_pelo_ttl():
+    cache = CacheLRU(tamanho_max=10, ttl=60)
+    cache.guardar('a', 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.obter('a') is None
+    assert cache.estatisticas()['expirados'] == 1
+
+
+def test_limite_de_peso():
+    cache = CacheLRU(tamanho_max=10, ttl=60, peso_max=10)
+    cache.guardar('a', b'x', peso=6)
+    cache.guardar('b', b'y', peso=6)  # Passa de 10: sai o mais antigo
+    assert cache.obter('a') is None
+    assert cache.peso_total == 6
+    cache.guardar('grande', b'z', peso=11)  # Maior que o cache inteiro: nem entra
+    assert cache.obter('grande') is None
+    assert cache.obter('b') == b'y'
+
+
+def test_remover_e_limpar():
+    cache = CacheLRU(tamanho_max=10, ttl=60, peso_max=100)
+    cache.guardar('a', 1, peso=5)
+    cache.guardar('b', 2, peso=5)
+    cache.remover('a')
+    assert cache.obter('a') is None and cache.peso_total == 5
+    cache.limpar()
+    assert cache.obter('b') is None and cache.peso_total == 0
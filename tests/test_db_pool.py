@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+
+from db_pool import PoolConexoes, PoolEsgotado
+
+
+class CursorFalso:
+    def __init__(self, con):
+        self.con = con
+
+    def execute(self, sql, parametros=None):
+        if self.con.caiu:
+            raise RuntimeError("conexão perdida")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class ConexaoFalsa:
+    """Faz o papel da conexão fdb: conta rollbacks e fechamentos."""
+
+    def __init__(self):
+        self.caiu = False
+        self.rollbacks = 0
+        self.fechada = False
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.fechada = True
+
+
+@pytest.fixture
+def criadas():
+    return []
+
+
+@pytest.fixture
+def fabrica(criadas):
+    def abrir():
+        con = ConexaoFalsa()
+        criadas.append(con)
+        return con
+    return abrir
+
+
+def test_reutiliza_a_conexao_devolvida(fabrica, criadas):
+    pool = PoolConexoes(fabrica, tamanho_max=2)
+    con = pool.obter()
+    con.close()
+    pool.obter().close()
+    assert len(criadas) == 1
+    assert criadas[0].rollbacks == 2  # Toda devolução encerra a transação pendente
+    assert pool.estatisticas()['emprestimos'] == 2
+
+
+def test_close_repetido_nao_devolve_duas_vezes(fabrica):
+    pool = PoolConexoes(fabrica, tamanho_max=2)
+    con = pool.obter()
+    con.close()
+    outra = pool.obter()  # Pega a mesma conexão física
+    con.close()  # Segundo close do empréstimo antigo: não pode devolver a conexão que está com `outra`
+    assert pool.estatisticas()['em_uso'] == 1
+    assert not outra.liberada
+    with pytest.raises(RuntimeError):
+        con.cursor()
+    outra.close()
+
+
+def test_esgota_no_tamanho_maximo(fabrica):
+    pool = PoolConexoes(fabrica, tamanho_max=1, espera_max=0.05)
+    con = pool.obter()
+    with pytest.raises(PoolEsgotado):
+        pool.obter()
+    con.close()
+    pool.obter().close()
+
+
+def test_espera_uma_conexao_ser_devolvida(fabrica):
+    pool = PoolConexoes(fabrica, tamanho_max=1, espera_max=2)
+    con = pool.obter()
+    threading.Timer(0.05, con.close).start()
+    pool.obter().close()  # Acorda com a devolução em vez de esgotar
+
+
+def test_descarta_conexao_que_falha_no_teste(fabrica, criadas):
+    pool = PoolConexoes(fabrica, tamanho_max=2, validar_apos=0)
+    pool.obter().close()
+    criadas[0].caiu = True
+    con = pool.obter()  # A ociosa falha no teste de saúde: abre outra
+    assert len(criadas) == 2 and criadas[0].fechada
+    con.close()
+    assert pool.estatisticas()['conexoes_descartadas'] == 1
+    assert pool.estatisticas()['abertas'] == 1
+
+
+def test_recicla_pela_vida_maxima(fabrica, criadas):
+    pool = PoolConexoes(fabrica, tamanho_max=2, vida_max=0)
+    pool.obter().close()
+    assert criadas[0].fechada
+    assert pool.estatisticas()['abertas'] == 0
+
+
+def test_falha_ao_abrir_libera_a_vaga():
+    def fabrica_quebrada():
+        raise RuntimeError("banco fora do ar")
+    pool = PoolConexoes(fabrica_quebrada, tamanho_max=1, espera_max=0.05)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            pool.obter()
+    assert pool.estatisticas()['abertas'] == 0
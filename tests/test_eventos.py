@@ -0,0 +1,127 @@
+import datetime
+
+from eventos import FeedEventos, filtrar, formatar_sse
+
+
+def linha(id_evento, tabela='VENDAS', id_cliente=1):
+    return (id_evento, tabela, 'I', id_evento, id_cliente, 10, id_evento, 1, 50, datetime.datetime(2024, 1, 1))
+
+
+class BancoFalso:
+    """Pool com uma tabela EVENTOS em memória e um contador de transações abertas no MON$."""
+
+    def __init__(self):
+        self.linhas = []
+        self.transacoes_abertas = 0
+        self.consultas_mon = 0
+
+    def obter(self):
+        return ConexaoFalsa(self)
+
+
+class ConexaoFalsa:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def cursor(self):
+        return CursorFalso(self.banco)
+
+    def close(self):
+        pass
+
+
+class CursorFalso:
+    def __init__(self, banco):
+        self.banco = banco
+        self.resultado = []
+
+    def execute(self, sql, parametros=()):
+        if 'MAX(ID)' in sql:
+            self.resultado = [(max((l[0] for l in self.banco.linhas), default=None),)]
+        elif 'MIN(ID)' in sql:
+            self.resultado = [(min((l[0] for l in self.banco.linhas), default=None),)]
+        elif 'MON$TRANSACTIONS' in sql:
+            self.banco.consultas_mon += 1
+            self.resultado = [(self.banco.transacoes_abertas,)]
+        elif 'CURRENT_TIMESTAMP' in sql:
+            self.resultado = [(datetime.datetime.now(),)]
+        else:  # SQL_EVENTOS: ID > ?
+            self.resultado = sorted(l for l in self.banco.linhas if l[0] > parametros[0])
+
+    def fetchone(self):
+        return self.resultado[0]
+
+    def fetchall(self):
+        return list(self.resultado)
+
+    def close(self):
+        pass
+
+
+def feed_iniciado(banco, **kwargs):
+    feed = FeedEventos(banco, tamanho=kwargs.pop('tamanho', 100), lacuna_espera=kwargs.pop('lacuna_espera', 0),
+                       **kwargs)
+    feed._ler()  # Primeira leitura: começa do fim da tabela
+    return feed
+
+
+def test_filtrar_por_tabela_e_cliente():
+    eventos = [{'tabela': 'vendas', 'id_cliente': 1}, {'tabela': 'carrinho', 'id_cliente': 2}]
+    assert filtrar(eventos, None) == eventos
+    assert filtrar(eventos, {'vendas'}) == eventos[:1]
+    assert filtrar(eventos, None, 2) == eventos[1:]
+    assert filtrar(eventos, {'vendas'}, 2) == []
+
+
+def test_formatar_sse():
+    texto = formatar_sse({'id': 7, 'tabela': 'vendas'})
+    assert texto.startswith("id: 7\nevent: vendas\ndata: ") and texto.endswith("\n\n")
+
+
+def test_buffer_circular():
+    banco = BancoFalso()
+    feed = feed_iniciado(banco, tamanho=3)
+    assert feed.ultimo_id == 0
+    banco.linhas = [linha(i) for i in range(1, 6)]
+    feed._ler()
+    assert feed.ultimo_id == 5
+    assert [e['id'] for e in feed.recentes(3)] == [4, 5]
+    assert feed.recentes(5) == []
+    assert feed.recentes(2) is not None  # Buffer guarda 3, 4 e 5: quem está no 2 ainda é atendido
+    assert feed.recentes(1) is None  # Ficou para trás do buffer: vai para a tabela
+    assert [e['id'] for e in feed.desde(1)] == [2, 3, 4, 5]
+
+
+def test_lacuna_segura_enquanto_transacao_anterior_esta_aberta():
+    banco = BancoFalso()
+    feed = feed_iniciado(banco)
+    banco.linhas = [linha(1), linha(3)]  # O 2 é de uma transação que ainda não confirmou
+    banco.transacoes_abertas = 1
+    for _ in range(3):
+        feed._ler()
+        assert feed.ultimo_id == 1  # Sem limite de tempo: o 3 espera o 2
+    assert banco.consultas_mon >= 1
+    banco.linhas.append(linha(2))  # A transação confirmou
+    feed._ler()
+    assert feed.ultimo_id == 3
+    assert [e['id'] for e in feed.recentes(0)] == [1, 2, 3]
+
+
+def test_lacuna_sem_transacao_anterior_foi_desfeita():
+    banco = BancoFalso()
+    feed = feed_iniciado(banco)
+    banco.linhas = [linha(1), linha(3), linha(4)]
+    feed._ler()  # Vê a lacuna: guarda o instante, ainda não consulta o MON$
+    assert feed.ultimo_id == 1 and banco.consultas_mon == 0
+    feed._ler()  # Nenhuma transação de antes da lacuna aberta: o 2 foi desfeito
+    assert feed.ultimo_id == 4
+    assert [e['id'] for e in feed.recentes(0)] == [1, 3, 4]
+
+
+def test_lacuna_espera_o_prazo_minimo_antes_do_mon():
+    banco = BancoFalso()
+    feed = feed_iniciado(banco, lacuna_espera=60)
+    banco.linhas = [linha(2)]
+    feed._ler()
+    feed._ler()
+    assert feed.ultimo_id == 0 and banco.consultas_mon == 0
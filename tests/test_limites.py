@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from limites import BackendMemoria, BackendSQLite, JanelaDeslizante
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memoria':
+        return BackendMemoria()
+    return BackendSQLite(str(tmp_path / 'limites.db'))
+
+
+def test_conta_dentro_da_janela(backend):
+    janela = JanelaDeslizante(backend, limite=3, janela=60)
+    assert [janela.registrar('ip:1') for _ in range(3)] == [1, 2, 3]
+    assert janela.registrar('ip:2') == 1  # Cada chave conta à parte
+
+
+def test_eventos_saem_da_janela(backend):
+    assert backend.registrar('k', 0, 10) == 1
+    assert backend.registrar('k', 5, 10) == 2
+    assert backend.registrar('k', 10, 10) == 2  # O de t=0 já saiu (janela de 10 s)
+
+
+def test_limpar_zera_a_chave(backend):
+    janela = JanelaDeslizante(backend, limite=3, janela=60)
+    janela.registrar('email:a')
+    janela.registrar('email:a')
+    janela.limpar('email:a')
+    janela.limpar('email:sem-eventos')
+    assert janela.registrar('email:a') == 1
+
+
+def test_memoria_limita_as_chaves():
+    backend = BackendMemoria(max_chaves=2)
+    for chave in ('a', 'b', 'c'):
+        backend.registrar(chave, 0, 60)
+    assert list(backend._eventos) == ['b', 'c']
+
+
+def test_sqlite_poda_chaves_abandonadas(tmp_path):
+    caminho = str(tmp_path / 'limites.db')
+    backend = BackendSQLite(caminho, limpar_a_cada=3)
+    backend.registrar('curta', 0, 10)
+    backend.registrar('longa', 0, 100)
+    backend.registrar('nova', 50, 10)  # Poda geral: 'curta' venceu, mas a maior janela (100) ainda conta t=0
+    db = sqlite3.connect(caminho)
+    assert sorted(c for c, in db.execute("SELECT CHAVE FROM EVENTOS_LIMITE")) == ['curta', 'longa', 'nova']
+    backend.registrar('x', 200, 10)
+    backend.registrar('y', 200, 10)
+    backend.registrar('z', 200, 10)  # Poda geral: tudo até t=100 sai
+    assert sorted(c for c, in db.execute("SELECT CHAVE FROM EVENTOS_LIMITE")) == ['x', 'y', 'z']
+    db.close()
@@ -0,0 +1,37 @@
+# ==============================================
+#  VERSÃO DAS TABELAS (ETag BARATO, ver sql/004_versoes_tabelas.sql)
+# ==============================================
+# Cada tabela tem um generator GEN_VERSAO_<TABELA> que só cresce: o trigger ON TRANSACTION COMMIT soma 1
+# nas tabelas alteradas pela transação (inclusive escritas feitas fora do app, ver sql/007) e o app soma de
+# novo depois do commit. Ler todas as versões é uma única consulta em RDB$DATABASE, sem tocar nas tabelas;
+# se a versão não mudou, o conteúdo também não.
+import hashlib
+
+TABELAS_VERSIONADAS = ('CADASTRO', 'PRODUTOS', 'VENDAS', 'CASHBACKS', 'CARRINHO')
+
+
+def sql_versoes(tabelas, incremento=0):
+    colunas = ', '.join(f"GEN_ID(GEN_VERSAO_{tabela}, {incremento})" for tabela in tabelas)
+    return f"SELECT {colunas} FROM RDB$DATABASE"
+
+
+def ler_versoes(cursor, tabelas):
+    """Versões atuais de `tabelas` (tupla na mesma ordem)."""
+    cursor.execute(sql_versoes(tabelas))
+    return tuple(cursor.fetchone())
+
+
+def incrementar_versoes(cursor, tabelas):
+    """
+    Marca as tabelas como alteradas. Chamar DEPOIS do commit: o trigger de commit incrementa um instante
+    antes do commit ficar visível e um leitor pode ter lido a versão nova com os dados antigos; este
+    segundo incremento garante que o ETag gerado nessa janela deixe de valer.
+    """
+    cursor.execute(sql_versoes(tabelas, 1))
+    cursor.fetchone()
+
+
+def etag_versoes(versoes, chave):
+    """ETag a partir das versões e da chave da requisição (rota + query string)."""
+    h = hashlib.sha1(repr((versoes, chave)).encode('utf-8'))
+    return h.hexdigest()[:20]
@@ -1,25 +1,166 @@
 # ==============================================
-from flask import Flask, request, jsonify, send_from_directory, send_file
-from flask_cors import CORS
-from fpdf import FPDF
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from flask import Blueprint, current_app, request, jsonify, send_from_directory, send_file, g, Response, \
+    stream_with_context, has_request_context, make_response
+from functools import wraps
+from werkzeug.utils import safe_join
+from db_pool import PoolConexoes
+from cache import CacheLRU
+from relatorios import RELATORIOS, hash_relatorio, renderizar_pdf, renderizar_relatorio
+from jobs import FilaJobs, CONCLUIDO
+from hashing import ServicoHash
+from limites import JanelaDeslizante, BackendMemoria, BackendSQLite
+from imagens import ProcessadorImagens
+from resumos import DIMENSOES, ler_resumo, CompactadorResumos
+from metricas import RegistroMetricas, BUCKETS_CONSULTAS, resumir_sql
+from busca import IndiceBusca, RecarregadorIndice
+from exportacao import EXPORTACOES, FORMATOS, sql_exportacao, marca_consolidada, exportar, formato_disponivel
+from versoes import ler_versoes, incrementar_versoes, etag_versoes
+from compressao import COMPRESSAO_MINIMO, codificacoes_suportadas, compressivel, comprimir, comprimir_pedacos
+from eventos import TABELAS_FEED, FeedEventos, filtrar, formatar_sse
+import config
 import fdb
 import jwt
 import re
 import os
 import logging
 import datetime
+import base64
+import json
+import io
+import mimetypes
+import time
+import threading
 # ----------------------------------------------
 #  CONFIGURAÇÕES GERAIS DO APLICATIVO
 # ----------------------------------------------
-app = Flask(__name__)  # Cria a aplicação Flask
-app.config['SECRET_KEY'] = 'sua_chave_secreta_aqui'  # Chave secreta para geração de tokens JWT
-CORS(app, resources={r"/*": {"origins": "*"}})  # Permite CORS (origem cruzada) em todas as rotas
+# O app é criado por aplicacao.criar_app(); as rotas ficam neste blueprint
+# SECRET_KEY, banco e pasta de upload vêm de config.py
+api = Blueprint('api', __name__)
 
-UPLOAD_FOLDER = 'static/imagens'  # Pasta padrão para upload de imagens
+UPLOAD_FOLDER = config.UPLOAD_FOLDER  # Pasta padrão para upload de imagens
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}  # Extensões permitidas para upload
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER  # Configuração do Flask para pasta de upload
+
+# Pool de conexões com o Firebird (evita abrir uma conexão nova a cada requisição)
+POOL_TAMANHO_MAX = 10  # Máximo de conexões abertas ao mesmo tempo
+POOL_OCIOSO_MAX = 300  # Segundos até fechar uma conexão parada
+POOL_VIDA_MAX = 1800  # Segundos até reciclar uma conexão
+POOL_ESPERA_MAX = 30  # Segundos que uma requisição espera por conexão livre
+
+# Paginação da listagem de produtos
+PRODUTOS_LIMITE_PADRAO = 50  # Itens por página quando o cliente não informa
+PRODUTOS_LIMITE_MAX = 200  # Maior página que o servidor aceita devolver
+PRODUTOS_COLUNAS = ('ID', 'NOME', 'DESCRICAO', 'MARCA', 'PRECO', 'ACABAMENTO', 'IMAGEM', 'ID_VENDEDOR')
+
+# Cache de produtos (detalhe por ID e páginas do catálogo)
+CACHE_PRODUTOS_TAMANHO = 5000  # Produtos guardados em memória
+CACHE_PRODUTOS_TTL = 300  # Segundos (limita o atraso entre workers diferentes)
+CACHE_CATALOGO_TAMANHO = 256  # Páginas/filtros do catálogo guardados
+CACHE_CATALOGO_TTL = 60
+
+# Respostas em streaming (/vendas e /cashbacks)
+STREAM_LOTE = 500  # Linhas lidas do banco por vez (fetchmany)
+EXPORTACAO_LOTE = 10000  # Linhas por lote nas exportações (vira um row group no Parquet)
+EXPORTACAO_ESPERA = 5  # Segundos esperando terminarem as transações que podem ter IDs abaixo do fim da fatia
+
+# Carrinho
+CARRINHO_LOTE_MAX = 200  # Máximo de itens em POST /carrinho/itens
+CHECKOUT_BLOCO = 20  # Itens por EXECUTE BLOCK no checkout (carrinhos maiores usam vários blocos na mesma transação)
+GDS_CONFLITOS = (335544336, 335544345, 335544451)  # deadlock, lock_conflict, update_conflict: outra transação nas mesmas linhas
+# Soma a quantidade se o produto já está no carrinho do cliente, senão insere o item
+# Parâmetros: id_cliente, id_produto, quantidade, preço unitário
+SQL_CARRINHO_UPSERT = """
+    MERGE INTO CARRINHO C
+    USING (
+        SELECT CAST(? AS INTEGER) AS ID_CLIENTE, CAST(? AS INTEGER) AS ID_PRODUTO,
+               CAST(? AS INTEGER) AS QUANTIDADE, CAST(? AS DECIMAL(18, 2)) AS PRECO
+        FROM RDB$DATABASE
+    ) N
+    ON C.ID_CLIENTE = N.ID_CLIENTE AND C.ID_PRODUTO = N.ID_PRODUTO
+    WHEN MATCHED THEN
+        UPDATE SET QUANTIDADE = C.QUANTIDADE + N.QUANTIDADE,
+                   VALOR_TOTAL = (C.QUANTIDADE + N.QUANTIDADE) * N.PRECO
+    WHEN NOT MATCHED THEN
+        INSERT (ID_CLIENTE, ID_PRODUTO, QUANTIDADE, VALOR_UNITARIO, VALOR_TOTAL)
+        VALUES (N.ID_CLIENTE, N.ID_PRODUTO, N.QUANTIDADE, N.PRECO, N.QUANTIDADE * N.PRECO)
+"""
+
+# Vendas
+VENDEDOR_PADRAO_EMAIL = 'vendedor@gmail.com'  # Vendedor atribuído automaticamente às vendas
+CARGOS_ATENDIMENTO = {'vendedor', 'adm', 'administrador'}  # Podem comprar/mexer no carrinho em nome de um cliente
+CASHBACK_PERCENTUAL = 0.05  # 5% do valor da venda volta como cashback
+
+# Resumos de vendas (tabela RESUMO_VENDAS, mantida por triggers: sql/001_resumos_vendas.sql)
+RESUMOS_COMPACTAR_A_CADA = 60  # Segundos entre as compactações dos deltas
+
+# Relatórios em PDF (definições em relatorios.RELATORIOS)
+CACHE_RELATORIOS_TAMANHO = 32  # PDFs prontos guardados em memória
+CACHE_RELATORIOS_TTL = 3600
+CACHE_TOKENS_TAMANHO = 10000  # Tokens JWT já validados guardados em memória
+CACHE_IDENTIDADES_TAMANHO = 20000  # E-mails -> (ID_CADASTRO, CARGO) guardados em memória
+CACHE_IDENTIDADES_TTL = 600
+CACHE_IDENTIDADES_TTL_NEGATIVO = 60  # E-mails inexistentes ficam menos tempo em cache
+CACHE_IDENTIDADES_CONFERIR = 5  # Segundos entre as leituras de GEN_VERSAO_CADASTRO (o cache é esvaziado se mudou)
+
+# Fila de jobs em segundo plano (relatórios pesados)
+JOBS_BANCO = os.path.join(config.RAIZ, 'jobs.db')  # Tabela de jobs (SQLite), compartilhada entre workers
+JOBS_PASTA = os.path.join(config.RAIZ, 'jobs')  # Onde ficam os arquivos gerados
+JOBS_CONCORRENCIA = 2  # Jobs rodando ao mesmo tempo por processo
+# Processos auxiliares por worker: o orçamento é do servidor inteiro (são SERVIDOR_WORKERS workers, cada um com
+# os seus pools), metade para os PDFs e metade para o hash. Com mais workers que o orçamento, a divisão dá 0:
+# cada pool fica com pelo menos 1 processo (parado, ele só ocupa memória; o hash nunca roda na thread da requisição).
+PROCESSOS_POR_WORKER = config.SERVIDOR_PROCESSOS_AUXILIARES // max(config.SERVIDOR_WORKERS, 1)
+JOBS_PROCESSOS = max(1, PROCESSOS_POR_WORKER // 2)  # Processos para renderizar PDFs
+JOBS_RETENCAO = 3600  # Segundos que um job terminado fica disponível para download
+JOBS_ESPERA_MAX = 30  # Máximo de segundos do long-poll em GET /jobs/<id>
+
+# Hash de senhas (hashes com outro método são refeitos no próximo login com sucesso)
+HASH_METODO = 'pbkdf2:sha256:600000'  # Algoritmo e número de iterações
+HASH_PROCESSOS = max(1, PROCESSOS_POR_WORKER - JOBS_PROCESSOS)  # Processos dedicados ao hash
+
+# Proteção do login (contagem no SQLite local; o CADASTRO só é alterado quando a conta é bloqueada)
+LOGIN_MAX_TENTATIVAS = 3  # Senhas erradas seguidas até bloquear a conta
+LOGIN_JANELA_FALHAS = 900  # Segundos em que as falhas são somadas
+LOGIN_LIMITE_IP = 20  # Tentativas de login por IP dentro da janela abaixo
+LOGIN_JANELA_IP = 60
+# SQLite compartilhado entre os workers da máquina. None = memória do processo: cada worker conta à parte
+# e o limite vale por worker (N workers = até N vezes mais tentativas); só para um processo (main.py)
+LIMITES_BACKEND = os.path.join(config.RAIZ, 'limites.db')
+
+# Imagens de produtos (original + variantes thumb/medium/full em WebP e JPEG)
+IMAGENS_THREADS = 2  # Threads que geram as variantes em segundo plano
+IMAGENS_CACHE_BYTES = 64 * 1024 * 1024  # Memória para arquivos de imagem pequenos e muito acessados
+IMAGENS_CACHE_ARQUIVO_MAX = 512 * 1024  # Arquivos maiores que isso são sempre lidos do disco
+IMAGENS_MAX_AGE_IMUTAVEL = 31536000  # 1 ano para arquivos com hash no nome (nunca mudam)
+IMAGENS_SEM_VARIANTES_TTL = 30  # Segundos que "variantes ainda não geradas" fica em cache (evita ir ao disco a cada produto)
+# Nomes gerados pelo pipeline de imagens: <hash>.<ext> ou <hash>_<variante>.<ext>
+IMAGEM_COM_HASH = re.compile(r'^[0-9a-f]{32}(_(thumb|medium|full))?\.[a-z0-9]+$')
+
+# Busca de produtos (GET /produtos/busca: índice invertido em memória, sem consultar o banco)
+BUSCA_LIMITE_PADRAO = 20
+BUSCA_LIMITE_MAX = 100
+BUSCA_RECARREGAR_A_CADA = 300  # Segundos entre recargas completas (traz as mudanças feitas por outros workers)
+
+# Respostas condicionais (ETag pela versão das tabelas, ver versoes.py) e compressão (ver compressao.py)
+VERSOES_RETENTAR = 60  # Segundos sem ler as versões depois de uma falha (ex: sql/004 ainda não aplicado)
+COMPRESSAO_ATIVA = True  # False se um proxy na frente (nginx) já comprime
+
+# Feed de alterações (GET /eventos e /eventos/stream; tabela EVENTOS: sql/005_eventos.sql)
+FEED_BUFFER = 10000  # Eventos guardados em memória para replay
+FEED_INTERVALO = 0.5  # Segundos entre leituras da tabela EVENTOS (commits deste worker leem na hora)
+FEED_LACUNA_ESPERA = 2.0  # Segundos esperando um ID que falta antes de conferir no MON$ se a transação dele acabou
+FEED_RETENCAO = 86400  # Segundos que os eventos ficam na tabela para quem reconecta atrasado
+FEED_LOTE = 500  # Máximo de eventos por resposta (long-poll) ou por envio (stream)
+FEED_ESPERA_MAX = 25  # Máximo de segundos do long-poll em GET /eventos
+FEED_STREAMS_MAX = 2  # Streams SSE simultâneos por worker WSGI (cada um prende uma thread; em massa, use asgi.py)
+FEED_LONG_POLLS_MAX = max(1, config.SERVIDOR_THREADS // 2)  # Long-polls esperando ao mesmo tempo por worker WSGI
+FEED_STREAM_DURACAO = 300  # Segundos até encerrar um stream WSGI (o EventSource reconecta com Last-Event-ID)
+FEED_PING = 15  # Segundos sem eventos até mandar um comentário (mantém proxies e detecta cliente desconectado)
+# O EventSource do navegador não envia cabeçalhos: só os streams aceitam o token também em ?token=
+FEED_TOKEN_NA_QUERY = {'api.eventos_stream', 'api_async.eventos_stream'}
+
+# Métricas (GET /metrics no formato do Prometheus; cada worker expõe as suas)
+METRICAS_TOKEN = None  # Se definido, /metrics exige 'Authorization: Bearer <METRICAS_TOKEN>'
+SQL_LENTO_MS = 500  # Comandos SQL mais lentos que isso vão para o log com texto e parâmetros (None = desligado)
 # ----------------------------------------------
 #  FUNÇÕES AUXILIARES
 # ----------------------------------------------
@@ -27,14 +168,326 @@ def allowed_file(filename):
     """Verifica se a extensão do arquivo é permitida ex: jpg, pdf etc."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
     # Retorna True se a extensão do arquivo estiver na lista permitida
-def get_db_connection():
-    """Cria e retorna a conexão com o banco Firebird."""
+def conectar_firebird():
+    """Abre uma conexão nova com o banco Firebird (usada apenas pelo pool)."""
     return fdb.connect(
-        dsn=r'localhost:C:\Users\Aluno\Desktop\AUTOPRIME.FDB',  # DSN com caminho do banco
-        user='SYSDBA',  # Usuário do banco
-        password='sysdba',  # Senha do banco
+        dsn=config.DB_DSN,  # DSN com caminho do banco (config.py)
+        user=config.DB_USER,  # Usuário do banco
+        password=config.DB_PASSWORD,  # Senha do banco
         charset='UTF8'  # Define charset UTF-8 para a conexão
     )
+metricas = RegistroMetricas()
+http_requisicoes = metricas.contador(
+    'http_requisicoes_total', 'Requisições atendidas', ('rota', 'metodo', 'status'))
+http_duracao = metricas.histograma(
+    'http_duracao_segundos', 'Tempo de resposta por rota (inclui o streaming)', ('rota', 'metodo'))
+http_em_andamento = metricas.medidor('http_em_andamento', 'Requisições sendo atendidas agora')
+http_tempo_banco = metricas.histograma(
+    'http_tempo_banco_segundos', 'Tempo gasto no banco (execute + fetch) por requisição', ('rota',))
+http_comandos_sql = metricas.histograma(
+    'http_comandos_sql', 'Comandos SQL executados por requisição', ('rota',), buckets=BUCKETS_CONSULTAS)
+sql_comandos = metricas.contador(
+    'sql_comandos_total', 'Comandos SQL executados', ('rota', 'comando', 'tabela'))
+sql_duracao = metricas.histograma(
+    'sql_duracao_segundos', 'Tempo de cada execute/fetch no banco', ('rota', 'comando', 'tabela', 'fase'))
+def rota_atual():
+    """Rota (modelo da URL, ex: /produto/<int:id>) da requisição atual; 'segundo_plano' fora de requisições."""
+    if not has_request_context():
+        return 'segundo_plano'
+    return request.url_rule.rule if request.url_rule else 'sem_rota'
+def observar_sql(sql, parametros, segundos, fase):
+    """Chamado pelos cursores do pool a cada execute/fetch: alimenta as métricas e o log de SQL lento."""
+    comando, tabela = resumir_sql(sql)
+    rota = rota_atual()
+    sql_duracao.observar(rota, comando, tabela, fase, valor=segundos)
+    if fase == 'execute':
+        sql_comandos.somar(rota, comando, tabela)
+    if has_request_context():
+        g.sql_segundos = g.get('sql_segundos', 0.0) + segundos
+        if fase == 'execute':
+            g.sql_comandos = g.get('sql_comandos', 0) + 1
+    if SQL_LENTO_MS is not None and segundos * 1000 >= SQL_LENTO_MS:
+        texto = ' '.join((sql or '').split())
+        # Nunca registra parâmetros de comandos com senha (hash ou texto)
+        valores = '<ocultos>' if 'SENHA' in texto.upper() else repr(parametros)[:500]
+        logging.warning(f"SQL lento ({fase}, {segundos * 1000:.0f} ms) em {rota}: {texto} | parâmetros: {valores}")
+pool = PoolConexoes(
+    conectar_firebird,
+    tamanho_max=POOL_TAMANHO_MAX,
+    ocioso_max=POOL_OCIOSO_MAX,
+    vida_max=POOL_VIDA_MAX,
+    espera_max=POOL_ESPERA_MAX,
+    observador=observar_sql,  # Cursores medidos (ver db_pool.CursorMedido)
+)
+def get_db_connection():
+    """Empresta uma conexão do pool. con.close() devolve a conexão ao pool."""
+    con = pool.obter()
+    g.setdefault('conexoes', []).append(con)  # Guarda para devolver no fim da requisição
+    return con
+cache_produtos = CacheLRU(CACHE_PRODUTOS_TAMANHO, CACHE_PRODUTOS_TTL)  # ID -> produto
+cache_catalogo = CacheLRU(CACHE_CATALOGO_TAMANHO, CACHE_CATALOGO_TTL)  # (consulta, versões) -> página do catálogo
+cache_relatorios = CacheLRU(CACHE_RELATORIOS_TAMANHO, CACHE_RELATORIOS_TTL)  # hash dos dados -> bytes do PDF
+cache_tokens = CacheLRU(CACHE_TOKENS_TAMANHO, 3600)  # token -> claims (TTL = validade restante do token)
+cache_identidades = CacheLRU(CACHE_IDENTIDADES_TAMANHO, CACHE_IDENTIDADES_TTL)  # e-mail exato -> (id, cargo) ou None
+AUSENTE = object()  # Marca "não está no cache" (None no cache significa "e-mail não existe")
+fila_jobs = FilaJobs(JOBS_BANCO, JOBS_PASTA, concorrencia=JOBS_CONCORRENCIA,
+                     processos=JOBS_PROCESSOS, retencao=JOBS_RETENCAO)
+servico_hash = ServicoHash(HASH_METODO, processos=HASH_PROCESSOS)
+backend_limites = BackendSQLite(LIMITES_BACKEND) if LIMITES_BACKEND else BackendMemoria()
+processador_imagens = ProcessadorImagens(os.path.join(UPLOAD_FOLDER, "produto"), "produto",
+                                         threads=IMAGENS_THREADS)
+cache_arquivos = CacheLRU(100000, 3600, peso_max=IMAGENS_CACHE_BYTES)  # caminho -> (bytes, etag)
+cache_variantes = CacheLRU(CACHE_PRODUTOS_TAMANHO, 86400)  # imagem -> mapa de variantes (False = ainda sem variantes)
+falhas_login = JanelaDeslizante(backend_limites, LOGIN_MAX_TENTATIVAS, LOGIN_JANELA_FALHAS)  # chave: e-mail
+tentativas_ip = JanelaDeslizante(backend_limites, LOGIN_LIMITE_IP, LOGIN_JANELA_IP)  # chave: IP
+compactador_resumos = CompactadorResumos(pool, RESUMOS_COMPACTAR_A_CADA)
+indice_busca = IndiceBusca()
+recarregador_busca = RecarregadorIndice(indice_busca, pool, BUSCA_RECARREGAR_A_CADA)
+feed_eventos = FeedEventos(pool, FEED_BUFFER, FEED_INTERVALO, FEED_LACUNA_ESPERA, FEED_RETENCAO, FEED_LOTE)
+streams_feed = threading.BoundedSemaphore(FEED_STREAMS_MAX)
+long_polls_feed = threading.BoundedSemaphore(FEED_LONG_POLLS_MAX)  # O resto das threads fica para as outras rotas
+@metricas.coletor
+def metricas_pool_e_caches():
+    """Expõe no /metrics os números que o pool e os caches já contam."""
+    estatisticas = pool.estatisticas()
+    familias = [
+        ('pool_conexoes_abertas', 'Conexões abertas com o banco', 'gauge', {(): estatisticas['abertas']}),
+        ('pool_conexoes_em_uso', 'Conexões emprestadas', 'gauge', {(): estatisticas['em_uso']}),
+        ('pool_conexoes_ociosas', 'Conexões livres no pool', 'gauge', {(): estatisticas['ociosas']}),
+        ('pool_emprestimos_total', 'Conexões emprestadas desde o início', 'counter',
+         {(): estatisticas['emprestimos']}),
+        ('pool_conexoes_criadas_total', 'Conexões abertas com o banco desde o início', 'counter',
+         {(): estatisticas['conexoes_criadas']}),
+        ('pool_espera_max_segundos', 'Maior espera por uma conexão livre', 'gauge',
+         {(): estatisticas['espera_max_ms'] / 1000}),
+    ]
+    caches = {'produtos': cache_produtos, 'catalogo': cache_catalogo, 'relatorios': cache_relatorios,
+              'tokens': cache_tokens, 'identidades': cache_identidades, 'arquivos': cache_arquivos,
+              'variantes': cache_variantes}
+    por_cache = {nome: c.estatisticas() for nome, c in caches.items()}
+    for campo, nome, ajuda, tipo in (('acertos', 'cache_acertos_total', 'Leituras encontradas no cache', 'counter'),
+                                     ('falhas', 'cache_falhas_total', 'Leituras que não estavam no cache', 'counter'),
+                                     ('descartes', 'cache_descartes_total', 'Itens removidos por falta de espaço',
+                                      'counter'),
+                                     ('itens', 'cache_itens', 'Itens guardados', 'gauge')):
+        familias.append((nome, ajuda, tipo, {(('cache', c),): e[campo] for c, e in por_cache.items()}))
+    return familias
+@api.before_app_request
+def iniciar_medicao():
+    """Marca o início da requisição para as métricas de latência."""
+    g.inicio_requisicao = time.perf_counter()
+    g.sql_segundos, g.sql_comandos = 0.0, 0
+    http_em_andamento.somar(valor=1)
+@api.after_app_request
+def guardar_status(resposta):
+    g.status_resposta = resposta.status_code
+    return resposta
+@api.teardown_app_request
+def finalizar_medicao(exc):
+    """Registra latência, status e tempo de banco (roda depois do streaming, se houver)."""
+    if 'inicio_requisicao' not in g:
+        return
+    rota, metodo = rota_atual(), request.method
+    http_em_andamento.somar(valor=-1)
+    http_requisicoes.somar(rota, metodo, str(g.get('status_resposta', 500)))  # Sem status = exceção (500)
+    http_duracao.observar(rota, metodo, valor=time.perf_counter() - g.pop('inicio_requisicao'))
+    http_tempo_banco.observar(rota, valor=g.get('sql_segundos', 0.0))
+    http_comandos_sql.observar(rota, valor=g.get('sql_comandos', 0))
+@api.after_app_request
+def comprimir_resposta(resposta):
+    """
+    Comprime com brotli ou gzip (o que o cliente aceitar) respostas de texto/JSON acima de COMPRESSAO_MINIMO.
+    Respostas em streaming são comprimidas pedaço por pedaço, sem esperar o fim.
+    """
+    if (not COMPRESSAO_ATIVA or resposta.status_code != 200 or resposta.direct_passthrough
+            or 'Content-Encoding' in resposta.headers or not compressivel(resposta.mimetype)):
+        return resposta
+    resposta.vary.add('Accept-Encoding')
+    codificacao = request.accept_encodings.best_match(codificacoes_suportadas())
+    if codificacao is None:
+        return resposta
+    if resposta.is_streamed:
+        resposta.response = comprimir_pedacos(resposta.response, codificacao)
+        resposta.headers.pop('Content-Length', None)
+    else:
+        dados = resposta.get_data()
+        if len(dados) < COMPRESSAO_MINIMO:
+            return resposta
+        resposta.set_data(comprimir(dados, codificacao))  # Também atualiza o Content-Length
+    resposta.headers['Content-Encoding'] = codificacao
+    return resposta
+@api.teardown_app_request
+def devolver_conexoes(exc):
+    """Devolve ao pool as conexões que a rota esqueceu de fechar (ex: retornos antecipados)."""
+    for con in g.pop('conexoes', []):
+        con.close()
+def buscar_produto(id_produto, cursor=None):
+    """
+    Retorna o produto (dict com todas as colunas) pelo ID, lendo do cache quando possível.
+    Só vai ao banco em caso de falha no cache; usa o cursor informado ou pega uma conexão do pool.
+    Retorna None se o produto não existir.
+    """
+    id_produto = int(id_produto)
+    produto = cache_produtos.obter(id_produto)
+    if produto is not None:
+        return produto
+
+    con = None
+    if cursor is None:
+        con = get_db_connection()
+        cursor = con.cursor()
+    cursor.execute(f"SELECT {', '.join(PRODUTOS_COLUNAS)} FROM PRODUTOS WHERE ID = ?", (id_produto,))
+    row = cursor.fetchone()
+    produto = dict_from_row(cursor, row) if row else None
+    if con:
+        cursor.close()
+        con.close()
+
+    if produto is not None:
+        cache_produtos.guardar(id_produto, produto)
+    return produto
+def buscar_produtos(ids, cursor):
+    """
+    Versão em lote de buscar_produto: retorna {id: produto} para os IDs existentes.
+    Os que não estão em cache são lidos com um único SELECT ... WHERE ID IN (...).
+    """
+    produtos, faltando = {}, []
+    for id_produto in {int(i) for i in ids}:
+        produto = cache_produtos.obter(id_produto)
+        if produto is not None:
+            produtos[id_produto] = produto
+        else:
+            faltando.append(id_produto)
+
+    if faltando:
+        marcadores = ', '.join('?' * len(faltando))
+        cursor.execute(f"SELECT {', '.join(PRODUTOS_COLUNAS)} FROM PRODUTOS WHERE ID IN ({marcadores})",
+                       tuple(faltando))
+        for row in cursor.fetchall():
+            produto = dict_from_row(cursor, row)
+            produtos[produto['id']] = produto
+            cache_produtos.guardar(produto['id'], produto)
+    return produtos
+def salvar_imagem_produto(file, id_produto):
+    """
+    Grava a imagem enviada com nome pelo hash do conteúdo e agenda as variantes em segundo plano.
+    Retorna o caminho relativo que vai para a coluna IMAGEM.
+    """
+    extensao = os.path.splitext(file.filename)[1]
+    def variantes_prontas(mapa):
+        cache_variantes.guardar(mapa['original'], mapa)  # Substitui o "sem variantes" deste worker
+        invalidar_produto(id_produto)
+    return processador_imagens.salvar(file.read(), extensao, ao_concluir=variantes_prontas)
+def variantes_imagem(imagem):
+    """Mapa das variantes (thumb/medium/full) de uma imagem, ou None se ainda não foram geradas."""
+    if not imagem:
+        return None
+    mapa = cache_variantes.obter(imagem)
+    if mapa is None:
+        mapa = processador_imagens.mapa(imagem)
+        if mapa is not None:
+            cache_variantes.guardar(imagem, mapa)
+        else:
+            # Ainda sendo gerado (ou sem Pillow): a falta fica pouco tempo em cache, para não ler o disco
+            # a cada produto de cada página, e outros workers enxergam as variantes novas logo depois
+            cache_variantes.guardar(imagem, False, ttl=IMAGENS_SEM_VARIANTES_TTL)
+    return mapa or None
+def descartar_imagem(cursor, imagem):
+    """
+    Apaga do disco o original e as variantes de uma imagem que saiu da coluna IMAGEM (chamar após o commit).
+    O nome vem do hash do conteúdo, então outro produto pode estar usando o mesmo arquivo: aí não apaga.
+    """
+    if not imagem:
+        return
+    cursor.execute("SELECT FIRST 1 1 FROM PRODUTOS WHERE IMAGEM = ?", (imagem,))
+    if cursor.fetchone():
+        return
+    processador_imagens.remover(imagem)
+    cache_variantes.remover(imagem)
+def indexar_produto(id_produto):
+    """Atualiza o produto no índice de busca (chamar após o commit e após invalidar_produto)."""
+    produto = buscar_produto(id_produto)  # O cache acabou de ser invalidado: lê a versão gravada
+    if produto is None:
+        indice_busca.remover(id_produto)
+    else:
+        indice_busca.atualizar(produto)
+def invalidar_produto(id_produto=None):
+    """Remove o produto do cache e descarta as páginas do catálogo (chamar após o commit)."""
+    if id_produto is not None:
+        cache_produtos.remover(int(id_produto))
+    cache_catalogo.limpar()
+    marcar_alteracao('PRODUTOS')
+versoes_falha_ate = 0.0  # Até quando não tentar ler as versões (monotonic)
+identidades_versao = None  # GEN_VERSAO_CADASTRO que o cache de identidades reflete
+identidades_conferido_em = 0.0  # Última leitura dessa versão (monotonic)
+def versoes_atuais(tabelas, cursor=None):
+    """
+    Versões atuais das tabelas (ver versoes.py), ou None se não der para ler (aí a rota responde sem ETag).
+    Sem `cursor`, empresta uma conexão do pool só para essa consulta.
+    """
+    global versoes_falha_ate
+    if time.monotonic() < versoes_falha_ate:
+        return None
+    con = None
+    if cursor is None:
+        con = pool.obter()
+    cur = cursor or con.cursor()
+    try:
+        versoes = ler_versoes(cur, tabelas)
+        if 'CADASTRO' in tabelas:
+            observar_versao_cadastro(versoes[tabelas.index('CADASTRO')])
+        return versoes
+    except fdb.DatabaseError as e:
+        versoes_falha_ate = time.monotonic() + VERSOES_RETENTAR
+        logging.warning(f"Versões das tabelas indisponíveis (sql/004 aplicado?): {str(e)}")
+        return None
+    finally:
+        if con is not None:
+            cur.close()
+            con.close()
+def marcar_alteracao(*tabelas, cursor=None):
+    """
+    Depois do commit: soma 1 na versão das tabelas alteradas, invalidando os ETags já enviados.
+    Com `cursor`, usa a conexão da rota (que já fez o commit) em vez de emprestar outra do pool.
+    """
+    if time.monotonic() < versoes_falha_ate:
+        return
+    con = None
+    if cursor is None:
+        con = pool.obter()
+    cur = cursor or con.cursor()
+    try:
+        incrementar_versoes(cur, tabelas)
+    except fdb.DatabaseError as e:
+        logging.warning(f"Falha ao marcar alteração em {', '.join(tabelas)}: {str(e)}")
+    finally:
+        if con is not None:
+            cur.close()
+            con.close()
+def condicional(*tabelas):
+    """
+    Decorator: ETag calculado da versão de `tabelas` + URL da requisição (ex: @condicional('VENDAS')).
+    Se o If-None-Match do cliente ainda bate, responde 304 sem executar a rota (nem a consulta principal).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            versoes = versoes_atuais(tabelas)
+            if versoes is None:
+                return func(*args, **kwargs)
+            etag = etag_versoes(versoes, request.full_path)
+            if request.if_none_match.contains_weak(etag):
+                resposta = Response(status=304)
+            else:
+                g.versoes = versoes  # Rotas com cache em memória usam na chave (ver lista_produtos)
+                resposta = make_response(func(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            resposta.set_etag(etag, weak=True)  # Fraco: o mesmo conteúdo pode sair com ou sem compressão
+            resposta.cache_control.no_cache = True  # O cliente pode guardar, mas sempre revalida
+            return resposta
+        return wrapper
+    return decorator
 def validar_senha(senha):
     """Valida se a senha atende aos requisitos mínimos."""
     # Senha deve ter pelo menos 8 caracteres, uma letra maiúscula, um número e um símbolo
@@ -44,16 +497,221 @@ def validar_senha(senha):
         and re.search(r'[0-9]', senha)
         and re.search(r'[\W_]', senha)
     )
-def generate_token(user_id, email):
-    """Gera token JWT com validade de 1 hora."""
+def generate_token(user_id, email, cargo=None):
+    """Gera token JWT com validade de 1 hora (o cargo vai no token para checagens sem banco)."""
     payload = {
         'user_id': user_id,
         'email': email,
+        'cargo': cargo,
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)  # Expira em 1 hora
     }
-    token = jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')  # Gera token JWT
+    token = jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')  # Gera token JWT
     # Retorna token no formato string (pyjwt retorna bytes em algumas versões)
     return token.decode('utf-8') if isinstance(token, bytes) else token
+def decodificar_token(token, chave=None):
+    """
+    Valida o token JWT e retorna as claims, ou None se for inválido/expirado.
+    Tokens válidos ficam em cache até expirarem, evitando validar a assinatura a cada requisição.
+    `chave`: SECRET_KEY de quem chama fora do app Flask (view_async.py); None = a do app Flask.
+    """
+    claims = cache_tokens.obter(token)
+    if claims is not None:
+        return claims
+    try:
+        # Token sem 'exp' é recusado (valeria para sempre)
+        claims = jwt.decode(token, chave or current_app.config['SECRET_KEY'], algorithms=['HS256'],
+                            options={"require": ["exp"]})
+    except jwt.InvalidTokenError:
+        return None
+    restante = claims.get('exp', 0) - datetime.datetime.now(datetime.timezone.utc).timestamp()
+    if restante > 0:
+        cache_tokens.guardar(token, claims, ttl=restante)  # Nunca fica no cache depois de expirar
+    return claims
+@api.before_app_request
+def carregar_usuario():
+    """
+    Lê o header 'Authorization: Bearer <token>' e guarda as claims em g.usuario.
+    Sem token (ou com token inválido) g.usuario fica None; rotas protegidas usam @token_obrigatorio.
+    """
+    g.usuario = claims_da_requisicao(request)
+def claims_da_requisicao(req, chave=None):
+    """Claims do token da requisição `req` (Flask ou Quart, com a `chave` do app), ou None."""
+    cabecalho = req.headers.get('Authorization', '')
+    if cabecalho.startswith('Bearer '):
+        return decodificar_token(cabecalho[7:].strip(), chave)
+    if req.endpoint in FEED_TOKEN_NA_QUERY and req.args.get('token'):
+        return decodificar_token(req.args['token'].strip(), chave)
+    return None
+def token_obrigatorio(*cargos):
+    """
+    Decorator: exige token JWT válido e, se informados, um dos cargos (ex: @token_obrigatorio('adm')).
+    A checagem usa o cargo que está no token, sem consultar o banco.
+    """
+    permitidos = {c.strip().lower() for c in cargos}
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if g.get('usuario') is None:
+                return jsonify({"error": "Token de acesso obrigatório"}), 401
+            cargo = (g.usuario.get('cargo') or '').strip().lower()
+            if permitidos and cargo not in permitidos:
+                return jsonify({"error": "Acesso não permitido para este cargo"}), 403
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+def cliente_autorizado(data):
+    """
+    E-mail do cliente de uma compra ou operação no carrinho (rotas com @token_obrigatorio()).
+    Sem email_cliente no JSON, vale o do token. Um e-mail diferente do token só é aceito de vendedor/adm
+    (atendimento em nome do cliente); de qualquer outro cargo a requisição é recusada.
+    Retorna (email, None) ou (None, resposta de erro).
+    """
+    email_token = g.usuario['email']
+    email_corpo = (data.get('email_cliente') or '').strip()
+    if not email_corpo or email_corpo == email_token:
+        return email_token, None
+    if (g.usuario.get('cargo') or '').strip().lower() in CARGOS_ATENDIMENTO:
+        return email_corpo, None
+    return None, (jsonify({"erro": "Sem permissão para operar em nome de outro cliente"}), 403)
+def cliente_do_feed(usuario):
+    """None para vendedor/adm (veem o feed inteiro); para os demais, o ID do token: só os eventos dele."""
+    if (usuario.get('cargo') or '').strip().lower() in CARGOS_ATENDIMENTO:
+        return None
+    return usuario['user_id']
+def identificar_usuario(cursor, email):
+    """
+    Retorna (id_cadastro, cargo) do e-mail, ou None se não existir.
+    Se o token da requisição é do mesmo e-mail e traz o cargo, responde sem consultar o banco.
+    Senão usa o cache de identidades (inclusive para e-mails inexistentes) e só consulta o banco na falha.
+    """
+    if not email:
+        return None
+    usuario = g.get('usuario')
+    if usuario and usuario.get('cargo') and email == usuario['email']:
+        return usuario['user_id'], usuario['cargo']
+
+    conferir_identidades(cursor)
+    identidade = identidade_em_cache(email)
+    if identidade is not AUSENTE:
+        return identidade
+    return identidade_no_banco(cursor, email)
+def observar_versao_cadastro(versao):
+    """
+    Esvazia o cache de identidades se GEN_VERSAO_CADASTRO mudou: pega as alterações feitas em outros
+    workers e fora do app (invalidar_identidade só alcança o cache do próprio worker).
+    Chamado por versoes_atuais() sempre que lê a versão do CADASTRO.
+    """
+    global identidades_versao, identidades_conferido_em
+    identidades_conferido_em = time.monotonic()
+    if versao != identidades_versao:
+        identidades_versao = versao
+        cache_identidades.limpar()
+def conferir_identidades(cursor):
+    """Lê a versão do CADASTRO se a última leitura tem mais de CACHE_IDENTIDADES_CONFERIR segundos."""
+    if time.monotonic() - identidades_conferido_em >= CACHE_IDENTIDADES_CONFERIR:
+        versoes_atuais(('CADASTRO',), cursor)
+def identidade_em_cache(email):
+    """(id_cadastro, cargo), None (e-mail inexistente em cache) ou AUSENTE (precisa consultar o banco)."""
+    return cache_identidades.obter(email, AUSENTE)
+def identidade_no_banco(cursor, email):
+    """
+    Consulta o e-mail no CADASTRO e guarda o resultado no cache de identidades (inclusive se não existir).
+    A chave é o e-mail exato, com a mesma comparação do WHERE EMAIL = ? (diferença de maiúsculas é outro e-mail).
+    """
+    versao = identidades_versao
+    cursor.execute("SELECT ID_CADASTRO, CARGO FROM CADASTRO WHERE EMAIL = ?", (email,))
+    row = cursor.fetchone()
+    identidade = (row[0], row[1]) if row else None
+    if versao != identidades_versao:
+        return identidade  # O cache foi esvaziado durante a consulta: o resultado pode já ser antigo
+    if row:
+        cache_identidades.guardar(email, identidade)
+    else:
+        cache_identidades.guardar(email, None, ttl=CACHE_IDENTIDADES_TTL_NEGATIVO)  # Cache negativo
+    return identidade
+def invalidar_identidade(*emails):
+    """Remove e-mails do cache de identidades deste worker (chamar após alterar o CADASTRO)."""
+    for email in emails:
+        if email:
+            cache_identidades.remover(email)
+def codificar_cursor(ultimo_id):
+    """Gera o token opaco de paginação a partir do último ID da página."""
+    return base64.urlsafe_b64encode(str(ultimo_id).encode()).decode().rstrip('=')
+def decodificar_cursor(token):
+    """Converte o token de paginação de volta no último ID (0 = primeira página)."""
+    if not token:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode())
+    except Exception:
+        raise ValueError("Cursor inválido")
+def filtros_periodo(coluna_id, coluna_data, args=None):
+    """
+    Lê data_inicio, data_fim e apos_id da query string (ou de `args`) e devolve (condicoes, valores) para o WHERE.
+    Lança ValueError se algum filtro for inválido.
+    """
+    args = request.args if args is None else args
+    condicoes, valores = [], []
+    if args.get('apos_id'):
+        condicoes.append(f"{coluna_id} > ?")
+        valores.append(int(args['apos_id']))
+    if args.get('data_inicio'):
+        condicoes.append(f"{coluna_data} >= ?")
+        valores.append(datetime.date.fromisoformat(args['data_inicio']))
+    if args.get('data_fim'):
+        # data_fim é inclusiva: tudo antes do início do dia seguinte
+        condicoes.append(f"{coluna_data} < ?")
+        valores.append(datetime.date.fromisoformat(args['data_fim']) + datetime.timedelta(days=1))
+    return condicoes, valores
+def resposta_stream(con, cursor, converter):
+    """
+    Envia o resultado de uma consulta já executada em streaming, lendo STREAM_LOTE linhas por vez.
+    Formato pela query string: formato=json (lista JSON, padrão) ou formato=ndjson (um objeto por linha).
+    O cursor e a conexão são fechados quando o envio termina.
+    """
+    ndjson = request.args.get('formato', 'json').lower() == 'ndjson'
+
+    def gerar():
+        try:
+            formatador = FormatadorStream(converter, ndjson)
+            while True:
+                linhas = cursor.fetchmany(STREAM_LOTE)
+                if not linhas:
+                    break
+                yield formatador.lote(linhas)
+            final = formatador.fim()
+            if final:
+                yield final
+        finally:
+            cursor.close()
+            con.close()
+
+    return Response(stream_with_context(gerar()), mimetype=formatador_mimetype(ndjson))
+class FormatadorStream:
+    """Transforma lotes de linhas em pedaços de uma lista JSON ou de NDJSON (um objeto por linha)."""
+
+    def __init__(self, converter, ndjson):
+        self.converter = converter
+        self.ndjson = ndjson
+        self.separador = '' if ndjson else '['  # O primeiro item abre a lista JSON
+
+    def lote(self, linhas):
+        partes = []
+        for linha in linhas:
+            if self.ndjson:
+                partes.append(json.dumps(self.converter(linha), ensure_ascii=False) + '\n')
+            else:
+                partes.append(self.separador + json.dumps(self.converter(linha), ensure_ascii=False))
+                self.separador = ','
+        return ''.join(partes)
+
+    def fim(self):
+        if self.ndjson:
+            return ''
+        return ']' if self.separador == ',' else '[]'
+def formatador_mimetype(ndjson):
+    return 'application/x-ndjson' if ndjson else 'application/json'
 def dict_from_row(cursor, row):
     """Converte uma linha SQL em dicionário."""
     columns = [col[0].lower() for col in cursor.description]  # Obtém nomes das colunas
@@ -61,7 +719,66 @@ def dict_from_row(cursor, row):
 # ----------------------------------------------
 # 🖼 ROTA PARA SERVIR IMAGENS
 # ----------------------------------------------
-@app.route('/static/imagens/<filename>')
+def enviar_imagem(diretorio, filename):
+    """
+    Envia um arquivo de imagem com ETag forte, respostas 304 (If-None-Match) e 206 (Range).
+    - Nomes com hash do conteúdo nunca mudam: Cache-Control 'immutable' por 1 ano.
+    - Demais arquivos podem ser sobrescritos: o navegador sempre revalida (no-cache).
+    Arquivos pequenos ficam em memória (LRU limitado em bytes) para não ler o disco a cada acesso.
+    """
+    caminho = safe_join(os.path.abspath(diretorio), filename)  # Bloqueia '../' no nome
+    if caminho is None:
+        return jsonify({"erro": "Arquivo não encontrado"}), 404
+    imutavel = bool(IMAGEM_COM_HASH.match(os.path.basename(filename)))
+
+    # Arquivo com hash no nome não muda: nem precisa ler o disco para validar o cache, mas pode ter sido
+    # apagado (imagem descartada, por este ou por outro worker): confere se ainda existe
+    chave = caminho
+    if not imutavel:
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return jsonify({"erro": "Arquivo não encontrado"}), 404
+        chave = (caminho, info.st_mtime_ns, info.st_size)
+    item = cache_arquivos.obter(chave)
+    if item is not None and imutavel and not os.path.exists(caminho):
+        cache_arquivos.remover(chave)
+        return jsonify({"erro": "Arquivo não encontrado"}), 404
+
+    if item is None:
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return jsonify({"erro": "Arquivo não encontrado"}), 404
+        if imutavel:
+            etag = os.path.splitext(os.path.basename(filename))[0]  # O próprio hash do conteúdo
+        else:
+            etag = f"{info.st_mtime_ns:x}-{info.st_size:x}"
+        if info.st_size > IMAGENS_CACHE_ARQUIVO_MAX:
+            # Arquivo grande: o send_file já trata 304 e Range lendo direto do disco
+            resposta = send_file(caminho, conditional=True, etag=etag)
+            return definir_cache_imagem(resposta, imutavel)
+        with open(caminho, 'rb') as f:
+            item = (f.read(), etag)
+        cache_arquivos.guardar(chave, item, peso=len(item[0]))
+
+    conteudo, etag = item
+    mimetype = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+    resposta = Response(conteudo, mimetype=mimetype)
+    resposta.set_etag(etag)
+    # Responde 304 se o ETag bate e 206 se o cliente pediu só um pedaço (Range)
+    resposta = resposta.make_conditional(request, accept_ranges=True, complete_length=len(conteudo))
+    return definir_cache_imagem(resposta, imutavel)
+def definir_cache_imagem(resposta, imutavel):
+    """Aplica a política de Cache-Control das imagens."""
+    if imutavel:
+        resposta.cache_control.public = True
+        resposta.cache_control.max_age = IMAGENS_MAX_AGE_IMUTAVEL
+        resposta.cache_control.immutable = True
+    else:
+        resposta.cache_control.no_cache = True  # Pode usar o cache, mas revalida com o ETag
+    return resposta
+@api.route('/static/imagens/<path:filename>')
 def imagens(filename):
     """
      GET /static/imagens/<filename>
@@ -69,19 +786,54 @@ def imagens(filename):
     Parâmetro:
         - filename: nome do arquivo.
     Retorna:
-        - A imagem requisitada.
+        - A imagem requisitada (com ETag, 304 e Range).
     """
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return enviar_imagem(UPLOAD_FOLDER, filename)
     # Retorna arquivo da pasta configurada para download ou visualização no navegador
 
-@app.route('/uploads/<path:filename>')
+@api.route('/uploads/<path:filename>')
 def serve_image(filename):
-    directory = os.path.join(app.root_path, 'static', 'imagens', 'produto')
-    return send_from_directory(directory, filename)
+    directory = os.path.join(UPLOAD_FOLDER, 'produto')
+    return enviar_imagem(directory, filename)
+@api.route('/pool/stats', methods=['GET'])
+@token_obrigatorio('adm', 'administrador')
+def pool_stats():
+    """
+     GET /pool/stats
+    Retorna as estatísticas do pool de conexões (em uso, ociosas, espera, conexões/s).
+    """
+    return jsonify(pool.estatisticas())
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """
+     GET /metrics
+    Métricas do processo no formato texto do Prometheus (latência por rota, SQL, pool e caches).
+    """
+    if METRICAS_TOKEN and request.headers.get('Authorization', '') != f"Bearer {METRICAS_TOKEN}":
+        return jsonify({"error": "Token de métricas inválido"}), 401
+    return Response(metricas.texto(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+@api.route('/cache/stats', methods=['GET'])
+@token_obrigatorio('adm', 'administrador')
+def cache_stats():
+    """
+     GET /cache/stats
+    Retorna acertos, falhas e descartes dos caches em memória.
+    """
+    return jsonify({
+        'produtos': cache_produtos.estatisticas(),
+        'catalogo': cache_catalogo.estatisticas(),
+        'relatorios': cache_relatorios.estatisticas(),
+        'tokens': cache_tokens.estatisticas(),
+        'identidades': cache_identidades.estatisticas(),
+        'arquivos': cache_arquivos.estatisticas(),
+        'variantes': cache_variantes.estatisticas(),
+        'busca': indice_busca.estatisticas(),
+    })
 # ============================================================
 #  ROTAS DE USUÁRIOS
 # ============================================================
-@app.route('/cadastro', methods=['GET'])
+@api.route('/cadastro', methods=['GET'])
+@condicional('CADASTRO')
 def lista_usuario():
     """
     👥 GET /cadastro
@@ -96,7 +848,7 @@ def lista_usuario():
     cur.close()
     con.close()
     return jsonify({'mensagem': 'Lista de usuários', 'cadastro': usuarios})  # Retorna JSON com usuários
-@app.route('/cadastro', methods=['POST'])
+@api.route('/cadastro', methods=['POST'])
 def criar_usuario():
     """
     📝 POST /cadastro
@@ -125,16 +877,18 @@ def criar_usuario():
         con.close()
         return jsonify({"error": "Usuário já cadastrado"}), 400
 
-    senha_hash = generate_password_hash(senha, method='pbkdf2:sha256')  # Cria hash da senha para segurança
+    senha_hash = servico_hash.gerar(senha)  # Cria hash da senha para segurança (fora da thread da requisição)
     cursor.execute("""
         INSERT INTO CADASTRO (NOME, EMAIL, CARGO, SENHA, ATIVO)
         VALUES (?, ?, ?, ?, ?)
     """, (nome, email, cargo, senha_hash, 1))  # Insere novo usuário com status ativo=1
     con.commit()
+    marcar_alteracao('CADASTRO', cursor=cursor)
     cursor.close()
     con.close()
+    invalidar_identidade(email)  # Descarta um possível "não existe" guardado em cache
     return jsonify({'mensagem': 'Usuário cadastrado com sucesso!'}), 201  # Resposta de criação ok
-@app.route('/edit_cadastro', methods=['PUT'])
+@api.route('/edit_cadastro', methods=['PUT'])
 def editar_usuario():
     """
     ✏️ PUT /edit_cadastro
@@ -157,11 +911,13 @@ def editar_usuario():
 
     con = get_db_connection()
     cursor = con.cursor()
-    cursor.execute("SELECT ID_CADASTRO FROM CADASTRO WHERE ID_CADASTRO = ?", (id_cadastro,))  # Verifica se usuário existe
-    if not cursor.fetchone():
+    cursor.execute("SELECT EMAIL FROM CADASTRO WHERE ID_CADASTRO = ?", (id_cadastro,))  # Verifica se usuário existe
+    row = cursor.fetchone()
+    if not row:
         cursor.close()
         con.close()
         return jsonify({"error": "Usuário não encontrado"}), 404
+    email_atual = row[0]  # Usado para limpar o cache de identidades
 
     campos, valores = [], []
     # Percorre campos que podem ser atualizados e prepara a query
@@ -171,7 +927,7 @@ def editar_usuario():
             if campo == "senha":
                 if not validar_senha(valor):
                     return jsonify({"error": "Senha inválida"}), 400
-                valor = generate_password_hash(valor, method='pbkdf2:sha256')  # Atualiza senha com hash
+                valor = servico_hash.gerar(valor)  # Atualiza senha com hash
             campos.append(f"{campo.upper()} = ?")
             valores.append(valor)
 
@@ -182,10 +938,12 @@ def editar_usuario():
     sql = f"UPDATE CADASTRO SET {', '.join(campos)} WHERE ID_CADASTRO = ?"
     cursor.execute(sql, tuple(valores))  # Executa atualização no banco
     con.commit()
+    marcar_alteracao('CADASTRO', cursor=cursor)
     cursor.close()
     con.close()
+    invalidar_identidade(email_atual, data.get('email'))  # E-mail antigo e novo (se mudou)
     return jsonify({"mensagem": "Cadastro atualizado com sucesso!"}), 200
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
     """
      POST /login
@@ -198,10 +956,17 @@ def login():
     Retorna:
         - Dados do usuário e token JWT.
     """
+    con = cursor = None
     try:
         data = request.get_json(force=True)
         email, senha = data.get('email'), data.get('senha')
 
+        # Limite de tentativas por IP (antes de qualquer acesso ao banco)
+        chave_ip = f"ip:{request.remote_addr}"
+        if tentativas_ip.registrar(chave_ip) > LOGIN_LIMITE_IP:
+            return jsonify({"error": "Muitas tentativas de login. Tente novamente em instantes."}), 429, \
+                {'Retry-After': str(LOGIN_JANELA_IP)}
+
         con = get_db_connection()
         cursor = con.cursor()
         cursor.execute("""
@@ -218,10 +983,15 @@ def login():
         if int(usuario['ativo']) == 0:
             return jsonify({"error": "Conta inativa"}), 403
 
-        if check_password_hash(usuario['senha'], senha):  # Verifica senha
-            cursor.execute("UPDATE CADASTRO SET TENTATIVAS_LOGIN = 0 WHERE ID_CADASTRO = ?", (usuario['id_cadastro'],))
-            con.commit()
-            token = generate_token(usuario['id_cadastro'], email)  # Gera token JWT
+        chave_email = f"email:{email.strip().lower()}"
+        if servico_hash.verificar(usuario['senha'], senha):  # Verifica senha
+            falhas_login.limpar(chave_email)  # Zera as falhas do e-mail (sem falhas, é só uma leitura no backend)
+            if servico_hash.precisa_rehash(usuario['senha']):
+                # Hash antigo (outro método/iterações): aproveita a senha correta para atualizar
+                cursor.execute("UPDATE CADASTRO SET SENHA = ? WHERE ID_CADASTRO = ?",
+                               (servico_hash.gerar(senha), usuario['id_cadastro']))
+                con.commit()
+            token = generate_token(usuario['id_cadastro'], email, usuario['cargo'])  # Gera token JWT
             return jsonify({
                 "mensagem": "Login realizado com sucesso!",
                 "id_cadastro": usuario['id_cadastro'],
@@ -230,18 +1000,18 @@ def login():
                 "token": token
             }), 200
         else:
-            # Incrementa tentativas de login e bloqueia após 3
-            novas_tentativas = (usuario.get('tentativas_login') or 0) + 1
-            if novas_tentativas >= 3:
+            # Conta as falhas em memória e só grava no banco quando bloqueia
+            novas_tentativas = falhas_login.registrar(chave_email)
+            if novas_tentativas >= LOGIN_MAX_TENTATIVAS:
                 cursor.execute("UPDATE CADASTRO SET TENTATIVAS_LOGIN = ?, ATIVO = 0 WHERE ID_CADASTRO = ?",
                                (novas_tentativas, usuario['id_cadastro']))
                 con.commit()
-                return jsonify({"error": "Conta bloqueada após 3 tentativas"}), 403
+                marcar_alteracao('CADASTRO', cursor=cursor)  # ATIVO mudou: GET /cadastro muda
+                falhas_login.limpar(chave_email)  # A conta fica bloqueada no banco até ser reativada
+                return jsonify({"error": f"Conta bloqueada após {LOGIN_MAX_TENTATIVAS} tentativas"}), 403
             else:
-                cursor.execute("UPDATE CADASTRO SET TENTATIVAS_LOGIN = ? WHERE ID_CADASTRO = ?",
-                               (novas_tentativas, usuario['id_cadastro']))
-                con.commit()
-                return jsonify({"error": f"Senha incorreta. {3 - novas_tentativas} tentativa(s) restante(s)."}), 401
+                restantes = LOGIN_MAX_TENTATIVAS - novas_tentativas
+                return jsonify({"error": f"Senha incorreta. {restantes} tentativa(s) restante(s)."}), 401
 
     except Exception as e:
         logging.error(f"Erro no login: {str(e)}")  # Log de erros no servidor
@@ -253,22 +1023,123 @@ def login():
 # ============================================================
 # 🛍 ROTAS DE PRODUTOS (CRUD COMPLETO)
 # ============================================================
-@app.route('/produtos', methods=['GET'])
+@api.route('/produtos', methods=['GET'])
+@condicional('PRODUTOS')
 def lista_produtos():
     """
      GET /produtos
-    Retorna todos os produtos cadastrados.
+    Retorna os produtos em páginas, ordenados por ID (paginação por cursor).
+    Parâmetros (query string, todos opcionais):
+        - limite: itens por página (padrão 50, máximo 200)
+        - cursor: valor de next_cursor devolvido pela página anterior
+        - marca, acabamento, id_vendedor: filtros exatos
+        - preco_min, preco_max: faixa de preço
+        - fields: colunas desejadas separadas por vírgula (ex: id,nome,preco,imagem)
     Retorna:
-        - Lista de produtos (JSON)
+        - Lista de produtos (JSON) e next_cursor (null na última página)
     """
-    con = get_db_connection()
-    cursor = con.cursor()
-    cursor.execute("SELECT ID, NOME, DESCRICAO, MARCA, PRECO, ACABAMENTO, IMAGEM, ID_VENDEDOR FROM PRODUTOS")
+    try:
+        consulta = consulta_catalogo(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Páginas já montadas saem direto da memória (desde que a tabela não tenha mudado em outro worker)
+    pagina = cache_catalogo.obter((consulta, g.get('versoes')))
+    if pagina is None:
+        con = get_db_connection()
+        cursor = con.cursor()
+        pagina = ler_pagina_catalogo(cursor, consulta, g.get('versoes'))
+        cursor.close()
+        con.close()
+    produtos, next_cursor = pagina
+    return jsonify({'mensagem': 'Lista de produtos', 'produtos': produtos, 'next_cursor': next_cursor})
+def consulta_catalogo(args):
+    """
+    Lê limite, cursor, filtros e fields da query string de GET /produtos.
+    Retorna (colunas, condicoes, valores, limite), que também serve de chave do cache do catálogo.
+    Lança ValueError com a mensagem de erro para o cliente.
+    """
+    try:
+        limite = int(args.get('limite', PRODUTOS_LIMITE_PADRAO))
+        ultimo_id = decodificar_cursor(args.get('cursor'))
+        preco_min = float(args['preco_min']) if args.get('preco_min') else None
+        preco_max = float(args['preco_max']) if args.get('preco_max') else None
+        id_vendedor = int(args['id_vendedor']) if args.get('id_vendedor') else None
+    except ValueError:
+        raise ValueError("Parâmetros de paginação ou filtro inválidos")
+    limite = max(1, min(limite, PRODUTOS_LIMITE_MAX))  # Limite imposto pelo servidor
+
+    # Projeção: só as colunas pedidas (ID sempre vem, pois é a chave do cursor)
+    if args.get('fields'):
+        pedidas = [c.strip().upper() for c in args['fields'].split(',') if c.strip()]
+        invalidas = [c for c in pedidas if c not in PRODUTOS_COLUNAS]
+        if invalidas:
+            raise ValueError(f"Campos inválidos: {', '.join(invalidas).lower()}")
+        colunas = ['ID'] + [c for c in pedidas if c != 'ID']
+    else:
+        colunas = list(PRODUTOS_COLUNAS)
+
+    # Monta o WHERE só com os filtros enviados
+    condicoes, valores = ["ID > ?"], [ultimo_id]
+    for campo, valor in (("MARCA", args.get('marca')), ("ACABAMENTO", args.get('acabamento')),
+                         ("ID_VENDEDOR", id_vendedor)):
+        if valor is not None and valor != '':
+            condicoes.append(f"{campo} = ?")
+            valores.append(valor)
+    if preco_min is not None:
+        condicoes.append("PRECO >= ?")
+        valores.append(preco_min)
+    if preco_max is not None:
+        condicoes.append("PRECO <= ?")
+        valores.append(preco_max)
+    return tuple(colunas), tuple(condicoes), tuple(valores), limite
+def ler_pagina_catalogo(cursor, consulta, versoes=None):
+    """
+    Executa a consulta de consulta_catalogo(), guarda a página no cache e retorna (produtos, next_cursor).
+    `versoes` (da tabela PRODUTOS, quando conhecidas) entram na chave do cache.
+    """
+    colunas, condicoes, valores, limite = consulta
+    # Busca um item a mais para saber se existe próxima página
+    cursor.execute(
+        f"SELECT FIRST {limite + 1} {', '.join(colunas)} FROM PRODUTOS "
+        f"WHERE {' AND '.join(condicoes)} ORDER BY ID",
+        valores
+    )
     produtos = [dict_from_row(cursor, p) for p in cursor.fetchall()]  # Transforma resultados em lista de dicionários
-    cursor.close()
-    con.close()
-    return jsonify({'mensagem': 'Lista de produtos', 'produtos': produtos})
-@app.route('/produto/<int:id>', methods=['GET'])
+
+    if 'IMAGEM' in colunas:
+        for produto in produtos:
+            produto['variantes'] = variantes_imagem(produto['imagem'])  # Listas usam a thumb
+
+    next_cursor = None
+    if len(produtos) > limite:
+        produtos = produtos[:limite]
+        next_cursor = codificar_cursor(produtos[-1]['id'])
+    cache_catalogo.guardar((consulta, versoes), (produtos, next_cursor))
+    return produtos, next_cursor
+@api.route('/produtos/busca', methods=['GET'])
+def buscar_produtos_texto():
+    """
+     GET /produtos/busca?q=<texto>&limite=<n>
+    Busca produtos por NOME, MARCA e DESCRICAO, sem diferenciar acentos e maiúsculas.
+    Cada palavra pode ser só o começo (autocompletar): 'pastil bos' encontra 'Pastilha de freio Bosch'.
+    Responde do índice em memória, sem consultar o banco.
+    Retorna:
+        - total de produtos encontrados e os mais relevantes (id, nome, marca, preco, imagem)
+    """
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({"error": "Parâmetro 'q' obrigatório"}), 400
+    try:
+        limite = max(1, min(int(request.args.get('limite', BUSCA_LIMITE_PADRAO)), BUSCA_LIMITE_MAX))
+    except ValueError:
+        return jsonify({"error": "Parâmetro 'limite' inválido"}), 400
+    if not indice_busca.pronto:
+        return jsonify({"error": "Índice de busca carregando, tente novamente"}), 503, {'Retry-After': '2'}
+
+    total, produtos = indice_busca.buscar(q, limite)
+    return jsonify({'mensagem': 'Resultado da busca', 'q': q, 'total': total, 'produtos': produtos})
+@api.route('/produto/<int:id>', methods=['GET'])
 def buscar_produto_id(id):
     """
     🔍 GET /produto/<id>
@@ -276,18 +1147,18 @@ def buscar_produto_id(id):
     Retorna:
         - Dados do produto ou erro se não encontrado.
     """
-    con = get_db_connection()
-    cursor = con.cursor()
-    cursor.execute("SELECT ID, NOME, DESCRICAO, PRECO, MARCA, IMAGEM FROM PRODUTOS WHERE ID = ?", (id,))
-    row = cursor.fetchone()
-    cursor.close()
-    con.close()
-
-    if not row:
+    produto = buscar_produto(id)  # Lê da memória; só consulta o banco se não estiver em cache
+    if not produto:
         return jsonify({'erro': 'Produto não encontrado'}), 404
 
-    return jsonify({'mensagem': 'Produto encontrado', 'produto': dict_from_row(cursor, row)}), 200
-@app.route('/produto', methods=['POST'])
+    return jsonify({'mensagem': 'Produto encontrado', 'produto': detalhe_produto(produto)}), 200
+def detalhe_produto(produto):
+    """Campos do produto devolvidos por GET /produto/<id>, com as variantes da imagem."""
+    campos = ('id', 'nome', 'descricao', 'preco', 'marca', 'imagem')
+    resposta = {c: produto[c] for c in campos}
+    resposta['variantes'] = variantes_imagem(produto['imagem'])  # thumb/medium/full em WebP e JPEG
+    return resposta
+@api.route('/produto', methods=['POST'])
 def criar_produto():
     """
     POST /produto
@@ -310,6 +1181,10 @@ def criar_produto():
         return jsonify({"erro": "O campo 'nome' é obrigatório."}), 400
     if not preco:
         return jsonify({"erro": "O campo 'preco' é obrigatório."}), 400
+    try:
+        preco = float(preco)  # Numérico como a coluna: o índice de busca filtra e ordena por ele
+    except ValueError:
+        return jsonify({"erro": "O campo 'preco' deve ser numérico."}), 400
     if not id_vendedor:
         return jsonify({"erro": "O campo 'id_vendedor' é obrigatório."}), 400
 
@@ -331,23 +1206,20 @@ def criar_produto():
     """, (nome, descricao, preco, acabamento, marca, id_vendedor))
     produto_id = cursor.fetchone()[0]
 
-    # Salva imagem (se houver)
+    # Salva imagem (se houver); as variantes são geradas em segundo plano
     if file and allowed_file(file.filename):
-        extensao = os.path.splitext(file.filename)[1]
-        nome_imagem = f"{produto_id}{extensao}"
-        pasta_destino = os.path.join(app.config['UPLOAD_FOLDER'], "produto")
-        os.makedirs(pasta_destino, exist_ok=True)
-        caminho = os.path.join(pasta_destino, nome_imagem).replace("\\", "/")
-        file.save(caminho)
-        imagem = f"produto/{nome_imagem}"
+        imagem = salvar_imagem_produto(file, produto_id)
         cursor.execute("UPDATE PRODUTOS SET IMAGEM = ? WHERE ID = ?", (imagem, produto_id))
 
     con.commit()
     cursor.close()
     con.close()
+    invalidar_produto()  # Novo produto: as páginas do catálogo ficam desatualizadas
+    indice_busca.atualizar({'id': produto_id, 'nome': nome, 'descricao': descricao, 'marca': marca,
+                            'preco': preco, 'imagem': imagem})
 
     return jsonify({'mensagem': 'Produto cadastrado com sucesso!', 'produto_id': produto_id}), 201
-@app.route('/produto/edit/<int:id>', methods=['PUT'])
+@api.route('/produto/edit/<int:id>', methods=['PUT'])
 def editar_produto(id):
     """
     Atualiza informações de um produto existente.
@@ -362,11 +1234,13 @@ def editar_produto(id):
         con = get_db_connection()
         cursor = con.cursor()
 
-        cursor.execute("SELECT ID FROM PRODUTOS WHERE ID = ?", (id_produto,))  # Verifica existência do produto
-        if not cursor.fetchone():
+        cursor.execute("SELECT IMAGEM FROM PRODUTOS WHERE ID = ?", (id_produto,))  # Verifica existência do produto
+        row = cursor.fetchone()
+        if not row:
             cursor.close()
             con.close()
             return jsonify({"error": "Produto não encontrado"}), 404
+        imagem_antiga, imagem = row[0], None
 
         campos, valores = [], []
         # Campos passíveis de atualização via form-data
@@ -378,13 +1252,7 @@ def editar_produto(id):
 
         file = request.files.get('imagem')
         if file and allowed_file(file.filename):  # Se nova imagem enviada e válida, salva e atualiza campo
-            extensao = os.path.splitext(file.filename)[1]
-            nome_imagem = f"{id_produto}{extensao}"
-            pasta_destino = os.path.join(app.config['UPLOAD_FOLDER'], "produto")
-            os.makedirs(pasta_destino, exist_ok=True)
-            caminho = os.path.join(pasta_destino, nome_imagem).replace("\\", "/")
-            file.save(caminho)
-            imagem = f"produto/{nome_imagem}"
+            imagem = salvar_imagem_produto(file, id_produto)
             campos.append("IMAGEM = ?")
             valores.append(imagem)
 
@@ -395,15 +1263,19 @@ def editar_produto(id):
         sql = f"UPDATE PRODUTOS SET {', '.join(campos)} WHERE ID = ?"
         cursor.execute(sql, tuple(valores))  # Atualiza o produto no banco
         con.commit()
+        if imagem and imagem != imagem_antiga:
+            descartar_imagem(cursor, imagem_antiga)  # Arquivos da imagem anterior não são mais usados
 
         cursor.close()
         con.close()
+        invalidar_produto(id_produto)
+        indexar_produto(id_produto)
         return jsonify({"mensagem": "Produto atualizado com sucesso!"}), 200
 
     except Exception as e:
         logging.error(f"Erro ao atualizar produto: {str(e)}")
         return jsonify({"error": "Erro interno no servidor"}), 500
-@app.route('/produto/imagem/edit/<int:id>', methods=['PUT'])
+@api.route('/produto/imagem/edit/<int:id>', methods=['PUT'])
 def editar_imagem_produto(id):
     """
     ✏️ PUT /produto/imagem/edit/<id>
@@ -420,28 +1292,26 @@ def editar_imagem_produto(id):
     con = get_db_connection()
     cursor = con.cursor()
 
-    cursor.execute("SELECT ID FROM PRODUTOS WHERE ID = ?", (id,))
-    if not cursor.fetchone():
+    cursor.execute("SELECT IMAGEM FROM PRODUTOS WHERE ID = ?", (id,))
+    row = cursor.fetchone()
+    if not row:
         cursor.close()
         con.close()
         return jsonify({"error": "Produto não encontrado"}), 404
 
-    extensao = os.path.splitext(file.filename)[1]  # Pega extensão original
-    nome_imagem = f"{id}{extensao}"  # Nomeia arquivo imagem com ID do produto
-    pasta_destino = os.path.join(app.config['UPLOAD_FOLDER'], "produto")
-    os.makedirs(pasta_destino, exist_ok=True)
-    caminho = os.path.join(pasta_destino, nome_imagem).replace("\\", "/")
-    file.save(caminho)  # Salva imagem no servidor
-
-    imagem = f"produto/{nome_imagem}"  # Caminho relativo para banco
+    imagem = salvar_imagem_produto(file, id)  # Salva com nome pelo hash do conteúdo (caminho relativo para banco)
     cursor.execute("UPDATE PRODUTOS SET IMAGEM = ? WHERE ID = ?", (imagem, id))  # Atualiza registro do produto
     con.commit()
+    if imagem != row[0]:
+        descartar_imagem(cursor, row[0])  # Arquivos da imagem anterior não são mais usados
 
     cursor.close()
     con.close()
+    invalidar_produto(id)
+    indexar_produto(id)
 
     return jsonify({"mensagem": "Imagem do produto atualizada com sucesso!"}), 200
-@app.route('/produto/<int:id>', methods=['DELETE'])
+@api.route('/produto/<int:id>', methods=['DELETE'])
 def remover_produto(id):
     """
     🗑️ DELETE /produto/<id>
@@ -451,25 +1321,35 @@ def remover_produto(id):
     """
     con = get_db_connection()
     cursor = con.cursor()
-    cursor.execute("SELECT ID FROM PRODUTOS WHERE ID = ?", (id,))
-    if not cursor.fetchone():
+    cursor.execute("SELECT IMAGEM FROM PRODUTOS WHERE ID = ?", (id,))
+    row = cursor.fetchone()
+    if not row:
         cursor.close()
         con.close()
         return jsonify({"error": "Produto não encontrado"}), 404
 
     cursor.execute("DELETE FROM PRODUTOS WHERE ID = ?", (id,))
     con.commit()
+    descartar_imagem(cursor, row[0])
     cursor.close()
     con.close()
+    invalidar_produto(id)
+    indice_busca.remover(id)
     return jsonify({"mensagem": "Produto removido com sucesso!"}), 200
 # ============================================================
 # 💸 ROTAS DE VENDAS E CASHBACK
 # ============================================================
-@app.route('/vendas', methods=['GET'])
+@api.route('/vendas', methods=['GET'])
+@condicional('VENDAS')
 def listar_vendas():
     """
     📈 GET /vendas
-    Lista todas as vendas registradas.
+    Lista as vendas registradas (mais recentes primeiro), enviando em streaming.
+
+    Parâmetros (query string, opcionais):
+    - data_inicio / data_fim: período da venda (AAAA-MM-DD, inclusivo)
+    - apos_id: só vendas com ID maior que este (para buscar apenas as novas)
+    - formato: "json" (lista, padrão) ou "ndjson" (uma venda por linha)
 
     Retorna:
     - ID da venda
@@ -480,93 +1360,104 @@ def listar_vendas():
     - Valor total da venda
     - Data da venda
     """
+    try:
+        condicoes, valores = filtros_periodo("ID_VENDA", "DATA_VENDA")
+    except ValueError:
+        return jsonify({"erro": "Filtros inválidos (use AAAA-MM-DD e apos_id numérico)"}), 400
+
     con = get_db_connection()  # Conecta ao banco de dados
     cursor = con.cursor()
 
-    cursor.execute("""
+    # Ordena pelas vendas mais recentes
+    cursor.execute(sql_vendas(condicoes), tuple(valores))
+    return resposta_stream(con, cursor, venda_para_dict)  # Lista de vendas em JSON, sem carregar tudo na memória
+def sql_vendas(condicoes):
+    return f"""
         SELECT ID_VENDA, ID_PRODUTO, ID_CLIENTE, ID_VENDEDOR, QUANTIDADE, VALOR_TOTAL, DATA_VENDA
         FROM VENDAS
-        ORDER BY ID_VENDA DESC 
-    """)
-
-    # Ordena pelas vendas mais recentes
-
-    vendas = cursor.fetchall()  # Pega todas as vendas no banco
-
-    cursor.close()  # Fecha o cursor
-    con.close()  # Fecha a conexão com o banco
-
-    # Monta a resposta com os dados de cada venda
-    resultado = []
-    for v in vendas:
-        resultado.append({
-            "id_venda": v[0],
-            "id_produto": v[1],
-            "id_cliente": v[2],
-            "id_vendedor": v[3],
-            "quantidade": v[4],
-            "valor_total": float(v[5]),
-            "data_venda": str(v[6])  # Formata a data para string
-        })
-
-    return jsonify(resultado)  # Retorna a lista de vendas em formato JSON
-@app.route('/venda', methods=['POST'])
+        {'WHERE ' + ' AND '.join(condicoes) if condicoes else ''}
+        ORDER BY ID_VENDA DESC
+    """
+def venda_para_dict(v):
+    """Monta cada venda conforme as linhas chegam do banco."""
+    return {
+        "id_venda": v[0],
+        "id_produto": v[1],
+        "id_cliente": v[2],
+        "id_vendedor": v[3],
+        "quantidade": v[4],
+        "valor_total": float(v[5]),
+        "data_venda": str(v[6])  # Formata a data para string
+    }
+@api.route('/venda', methods=['POST'])
+@token_obrigatorio()
 def registrar_venda():
     """
     💵 POST /venda
-    Registra uma venda e gera automaticamente o cashback (5%).
+    Registra uma venda e gera automaticamente o cashback (5%) para o cliente do token.
+    O preço vem do cadastro de produtos, lido na mesma transação da venda (não do cliente).
 
     JSON esperado:
     {
-        "email_cliente": "cliente@teste.com",   # E-mail do cliente
+        "email_cliente": "cliente@teste.com",   # Opcional: só vendedor/adm vendem em nome de outro cliente
         "id_produto": 1,                        # ID do produto a ser vendido
-        "quantidade": 2,                        # Quantidade do produto
-        "valor_unitario": 50.00                 # Preço unitário do produto
+        "quantidade": 2                         # Quantidade do produto
     }
     """
     data = request.get_json()
 
-    # Extrai os dados enviados
-    email_cliente = data.get('email_cliente')
+    # Extrai os dados enviados (o cliente vem do token)
+    email_cliente, negado = cliente_autorizado(data or {})
+    if negado:
+        return negado
     id_produto = data.get('id_produto')
-    quantidade = int(data.get('quantidade', 1))
-    valor_unitario = float(data.get('valor_unitario', 0))
+    try:
+        quantidade = int(data.get('quantidade', 1))
+    except (TypeError, ValueError):
+        quantidade = 0
 
     # 🟢 Define o vendedor automaticamente (sem pedir no HTML)
-    email_vendedor = 'vendedor@gmail.com'
+    email_vendedor = VENDEDOR_PADRAO_EMAIL
 
     # Verifica se os campos obrigatórios foram fornecidos
-    if not data or not all([email_cliente, id_produto, valor_unitario]):
+    if not data or not all([email_cliente, id_produto]):
         return jsonify({
             "erro": "Campos obrigatórios ausentes",
             "json_recebido": data
         }), 400
+    if quantidade < 1:
+        return jsonify({"erro": "Quantidade deve ser um inteiro maior que zero"}), 400
 
     con = get_db_connection()
     cursor = con.cursor()
 
     try:
-        # 🔹 Busca cliente no banco
-        cursor.execute("SELECT ID_CADASTRO, CARGO FROM CADASTRO WHERE EMAIL = ?", (email_cliente,))
-        row_cliente = cursor.fetchone()
+        # 🔹 Busca cliente (pelo token, ou no banco se não houver token do cliente)
+        row_cliente = identificar_usuario(cursor, email_cliente)
         if not row_cliente:
             return jsonify({"erro": "Cliente não encontrado"}), 404
         if row_cliente[1].strip().lower() != "cliente":
             return jsonify({"erro": f"O e-mail '{email_cliente}' não pertence a um CLIENTE"}), 400
         id_cliente = row_cliente[0]
 
-        # 🔹 Busca vendedor padrão no banco
-        cursor.execute("SELECT ID_CADASTRO, CARGO FROM CADASTRO WHERE EMAIL = ?", (email_vendedor,))
-        row_vendedor = cursor.fetchone()
+        # 🔹 Busca vendedor padrão (cache de identidades)
+        row_vendedor = identificar_usuario(cursor, email_vendedor)
         if not row_vendedor:
             return jsonify({"erro": "Vendedor padrão não encontrado no banco"}), 404
         if row_vendedor[1].strip().lower() != "vendedor":
             return jsonify({"erro": f"O e-mail '{email_vendedor}' não pertence a um VENDEDOR"}), 400
         id_vendedor = row_vendedor[0]
 
+        # 🔹 Preço atual do produto: o cashback (e o resgate dele) nunca parte de um valor enviado pelo cliente
+        cursor.execute("SELECT PRECO FROM PRODUTOS WHERE ID = ?", (id_produto,))
+        row_produto = cursor.fetchone()
+        if not row_produto:
+            return jsonify({"erro": "Produto não encontrado"}), 404
+        valor_unitario = float(row_produto[0])
+
         # 🔹 Calcula valores
         valor_total = round(valor_unitario * quantidade, 2)
-        valor_cashback = round(valor_total * 0.05, 2)
+        valor_cashback = round(valor_total * CASHBACK_PERCENTUAL, 2)
 
         # 🔹 Registra a venda
         cursor.execute("""
@@ -585,6 +1476,8 @@ def registrar_venda():
         id_cashback = cursor.fetchone()[0]
 
         con.commit()
+        marcar_alteracao('VENDAS', 'CASHBACKS', cursor=cursor)
+        feed_eventos.avisar()  # Os eventos da venda entram no feed sem esperar o intervalo
         return jsonify({
             "mensagem": "Venda registrada com sucesso!",
             "id_venda": id_venda,
@@ -602,11 +1495,151 @@ def registrar_venda():
     finally:
         cursor.close()
         con.close()
-@app.route('/cashbacks', methods=['GET'])
+def sql_checkout(qtd_itens):
+    """
+    Monta um EXECUTE BLOCK que tira até `qtd_itens` itens do carrinho e registra as vendas e cashbacks deles.
+    Parâmetros: id_cliente, id_vendedor e, para cada posição, id_item, id_produto, quantidade, valor_total,
+    valor_cashback. Posições com id_item NULL são puladas: o texto do comando é sempre o mesmo (preparado
+    uma vez só) e o último bloco de um carrinho é completado com NULLs.
+    Devolve uma linha (ID_ITEM, ID_VENDA, ID_CASHBACK) por item vendido. Item que o DELETE não encontrou
+    (outro checkout já confirmado levou) não vira venda nem linha: quem chama compara as contagens.
+    """
+    entradas = ["ID_CLIENTE INTEGER = ?", "ID_VENDEDOR INTEGER = ?"]
+    corpo = []
+    for i in range(qtd_itens):
+        entradas += [f"I{i} INTEGER = ?", f"P{i} INTEGER = ?", f"Q{i} INTEGER = ?",
+                     f"T{i} DECIMAL(18, 2) = ?", f"C{i} DECIMAL(18, 2) = ?"]
+        corpo.append(f"""
+            IF (:I{i} IS NOT NULL) THEN
+            BEGIN
+                ID_ITEM = :I{i};
+                DELETE FROM CARRINHO WHERE ID_ITEM = :I{i};
+                IF (ROW_COUNT = 1) THEN
+                BEGIN
+                    INSERT INTO VENDAS (ID_PRODUTO, ID_CLIENTE, ID_VENDEDOR, QUANTIDADE, VALOR_TOTAL)
+                    VALUES (:P{i}, :ID_CLIENTE, :ID_VENDEDOR, :Q{i}, :T{i})
+                    RETURNING ID_VENDA INTO :ID_VENDA;
+                    INSERT INTO CASHBACKS (ID_CLIENTE, ID_VENDA, VALOR_CASHBACK)
+                    VALUES (:ID_CLIENTE, :ID_VENDA, :C{i})
+                    RETURNING ID_CASHBACK INTO :ID_CASHBACK;
+                    SUSPEND;
+                END
+            END""")
+    return (f"EXECUTE BLOCK ({', '.join(entradas)})\n"
+            f"RETURNS (ID_ITEM INTEGER, ID_VENDA INTEGER, ID_CASHBACK INTEGER)\n"
+            f"AS\nBEGIN{''.join(corpo)}\nEND")
+SQL_CHECKOUT = sql_checkout(CHECKOUT_BLOCO)
+def conflito_concorrente(erro):
+    """True se o erro do Firebird é conflito com outra transação que mexeu nas mesmas linhas."""
+    return isinstance(erro, fdb.DatabaseError) and len(erro.args) > 2 and erro.args[2] in GDS_CONFLITOS
+@api.route('/carrinho/checkout', methods=['POST'])
+@token_obrigatorio()
+def checkout_carrinho():
+    """
+    💳 POST /carrinho/checkout
+    Transforma todo o carrinho do cliente do token em vendas (com cashback) e esvazia o carrinho,
+    tudo na mesma transação. Os preços vêm do cadastro de produtos, não do cliente.
+
+    JSON esperado (opcional):
+    {
+        "email_cliente": "cliente@teste.com"   # Só vendedor/adm fecham o carrinho de outro cliente
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    email_cliente, negado = cliente_autorizado(data)
+    if negado:
+        return negado
+
+    con = get_db_connection()
+    cursor = con.cursor()
+
+    try:
+        # 🔹 Cliente e vendedor padrão (token/cache de identidades; banco só na falha)
+        row_cliente = identificar_usuario(cursor, email_cliente)
+        if not row_cliente:
+            return jsonify({"erro": "Cliente não encontrado"}), 404
+        if row_cliente[1].strip().lower() != "cliente":
+            return jsonify({"erro": f"O e-mail '{email_cliente}' não pertence a um CLIENTE"}), 400
+        row_vendedor = identificar_usuario(cursor, VENDEDOR_PADRAO_EMAIL)
+        if not row_vendedor or row_vendedor[1].strip().lower() != "vendedor":
+            return jsonify({"erro": "Vendedor padrão não encontrado no banco"}), 404
+        id_cliente, id_vendedor = row_cliente[0], row_vendedor[0]
+
+        # 🔹 Itens do carrinho com o preço atual de cada produto
+        cursor.execute("""
+            SELECT C.ID_ITEM, C.ID_PRODUTO, C.QUANTIDADE, P.PRECO
+            FROM CARRINHO C
+            JOIN PRODUTOS P ON C.ID_PRODUTO = P.ID
+            WHERE C.ID_CLIENTE = ?
+        """, (id_cliente,))
+        itens = cursor.fetchall()
+        if not itens:
+            return jsonify({"erro": "Carrinho vazio"}), 400
+
+        # 🔹 Tira cada item do carrinho e registra a venda e o cashback dele, CHECKOUT_BLOCO itens por comando.
+        #    O DELETE vem antes dos INSERTs: com um checkout simultâneo do mesmo carrinho ainda aberto, este
+        #    esbarra no conflito de atualização; se o outro já confirmou, o DELETE não acha o item e o bloco
+        #    não vende nada para ele. Nos dois casos a transação inteira é desfeita (409)
+        totais = {}  # Por ID_ITEM (o mesmo produto pode estar em mais de uma linha do carrinho)
+        registros = []
+        for inicio in range(0, len(itens), CHECKOUT_BLOCO):
+            params = [id_cliente, id_vendedor]
+            for id_item, id_produto, quantidade, preco in itens[inicio:inicio + CHECKOUT_BLOCO]:
+                valor_total = round(float(preco) * quantidade, 2)
+                valor_cashback = round(valor_total * CASHBACK_PERCENTUAL, 2)
+                totais[id_item] = (id_produto, quantidade, valor_total, valor_cashback)
+                params += [id_item, id_produto, quantidade, valor_total, valor_cashback]
+            params += [None] * (2 + 5 * CHECKOUT_BLOCO - len(params))  # Completa o último bloco
+            cursor.execute(SQL_CHECKOUT, tuple(params))
+            registros += cursor.fetchall()  # Busca tudo para o bloco executar até o fim
+        if len(registros) != len(itens):
+            con.rollback()
+            return jsonify({"erro": "O carrinho foi alterado por outro checkout; confira e tente novamente"}), 409
+
+        con.commit()
+        marcar_alteracao('VENDAS', 'CASHBACKS', 'CARRINHO', cursor=cursor)
+        feed_eventos.avisar()
+
+        vendas = []
+        for id_item, id_venda, id_cashback in registros:
+            id_produto, quantidade, valor_total, valor_cashback = totais[id_item]
+            vendas.append({
+                "id_venda": id_venda,
+                "id_produto": id_produto,
+                "quantidade": quantidade,
+                "valor_total": valor_total,
+                "cashback": {
+                    "id_cashback": id_cashback,
+                    "valor_cashback": valor_cashback
+                }
+            })
+        return jsonify({
+            "mensagem": "Compra finalizada com sucesso!",
+            "vendas": vendas,
+            "valor_total": round(sum(v["valor_total"] for v in vendas), 2),
+            "cashback_total": round(sum(v["cashback"]["valor_cashback"] for v in vendas), 2)
+        }), 201
+
+    except Exception as e:
+        con.rollback()
+        if conflito_concorrente(e):
+            return jsonify({"erro": "O carrinho foi alterado por outro checkout; confira e tente novamente"}), 409
+        return jsonify({"erro": str(e)}), 500
+
+    finally:
+        cursor.close()
+        con.close()
+@api.route('/cashbacks', methods=['GET'])
+@condicional('CASHBACKS')
 def listar_cashbacks():
     """
     📈 GET /cashbacks
-    Lista todos os cashbacks gerados.
+    Lista os cashbacks gerados (mais recentes primeiro), enviando em streaming.
+
+    Parâmetros (query string, opcionais):
+    - data_inicio / data_fim: período de geração (AAAA-MM-DD, inclusivo)
+    - apos_id: só cashbacks com ID maior que este
+    - formato: "json" (lista, padrão) ou "ndjson" (um cashback por linha)
 
     Retorna:
     - ID do cashback
@@ -615,49 +1648,203 @@ def listar_cashbacks():
     - Valor do cashback
     - Data de geração do cashback
     """
+    try:
+        condicoes, valores = filtros_periodo("ID_CASHBACK", "DATA_GERACAO")
+    except ValueError:
+        return jsonify({"erro": "Filtros inválidos (use AAAA-MM-DD e apos_id numérico)"}), 400
+
     con = get_db_connection()  # Conecta ao banco de dados
     cursor = con.cursor()
 
-    # Query corrigida: comentário fora da query SQL
-    cursor.execute("""
+    # Ordena pelos cashbacks mais recentes
+    cursor.execute(sql_cashbacks(condicoes), tuple(valores))
+    return resposta_stream(con, cursor, cashback_para_dict)  # Lista de cashbacks em JSON, sem carregar tudo na memória
+def sql_cashbacks(condicoes):
+    return f"""
         SELECT ID_CASHBACK, ID_CLIENTE, ID_VENDA, VALOR_CASHBACK, DATA_GERACAO
         FROM CASHBACKS
+        {'WHERE ' + ' AND '.join(condicoes) if condicoes else ''}
         ORDER BY ID_CASHBACK DESC
-    """)
-    # Ordena pelos cashbacks mais recentes
+    """
+def cashback_para_dict(c):
+    return {
+        "id_cashback": c[0],
+        "id_cliente": c[1],
+        "id_venda": c[2],
+        "valor_cashback": float(c[3]),
+        "data_geracao": str(c[4])  # Formata a data de geração do cashback
+    }
+@api.route('/exportar/<tabela>', methods=['GET'])
+def exportar_tabela(tabela):
+    """
+    📦 GET /exportar/<vendas|cashbacks>
+    Exporta a tabela inteira (ou uma fatia) em streaming, com tipos preservados, para o financeiro.
 
-    linhas = cursor.fetchall()  # Pega todos os cashbacks registrados
+    Parâmetros (query string, opcionais):
+    - formato: "csv" (CSV em gzip, padrão), "parquet" ou "arrow" (stream IPC do Apache Arrow)
+    - data_inicio / data_fim: período (AAAA-MM-DD, inclusivo)
+    - apos_id: só registros com ID maior que este (sincronização incremental)
 
-    cursor.close()  # Fecha o cursor
-    con.close()  # Fecha a conexão com o banco
+    Retorna:
+    - O arquivo, em ordem crescente de ID (valores com 2 casas decimais exatas, datas como timestamp)
+    - Cabeçalho X-Ultimo-Id: marca consolidada, use como apos_id na próxima sincronização. Todo registro
+      com ID menor ou igual a ela já foi confirmado (e está no arquivo) ou desfeito: uma transação mais
+      lenta que pegou um ID menor nunca aparece depois dela (ver exportacao.marca_consolidada)
+    - 503 com Retry-After se uma transação de escrita longa impede fixar a marca dentro de EXPORTACAO_ESPERA
+    """
+    exportacao = EXPORTACOES.get(tabela)
+    if exportacao is None:
+        return jsonify({"erro": "Tabela não exportável (use vendas ou cashbacks)"}), 404
+    formato = request.args.get('formato', 'csv').lower()
+    if formato not in FORMATOS:
+        return jsonify({"erro": "Formato inválido (use csv, parquet ou arrow)"}), 400
+    if not formato_disponivel(formato):
+        return jsonify({"erro": f"Formato {formato} indisponível neste servidor"}), 501
+    try:
+        condicoes, valores = filtros_periodo(exportacao.coluna_id, exportacao.coluna_data)
+    except ValueError:
+        return jsonify({"erro": "Filtros inválidos (use AAAA-MM-DD e apos_id numérico)"}), 400
 
-    # Monta a resposta com os dados de cada cashback
-    resultado = []
-    for c in linhas:
-        resultado.append({
-            "id_cashback": c[0],
-            "id_cliente": c[1],
-            "id_venda": c[2],
-            "valor_cashback": float(c[3]),
-            "data_geracao": str(c[4])  # Formata a data de geração do cashback
-        })
+    con = get_db_connection()
+    cursor = con.cursor()
+
+    # Fixa o fim da fatia antes de começar: vendas registradas durante o envio ficam para a próxima
+    consolidada, ultimo_id = marca_consolidada(con, cursor, exportacao, condicoes, valores, EXPORTACAO_ESPERA)
+    if not consolidada:
+        cursor.close()
+        con.close()
+        return jsonify({"erro": "Há transações de escrita em andamento; tente novamente"}), 503, {'Retry-After': '5'}
+    if ultimo_id is None:
+        ultimo_id = int(request.args.get('apos_id') or 0)  # Nada novo: a próxima sincronização parte do mesmo ponto
+    cursor.execute(sql_exportacao(exportacao, condicoes + [f"{exportacao.coluna_id} <= ?"]),
+                   tuple(valores) + (ultimo_id,))
+
+    def lotes():
+        while True:
+            linhas = cursor.fetchmany(EXPORTACAO_LOTE)
+            if not linhas:
+                return
+            yield linhas
+
+    def gerar():
+        try:
+            yield from exportar(exportacao, formato, lotes())
+        finally:
+            cursor.close()
+            con.close()
+
+    mimetype, extensao, _ = FORMATOS[formato]
+    resposta = Response(stream_with_context(gerar()), mimetype=mimetype)
+    resposta.headers['Content-Disposition'] = f'attachment; filename="{tabela}.{extensao}"'
+    resposta.headers['X-Ultimo-Id'] = str(ultimo_id)
+    return resposta
+@api.route('/cashback/<cliente>/saldo', methods=['GET'])
+def saldo_cashback(cliente):
+    """
+    💰 GET /cashback/<cliente>/saldo
+    Retorna o saldo de cashback do cliente (e-mail ou ID), lido do saldo materializado.
+
+    Parâmetros:
+    - cliente: e-mail ou ID do cliente.
+    """
+    con = get_db_connection()
+    cursor = con.cursor()
+
+    try:
+        if cliente.isdigit():
+            id_cliente = int(cliente)
+        else:
+            row_cliente = identificar_usuario(cursor, cliente)
+            if not row_cliente:
+                return jsonify({"erro": "Cliente não encontrado"}), 404
+            id_cliente = row_cliente[0]
+
+        # Busca pela chave primária: não depende do tamanho do histórico
+        cursor.execute("SELECT SALDO, ATUALIZADO_EM FROM CASHBACK_SALDO WHERE ID_CLIENTE = ?", (id_cliente,))
+        row = cursor.fetchone()
+        return jsonify({
+            "id_cliente": id_cliente,
+            "saldo": float(row[0]) if row else 0.0,
+            "atualizado_em": str(row[1]) if row else None
+        }), 200
+
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+    finally:
+        cursor.close()
+        con.close()
+@api.route('/cashback/resgatar', methods=['POST'])
+@token_obrigatorio('cliente')
+def resgatar_cashback():
+    """
+    💰 POST /cashback/resgatar
+    Resgata parte do saldo de cashback do cliente autenticado (token JWT obrigatório).
+
+    JSON esperado:
+    {
+        "valor": 10.00   # Valor a resgatar
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        valor = round(float(data.get('valor', 0)), 2)
+    except (TypeError, ValueError):
+        valor = 0
+    if valor <= 0:
+        return jsonify({"erro": "Informe um valor positivo para resgatar"}), 400
+
+    id_cliente = g.usuario['user_id']
+    con = get_db_connection()
+    cursor = con.cursor()
+
+    try:
+        # Trava o saldo do cliente até o fim da transação (evita dois resgates do mesmo saldo)
+        cursor.execute("SELECT SALDO FROM CASHBACK_SALDO WHERE ID_CLIENTE = ? WITH LOCK", (id_cliente,))
+        row = cursor.fetchone()
+        saldo = float(row[0]) if row else 0.0
+        if saldo < valor:
+            con.rollback()
+            return jsonify({"erro": "Saldo insuficiente", "saldo": saldo}), 400
 
-    return jsonify(resultado)  # Retorna a lista de cashbacks em formato JSON
-@app.route('/carrinho/adicionar', methods=['POST'])
+        # O trigger do livro-razão desconta o saldo na mesma transação
+        cursor.execute("""
+            INSERT INTO CASHBACK_LANCAMENTOS (ID_CLIENTE, TIPO, VALOR)
+            VALUES (?, 'D', ?)
+            RETURNING ID, SALDO_APOS
+        """, (id_cliente, valor))
+        id_lancamento, saldo_apos = cursor.fetchone()
+        con.commit()
+        return jsonify({
+            "mensagem": "Cashback resgatado com sucesso!",
+            "id_lancamento": id_lancamento,
+            "valor": valor,
+            "saldo": float(saldo_apos)
+        }), 201
+
+    except Exception as e:
+        con.rollback()
+        return jsonify({"erro": str(e)}), 500
+    finally:
+        cursor.close()
+        con.close()
+@api.route('/carrinho/adicionar', methods=['POST'])
+@token_obrigatorio()
 def adicionar_ao_carrinho():
     """
     🛍️ POST /carrinho/adicionar
-    Adiciona um produto ao carrinho de um cliente.
+    Adiciona um produto ao carrinho do cliente do token.
 
     JSON esperado:
     {
-        "email_cliente": "cliente@teste.com",   # Email do cliente
+        "email_cliente": "cliente@teste.com",   # Opcional: só vendedor/adm mexem no carrinho de outro cliente
         "id_produto": 1,                         # ID do produto a ser adicionado
         "quantidade": 2                          # Quantidade do produto a ser adicionada
     }
     """
-    data = request.get_json()  # Recebe os dados enviados no corpo da requisição (em formato JSON)
-    email_cliente = data.get('email_cliente')
+    data = request.get_json(silent=True) or {}  # Recebe os dados enviados no corpo da requisição (em formato JSON)
+    email_cliente, negado = cliente_autorizado(data)  # Cliente do token (ou o informado por vendedor/adm)
+    if negado:
+        return negado
     id_produto = data.get('id_produto')
     quantidade = int(data.get('quantidade', 1))  # Pega a quantidade ou usa 1 como padrão
 
@@ -669,9 +1856,8 @@ def adicionar_ao_carrinho():
     cursor = con.cursor()
 
     try:
-        # Verifica se o cliente existe no banco de dados pelo e-mail
-        cursor.execute("SELECT ID_CADASTRO, CARGO FROM CADASTRO WHERE EMAIL = ?", (email_cliente,))
-        row_cliente = cursor.fetchone()
+        # Verifica se o cliente existe (token do próprio cliente dispensa a consulta ao banco)
+        row_cliente = identificar_usuario(cursor, email_cliente)
         if not row_cliente:
             return jsonify({"erro": "Cliente não encontrado"}), 404  # Cliente não encontrado no banco
         if row_cliente[1].strip().lower() != "cliente":
@@ -679,40 +1865,18 @@ def adicionar_ao_carrinho():
 
         id_cliente = row_cliente[0]  # ID do cliente
 
-        # Busca o produto no banco de dados pelo ID
-        cursor.execute("SELECT PRECO FROM PRODUTOS WHERE ID = ?", (id_produto,))
-        row_produto = cursor.fetchone()
-        if not row_produto:
+        # Busca o produto pelo ID (cache em memória; banco só se necessário)
+        produto = buscar_produto(id_produto, cursor)
+        if not produto:
             return jsonify({"erro": "Produto não encontrado"}), 404  # Produto não encontrado no banco
-        preco_unitario = float(row_produto[0])  # Preço unitário do produto
-
-        # Calcula o valor total do produto no carrinho (preço unitário * quantidade)
-        valor_total = round(preco_unitario * quantidade, 2)
+        preco_unitario = float(produto['preco'])  # Preço unitário do produto
 
-        # Verifica se o produto já está no carrinho do cliente
-        cursor.execute("""
-            SELECT ID_ITEM, QUANTIDADE, VALOR_TOTAL
-            FROM CARRINHO
-            WHERE ID_CLIENTE = ? AND ID_PRODUTO = ?
-        """, (id_cliente, id_produto))
-        existente = cursor.fetchone()
-
-        if existente:
-            # Se o produto já estiver no carrinho, atualiza a quantidade e o valor total
-            nova_qtd = existente[1] + quantidade
-            novo_total = round(preco_unitario * nova_qtd, 2)
-            cursor.execute("""
-                UPDATE CARRINHO SET QUANTIDADE = ?, VALOR_TOTAL = ?
-                WHERE ID_ITEM = ?
-            """, (nova_qtd, novo_total, existente[0]))  # Atualiza o item no banco
-        else:
-            # Caso contrário, insere o novo item no carrinho
-            cursor.execute("""
-                INSERT INTO CARRINHO (ID_CLIENTE, ID_PRODUTO, QUANTIDADE, VALOR_UNITARIO, VALOR_TOTAL)
-                VALUES (?, ?, ?, ?, ?)
-            """, (id_cliente, id_produto, quantidade, preco_unitario, valor_total))  # Insere no banco
+        # Soma ao item existente ou cria um novo, em um único comando (MERGE)
+        cursor.execute(SQL_CARRINHO_UPSERT, (id_cliente, int(id_produto), quantidade, preco_unitario))
 
         con.commit()  # Confirma a transação no banco
+        marcar_alteracao('CARRINHO', cursor=cursor)
+        feed_eventos.avisar()
         return jsonify({"mensagem": "Produto adicionado ao carrinho com sucesso!"}), 201  # Retorna sucesso
 
     except Exception as e:
@@ -721,7 +1885,83 @@ def adicionar_ao_carrinho():
     finally:
         cursor.close()  # Fecha o cursor do banco
         con.close()  # Fecha a conexão com o banco
-@app.route('/carrinho/<email_cliente>', methods=['GET'])
+@api.route('/carrinho/itens', methods=['POST'])
+@token_obrigatorio()
+def adicionar_itens_carrinho():
+    """
+    🛍️ POST /carrinho/itens
+    Adiciona vários produtos ao carrinho do cliente do token de uma só vez (uma transação).
+
+    JSON esperado:
+    {
+        "email_cliente": "cliente@teste.com",   # Opcional: só vendedor/adm mexem no carrinho de outro cliente
+        "itens": [
+            {"id_produto": 1, "quantidade": 2},
+            {"id_produto": 5, "quantidade": 1}
+        ]
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    email_cliente, negado = cliente_autorizado(data)
+    if negado:
+        return negado
+    itens = data.get('itens')
+
+    if not isinstance(itens, list) or not itens:
+        return jsonify({"erro": "Campos obrigatórios ausentes"}), 400
+    if len(itens) > CARRINHO_LOTE_MAX:
+        return jsonify({"erro": f"Máximo de {CARRINHO_LOTE_MAX} itens por requisição"}), 400
+
+    # Soma quantidades repetidas do mesmo produto
+    quantidades = {}
+    try:
+        for item in itens:
+            id_produto = int(item['id_produto'])
+            quantidade = int(item.get('quantidade', 1))
+            if quantidade <= 0:
+                raise ValueError
+            quantidades[id_produto] = quantidades.get(id_produto, 0) + quantidade
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({"erro": "Itens inválidos: informe id_produto e quantidade positiva"}), 400
+
+    con = get_db_connection()
+    cursor = con.cursor()
+
+    try:
+        row_cliente = identificar_usuario(cursor, email_cliente)
+        if not row_cliente:
+            return jsonify({"erro": "Cliente não encontrado"}), 404
+        if row_cliente[1].strip().lower() != "cliente":
+            return jsonify({"erro": "Somente clientes podem ter carrinho"}), 400
+        id_cliente = row_cliente[0]
+
+        # Todos os preços de uma vez (cache + um único SELECT ... IN para o que faltar)
+        produtos = buscar_produtos(quantidades.keys(), cursor)
+        faltando = [i for i in quantidades if i not in produtos]
+        if faltando:
+            return jsonify({"erro": "Produto(s) não encontrado(s)", "ids": faltando}), 404
+
+        # Todos os itens com o mesmo comando preparado, na mesma transação
+        cursor.executemany(SQL_CARRINHO_UPSERT, [
+            (id_cliente, id_produto, quantidade, float(produtos[id_produto]['preco']))
+            for id_produto, quantidade in quantidades.items()
+        ])
+        con.commit()
+        marcar_alteracao('CARRINHO', cursor=cursor)
+        feed_eventos.avisar()
+        return jsonify({
+            "mensagem": "Produtos adicionados ao carrinho com sucesso!",
+            "total_itens": len(quantidades)
+        }), 201
+
+    except Exception as e:
+        con.rollback()
+        return jsonify({"erro": str(e)}), 500
+    finally:
+        cursor.close()
+        con.close()
+@api.route('/carrinho/<email_cliente>', methods=['GET'])
+@condicional('CARRINHO', 'PRODUTOS', 'CADASTRO')  # CADASTRO: o e-mail pode mudar de dono
 def listar_carrinho(email_cliente):
     """
     📦 GET /carrinho/<email_cliente>
@@ -734,48 +1974,49 @@ def listar_carrinho(email_cliente):
     cursor = con.cursor()
 
     try:
-        # Verifica se o cliente existe no banco de dados
-        cursor.execute("SELECT ID_CADASTRO FROM CADASTRO WHERE EMAIL = ?", (email_cliente,))
-        row_cliente = cursor.fetchone()
+        # Verifica se o cliente existe (token do próprio cliente dispensa a consulta ao banco)
+        row_cliente = identificar_usuario(cursor, email_cliente)
         if not row_cliente:
             return jsonify({"erro": "Cliente não encontrado"}), 404  # Cliente não encontrado no banco
         id_cliente = row_cliente[0]
 
-        # Busca todos os itens no carrinho do cliente
-        cursor.execute("""
-            SELECT C.ID_ITEM, P.NOME, P.MARCA, C.QUANTIDADE, C.VALOR_UNITARIO, C.VALOR_TOTAL, C.DATA_ADICAO
-            FROM CARRINHO C
-            JOIN PRODUTOS P ON C.ID_PRODUTO = P.ID
-            WHERE C.ID_CLIENTE = ?
-            ORDER BY C.DATA_ADICAO DESC
-        """, (id_cliente,))
-
-        itens = cursor.fetchall()  # Pega todos os itens do carrinho
-        resultado = []
-        for i in itens:
-            # Monta a resposta em formato JSON para os itens do carrinho
-            resultado.append({
-                "id_item": i[0],
-                "nome_produto": i[1],
-                "marca": i[2],
-                "quantidade": i[3],
-                "valor_unitario": float(i[4]),
-                "valor_total": float(i[5]),
-                "data_adicao": str(i[6])  # Formata a data de adição para string
-            })
-
-        return jsonify({
-            "cliente": email_cliente,
-            "total_itens": len(resultado),  # Retorna a quantidade total de itens
-            "carrinho": resultado  # Retorna os itens no carrinho
-        })
+        return jsonify(ler_carrinho(cursor, email_cliente, id_cliente))
 
     except Exception as e:
         return jsonify({"erro": str(e)}), 500  # Retorna erro caso aconteça algum problema
     finally:
         cursor.close()  # Fecha o cursor do banco
         con.close()  # Fecha a conexão com o banco
-@app.route('/carrinho/remover/<int:id_item>', methods=['DELETE'])
+def ler_carrinho(cursor, email_cliente, id_cliente):
+    """Itens do carrinho do cliente no formato de GET /carrinho/<email_cliente>."""
+    # Busca todos os itens no carrinho do cliente
+    cursor.execute("""
+        SELECT C.ID_ITEM, P.NOME, P.MARCA, C.QUANTIDADE, C.VALOR_UNITARIO, C.VALOR_TOTAL, C.DATA_ADICAO
+        FROM CARRINHO C
+        JOIN PRODUTOS P ON C.ID_PRODUTO = P.ID
+        WHERE C.ID_CLIENTE = ?
+        ORDER BY C.DATA_ADICAO DESC
+    """, (id_cliente,))
+
+    itens = cursor.fetchall()  # Pega todos os itens do carrinho
+    resultado = []
+    for i in itens:
+        # Monta a resposta em formato JSON para os itens do carrinho
+        resultado.append({
+            "id_item": i[0],
+            "nome_produto": i[1],
+            "marca": i[2],
+            "quantidade": i[3],
+            "valor_unitario": float(i[4]),
+            "valor_total": float(i[5]),
+            "data_adicao": str(i[6])  # Formata a data de adição para string
+        })
+    return {
+        "cliente": email_cliente,
+        "total_itens": len(resultado),  # Retorna a quantidade total de itens
+        "carrinho": resultado  # Retorna os itens no carrinho
+    }
+@api.route('/carrinho/remover/<int:id_item>', methods=['DELETE'])
 def remover_item_carrinho(id_item):
     """
     🗑 DELETE /carrinho/remover/<id_item>
@@ -796,6 +2037,8 @@ def remover_item_carrinho(id_item):
         # Deleta o item do carrinho
         cursor.execute("DELETE FROM CARRINHO WHERE ID_ITEM = ?", (id_item,))
         con.commit()  # Confirma a exclusão no banco
+        marcar_alteracao('CARRINHO', cursor=cursor)
+        feed_eventos.avisar()
         return jsonify({"mensagem": "Item removido do carrinho com sucesso!"}), 200  # Retorna sucesso
 
     except Exception as e:
@@ -804,234 +2047,268 @@ def remover_item_carrinho(id_item):
     finally:
         cursor.close()  # Fecha o cursor do banco
         con.close()  # Fecha a conexão com o banco
+# ============================================================
+# 🔔 FEED DE ALTERAÇÕES (VENDAS, CASHBACKS E CARRINHO)
+# ============================================================
+def parametros_feed(args, ultimo_evento=None):
+    """
+    Lê desde (ou o cabeçalho Last-Event-ID, na reconexão do EventSource) e tabelas.
+    Retorna (desde ou None, conjunto de tabelas ou None). Lança ValueError se algum for inválido.
+    """
+    desde = args.get('desde') or ultimo_evento
+    tabelas = None
+    if args.get('tabelas'):
+        tabelas = {t.strip().lower() for t in args['tabelas'].split(',') if t.strip()}
+        if not tabelas <= {t.lower() for t in TABELAS_FEED}:
+            raise ValueError("tabelas")
+    return (int(desde) if desde else None), tabelas
+def evento_reinicio():
+    """Cliente atrasado além da retenção: avisa para ressincronizar pelas listagens (/vendas?apos_id=...)."""
+    return {"erro": "Eventos anteriores não estão mais disponíveis; ressincronize pelas listagens",
+            "ultimo_id": feed_eventos.ultimo_id}
+@api.route('/eventos', methods=['GET'])
+@token_obrigatorio()
+def eventos_long_poll():
+    """
+    🔔 GET /eventos (long-poll)
+    Devolve as alterações confirmadas depois de `desde`; se não houver nenhuma, espera até chegar
+    uma ou até `espera` segundos.
+
+    Exige token: clientes recebem só os próprios eventos; vendedor/adm recebem os de todos.
+
+    Parâmetros (query string, opcionais):
+    - desde: último ID de evento recebido (sem ele, só eventos a partir de agora)
+    - tabelas: vendas, cashbacks e/ou carrinho, separadas por vírgula (padrão: todas)
+    - espera: segundos de espera (máximo 25)
+
+    Retorna:
+    - eventos: lista (id, tabela, operacao, id_registro, id_cliente, id_produto, id_venda, quantidade, valor, data)
+    - ultimo_id: valor de `desde` para a próxima chamada
+    - 410 se `desde` é mais antigo que a retenção (ressincronize pelas listagens)
+    - 503 se o worker já tem FEED_LONG_POLLS_MAX long-polls esperando (cada um prende uma thread)
+    """
+    try:
+        desde, tabelas = parametros_feed(request.args)
+        espera = max(0.0, min(float(request.args.get('espera', FEED_ESPERA_MAX)), FEED_ESPERA_MAX))
+    except ValueError:
+        return jsonify({"erro": "Parâmetros inválidos (desde numérico, tabelas: vendas, cashbacks, carrinho)"}), 400
+    if feed_eventos.ultimo_id is None:
+        return jsonify({"erro": "Feed de eventos iniciando, tente novamente"}), 503, {'Retry-After': '2'}
+    if desde is None:
+        desde = feed_eventos.ultimo_id
+    id_cliente = cliente_do_feed(g.usuario)
+    if not long_polls_feed.acquire(blocking=False):
+        return jsonify({"erro": "Limite de long-polls atingido; tente novamente"}), 503, {'Retry-After': '2'}
+
+    try:
+        prazo = time.monotonic() + espera
+        while True:
+            eventos = feed_eventos.desde(desde, FEED_LOTE)
+            if eventos is None:
+                return jsonify(evento_reinicio()), 410
+            if eventos:
+                desde = eventos[-1]['id']  # Avança mesmo se o filtro descartar todos
+                eventos = filtrar(eventos, tabelas, id_cliente)
+                if eventos:
+                    return jsonify({'eventos': eventos, 'ultimo_id': desde})
+                continue
+            restante = prazo - time.monotonic()
+            if restante <= 0 or not feed_eventos.esperar(desde, restante) or feed_eventos.encerrado():
+                return jsonify({'eventos': [], 'ultimo_id': desde})
+    finally:
+        long_polls_feed.release()
+@api.route('/eventos/stream', methods=['GET'])
+@token_obrigatorio()
+def eventos_stream():
+    """
+    🔔 GET /eventos/stream (Server-Sent Events)
+    Mesmos parâmetros e token de GET /eventos (exceto espera); envia cada alteração assim que é confirmada.
+    - Token: no cabeçalho Authorization ou em ?token= (o EventSource do navegador não envia cabeçalhos)
+    - Reconexão: o navegador manda Last-Event-ID e recebe o que perdeu (do buffer ou da tabela)
+    - Cliente lento: o envio espera o cliente ler (o servidor não acumula nada por cliente)
+    - Cada worker WSGI aceita poucos streams (FEED_STREAMS_MAX); para muitos clientes, use o modo asgi.py
+    """
+    try:
+        desde, tabelas = parametros_feed(request.args, request.headers.get('Last-Event-ID'))
+    except ValueError:
+        return jsonify({"erro": "Parâmetros inválidos (desde numérico, tabelas: vendas, cashbacks, carrinho)"}), 400
+    if feed_eventos.ultimo_id is None:
+        return jsonify({"erro": "Feed de eventos iniciando, tente novamente"}), 503, {'Retry-After': '2'}
+    id_cliente = cliente_do_feed(g.usuario)
+    if not streams_feed.acquire(blocking=False):
+        return jsonify({"erro": "Limite de streams atingido; use GET /eventos (long-poll)"}), 503, {'Retry-After': '5'}
+    if desde is None:
+        desde = feed_eventos.ultimo_id
+
+    def gerar():
+        ultimo = desde
+        yield "retry: 2000\n\n"  # Intervalo de reconexão do EventSource (ms)
+        prazo = time.monotonic() + FEED_STREAM_DURACAO
+        while time.monotonic() < prazo and not feed_eventos.encerrado():
+            eventos = feed_eventos.desde(ultimo, FEED_LOTE)
+            if eventos is None:
+                yield f"event: reinicio\ndata: {json.dumps(evento_reinicio(), ensure_ascii=False)}\n\n"
+                return
+            if eventos:
+                ultimo = eventos[-1]['id']
+                texto = ''.join(formatar_sse(e) for e in filtrar(eventos, tabelas, id_cliente))
+                if texto:
+                    yield texto  # Só volta daqui quando o cliente consumir (backpressure pelo TCP)
+                continue
+            if not feed_eventos.esperar(ultimo, FEED_PING):
+                yield ": ping\n\n"
+
+    resposta = Response(stream_with_context(gerar()), mimetype='text/event-stream')
+    # A vaga volta quando o servidor fecha a resposta, mesmo que o gerador nunca chegue a rodar
+    resposta.call_on_close(streams_feed.release)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    resposta.headers['X-Accel-Buffering'] = 'no'  # nginx: não segurar o stream no buffer do proxy
+    return resposta
+def enviar_relatorio(nome):
+    """
+    Consulta os dados do relatório, e só gera o PDF se ele ainda não estiver em cache.
+    O hash dos dados vira o ETag: se o cliente já tem essa versão, responde 304 sem gerar nada.
+    """
+    titulo, colunas, sql, arquivo = RELATORIOS[nome]
+
+    con = get_db_connection()
+    cur = con.cursor()
+    cur.execute(sql)
+    linhas = cur.fetchall()
+    cur.close()
+    con.close()
+
+    etag = hash_relatorio(titulo, linhas)
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})  # Dados não mudaram
+
+    pdf_bytes = cache_relatorios.obter(etag)
+    if pdf_bytes is None:
+        pdf_bytes = renderizar_pdf(titulo, colunas, linhas)  # Gera em memória, sem arquivo compartilhado
+        cache_relatorios.guardar(etag, pdf_bytes)
+
+    resposta = send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf',
+                         as_attachment=True, download_name=arquivo, etag=etag, conditional=False)
+    resposta.cache_control.no_cache = True  # O navegador sempre revalida usando o ETag
+    return resposta
+@api.route('/relatorios/<dimensao>/<chave>', methods=['GET'])
+def resumo_vendas(dimensao, chave):
+    """
+    📊 GET /relatorios/<dimensao>/<chave>
+    Totais de vendas já calculados, sem percorrer a tabela VENDAS.
+    Dimensões:
+    - clientes/<id_cliente>: vendas, unidades, valor e cashback do cliente
+    - vendedores/<id_vendedor>: vendas, unidades e faturamento do vendedor
+    - produtos/<id_produto>: vendas, unidades vendidas e faturamento do produto
+    - dias/<AAAA-MM-DD>: vendas, unidades, faturamento e cashback do dia
+    """
+    tipo = DIMENSOES.get(dimensao)
+    if not tipo:
+        return jsonify({"erro": f"Dimensão inválida. Use: {', '.join(DIMENSOES)}"}), 404
+    try:
+        chave = datetime.date.fromisoformat(chave).isoformat() if tipo == 'DIA' else int(chave)
+    except ValueError:
+        return jsonify({"erro": "Chave inválida"}), 400
+
+    con = get_db_connection()
+    cursor = con.cursor()
+    try:
+        resumo = ler_resumo(cursor, tipo, chave)
+    finally:
+        cursor.close()
+        con.close()
+    return jsonify({"dimensao": dimensao, "chave": chave, **resumo}), 200
+def tarefa_relatorio(params):
+    """Job em segundo plano: consulta os dados e gera o PDF (em outro processo, se configurado)."""
+    nome = params['nome']
+    sql = RELATORIOS[nome][2]
+    con = pool.obter()  # Fora de requisição: pega direto do pool
+    try:
+        cur = con.cursor()
+        cur.execute(sql)
+        linhas = cur.fetchall()
+        cur.close()
+    finally:
+        con.close()
+    return fila_jobs.em_processo(renderizar_relatorio, nome, linhas)
+fila_jobs.registrar('relatorio', tarefa_relatorio)
+def iniciar_servicos(retomar_jobs=True):
+    """
+    Inicia as threads de fundo do processo. Chamar uma vez em cada worker, depois do fork
+    (threads e conexões não sobrevivem ao fork; ver gunicorn.conf.py).
+    `retomar_jobs` assume os jobs de workers que já saíram (ver FilaJobs.retomar_pendentes).
+    """
+    pool.apos_fork()  # Descarta conexões herdadas do processo pai (preload)
+    compactador_resumos.iniciar()
+    recarregador_busca.iniciar()  # Primeira carga do índice de busca em segundo plano
+    feed_eventos.iniciar()
+    if retomar_jobs:
+        fila_jobs.retomar_pendentes()
+@api.route('/pdf/<nome>/job', methods=['POST'])
+def enfileirar_relatorio(nome):
+    """
+     POST /pdf/<nome>/job
+    Coloca a geração do relatório (clientes, vendedores ou adms) na fila e responde na hora.
+    Retorna:
+        - id_job e a URL para acompanhar o status (202).
+    """
+    if nome not in RELATORIOS:
+        return jsonify({"erro": "Relatório não encontrado"}), 404
+    id_job = fila_jobs.enviar('relatorio', {'nome': nome})
+    return jsonify({
+        "mensagem": "Relatório enviado para a fila",
+        "id_job": id_job,
+        "status_url": f"/jobs/{id_job}",
+        "download_url": f"/jobs/{id_job}/download"
+    }), 202
+@api.route('/jobs/<id_job>', methods=['GET'])
+def status_job(id_job):
+    """
+     GET /jobs/<id_job>?esperar=<segundos>
+    Retorna a situação do job (pendente, executando, concluido ou erro).
+    Com esperar=N, segura a resposta até o job terminar ou N segundos passarem (long-poll).
+    """
+    try:
+        esperar = min(float(request.args.get('esperar', 0)), JOBS_ESPERA_MAX)
+    except ValueError:
+        return jsonify({"erro": "Parâmetro 'esperar' inválido"}), 400
+    job = fila_jobs.aguardar(id_job, esperar) if esperar > 0 else fila_jobs.status(id_job)
+    if not job:
+        return jsonify({"erro": "Job não encontrado"}), 404
+    return jsonify(job), 200
+@api.route('/jobs/<id_job>/download', methods=['GET'])
+def download_job(id_job):
+    """
+     GET /jobs/<id_job>/download
+    Baixa o arquivo gerado pelo job (409 enquanto ainda não terminou).
+    """
+    job = fila_jobs.status(id_job)
+    if not job:
+        return jsonify({"erro": "Job não encontrado"}), 404
+    if job['status'] != CONCLUIDO:
+        return jsonify({"erro": "Job ainda não concluído", "status": job['status']}), 409
+    nome_arquivo = RELATORIOS[job['params']['nome']][3]
+    return send_from_directory(JOBS_PASTA, job['arquivo'], mimetype='application/pdf',
+                               as_attachment=True, download_name=nome_arquivo)
 # ---------- CLIENTES ----------
-@app.route('/pdf/clientes', methods=['GET'])
+@api.route('/pdf/clientes', methods=['GET'])
 def pdf_clientes():
     try:
-        # Conecta no banco de dados
-        con = get_db_connection()
-        cur = con.cursor()
-        # Executa a consulta para buscar clientes ativos ou inativos ordenados por nome
-        cur.execute("""
-            SELECT ID_CADASTRO, NOME, EMAIL, ATIVO
-            FROM CADASTRO
-            WHERE UPPER(CARGO) = 'CLIENTE'
-            ORDER BY NOME
-        """)
-        usuarios = cur.fetchall()  # Busca todos os resultados da consulta
-        cur.close()  # Fecha cursor
-        con.close()  # Fecha conexão
-
-        pdf = FPDF()  # Cria objeto PDF
-        pdf.add_page()  # Adiciona uma página
-
-        # Define fonte para o título e escreve o título centralizado
-        pdf.set_font("Helvetica", "B", 18)
-        pdf.cell(0, 10, "Relatório de Clientes", ln=True, align="C")
-        pdf.ln(8)  # Adiciona espaço vertical
-
-        # Cabeçalho da tabela com fundo escuro e texto branco
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.set_fill_color(40, 40, 40)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_draw_color(70, 70, 70)
-        pdf.cell(20, 10, "ID", 1, 0, "C", True)
-        pdf.cell(60, 10, "NOME", 1, 0, "C", True)
-        pdf.cell(70, 10, "EMAIL", 1, 0, "C", True)
-        pdf.cell(30, 10, "STATUS", 1, 1, "C", True)
-
-        # Corpo da tabela com dados dos usuários
-        pdf.set_font("Helvetica", "B", 11)
-        fill = False  # Controle para alternar cor de fundo das linhas
-        for u in usuarios:
-            # Alterna cor de fundo entre azul claro e branco
-            pdf.set_fill_color(197, 220, 255) if fill else pdf.set_fill_color(255, 255, 255)
-            pdf.set_draw_color(60, 60, 60)  # Cor da borda da célula
-            pdf.set_text_color(0, 0, 0)  # Cor do texto padrão (preto)
-            # Preenchimento das células com dados
-            pdf.cell(20, 10, str(u[0]), 1, 0, "C", fill)  # ID
-            pdf.cell(60, 10, str(u[1]), 1, 0, "L", fill)  # Nome
-            pdf.cell(70, 10, str(u[2]), 1, 0, "L", fill)  # Email
-
-            # Define a cor e texto do status de acordo com o campo ATIVO
-            if u[3] == 1:
-                pdf.set_text_color(0, 180, 0)  # Verde para ativo
-                status = "ATIVO"
-            else:
-                pdf.set_text_color(200, 0, 0)  # Vermelho para inativo
-                status = "INATIVO"
-            pdf.cell(30, 10, status, 1, 1, "C", fill)  # Status da conta
-            fill = not fill  # Alterna a cor da linha
-
-        # Linha em branco e informações finais do relatório
-        pdf.ln(5)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font("Helvetica", "B", 12)
-        # Total de registros no relatório
-        pdf.cell(0, 10, f"Total de registros: {len(usuarios)}", ln=True)
-        # Data e hora de geração do relatório
-        pdf.cell(0, 10, f"Gerado em {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
-
-        # Define o caminho para salvar o arquivo PDF
-        caminho_pdf = os.path.join(os.getcwd(), "static", "relatorio_clientes.pdf")
-        pdf.output(caminho_pdf)  # Salva o arquivo PDF no caminho definido
-
-        # Envia o arquivo como anexo para download
-        return send_file(caminho_pdf, as_attachment=True)
-
+        return enviar_relatorio('clientes')
     except Exception as e:  # Em caso de erro, retorna um JSON com a mensagem
         return jsonify({"erro": str(e)}), 500
 # ---------- VENDEDORES ----------
-@app.route('/pdf/vendedores', methods=['GET'])
+@api.route('/pdf/vendedores', methods=['GET'])
 def pdf_vendedores():
     try:
-        # Conecta ao banco de dados
-        con = get_db_connection()
-        cur = con.cursor()
-        # Consulta os vendedores cadastrados
-        cur.execute("""
-            SELECT ID_CADASTRO, NOME, EMAIL, ATIVO
-            FROM CADASTRO
-            WHERE UPPER(CARGO) = 'VENDEDOR'
-            ORDER BY NOME
-        """)
-        usuarios = cur.fetchall()
-        cur.close()
-        con.close()
-
-        pdf = FPDF()
-        pdf.add_page()
-
-        # Título do relatório de vendedores
-        pdf.set_font("Helvetica", "B", 18)
-        pdf.cell(0, 10, "Relatório de Vendedores", ln=True, align="C")
-        pdf.ln(8)
-
-        # Cabeçalho da tabela dos vendedores
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.set_fill_color(40, 40, 40)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_draw_color(70, 70, 70)
-        pdf.cell(20, 10, "ID", 1, 0, "C", True)
-        pdf.cell(60, 10, "NOME", 1, 0, "C", True)
-        pdf.cell(70, 10, "EMAIL", 1, 0, "C", True)
-        pdf.cell(30, 10, "STATUS", 1, 1, "C", True)
-
-        # Dados dos vendedores na tabela
-        pdf.set_font("Helvetica", "B", 11)
-        fill = False
-        for u in usuarios:
-            # Alterna cores das linhas da tabela
-            pdf.set_fill_color(197, 220, 255) if fill else pdf.set_fill_color(255, 255, 255)
-            pdf.set_draw_color(60, 60, 60)
-            pdf.set_text_color(0, 0, 0)
-            # Dados ID, Nome e Email
-            pdf.cell(20, 10, str(u[0]), 1, 0, "C", fill)
-            pdf.cell(60, 10, str(u[1]), 1, 0, "L", fill)
-            pdf.cell(70, 10, str(u[2]), 1, 0, "L", fill)
-
-            # Define status ativo/inativo com cores
-            if u[3] == 1:
-                pdf.set_text_color(0, 180, 0)
-                status = "ATIVO"
-            else:
-                pdf.set_text_color(200, 0, 0)
-                status = "INATIVO"
-            pdf.cell(30, 10, status, 1, 1, "C", fill)
-            fill = not fill
-
-        # Dados finais e data de geração
-        pdf.ln(5)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.cell(0, 10, f"Total de registros: {len(usuarios)}", ln=True)
-        pdf.cell(0, 10, f"Gerado em {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
-
-        # Salva e envia o PDF dos vendedores
-        caminho_pdf = os.path.join(os.getcwd(), "static", "relatorio_vendedor.pdf")
-        pdf.output(caminho_pdf)
-
-        return send_file(caminho_pdf, as_attachment=True)
-
+        return enviar_relatorio('vendedores')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 # ---------- ADMINISTRADORES ----------
-@app.route('/pdf/adms', methods=['GET'])
+@api.route('/pdf/adms', methods=['GET'])
 def pdf_adms():
     try:
-        # Conexão com o banco para buscar administradores
-        con = get_db_connection()
-        cur = con.cursor()
-        cur.execute("""
-            SELECT ID_CADASTRO, NOME, EMAIL, ATIVO
-            FROM CADASTRO
-            WHERE UPPER(CARGO) = 'ADM'
-            ORDER BY NOME
-        """)
-        usuarios = cur.fetchall()
-        cur.close()
-        con.close()
-
-        pdf = FPDF()
-        pdf.add_page()
-
-        # Título do relatório de administradores
-        pdf.set_font("Helvetica", "B", 18)
-        pdf.cell(0, 10, "Relatório de Administradores", ln=True, align="C")
-        pdf.ln(8)
-
-        # Cabeçalho da tabela dos administradores
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.set_fill_color(40, 40, 40)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_draw_color(70, 70, 70)
-        pdf.cell(20, 10, "ID", 1, 0, "C", True)
-        pdf.cell(60, 10, "NOME", 1, 0, "C", True)
-        pdf.cell(70, 10, "EMAIL", 1, 0, "C", True)
-        pdf.cell(30, 10, "STATUS", 1, 1, "C", True)
-
-        # Linhas da tabela contendo dados
-        pdf.set_font("Helvetica", "B", 11)
-        fill = False
-        for u in usuarios:
-            pdf.set_fill_color(197, 220, 255) if fill else pdf.set_fill_color(255, 255, 255)
-            pdf.set_draw_color(60, 60, 60)
-            pdf.set_text_color(0, 0, 0)
-            # Detalhes ID, Nome e Email
-            pdf.cell(20, 10, str(u[0]), 1, 0, "C", fill)
-            pdf.cell(60, 10, str(u[1]), 1, 0, "L", fill)
-            pdf.cell(70, 10, str(u[2]), 1, 0, "L", fill)
-
-            # Status ativo ou inativo em cores distintas
-            if u[3] == 1:
-                pdf.set_text_color(0, 180, 0)
-                status = "ATIVO"
-            else:
-                pdf.set_text_color(200, 0, 0)
-                status = "INATIVO"
-            pdf.cell(30, 10, status, 1, 1, "C", fill)
-            fill = not fill
-
-        # Informação do total de registros e data de geração do arquivo
-        pdf.ln(5)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.cell(0, 10, f"Total de registros: {len(usuarios)}", ln=True)
-        pdf.cell(0, 10, f"Gerado em {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
-
-        # Caminho do arquivo PDF a ser salvo e enviado
-        caminho_pdf = os.path.join(os.getcwd(), "static", "relatorio_adms.pdf")
-        pdf.output(caminho_pdf)
-
-        # Envia arquivo para download
-        return send_file(caminho_pdf, as_attachment=True)
-
+        return enviar_relatorio('adms')
     except Exception as e:
         # Retorna erro em formato JSON caso tenha problema ao gerar relatório
         return jsonify({"erro": str(e)}), 500
-# ============================================================
-# 🚀 EXECUÇÃO DO SERVIDOR
-# ============================================================
-if __name__ == '__main__':
-    # Inicia servidor Flask na porta 5000 e permite debug para desenvolvimento
-    app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,361 @@
+# ==============================================
+#  ROTAS DE LEITURA EM ASYNCIO (QUART)
+# ==============================================
+# Versão assíncrona das rotas de leitura mais acessadas. A lógica (SQL, cache, formato da resposta)
+# é a mesma de view.py; só muda a espera pelo banco, que acontece no PoolAssincrono.
+from quart import Blueprint, request, jsonify, Response, g, make_response, current_app
+from quart.wrappers.response import DataBody
+from functools import wraps
+from db_async import PoolAssincrono
+from db_pool import PoolEsgotado
+from versoes import etag_versoes
+from compressao import COMPRESSAO_MINIMO, codificacoes_suportadas, compressivel, comprimir, CompressorStream
+from eventos import filtrar, formatar_sse
+from view import (pool, cache_catalogo, cache_produtos, AUSENTE, STREAM_LOTE, consulta_catalogo,
+                  ler_pagina_catalogo, buscar_produto, detalhe_produto, identidade_em_cache, identidade_no_banco,
+                  ler_carrinho, filtros_periodo, sql_vendas, venda_para_dict, sql_cashbacks, cashback_para_dict,
+                  FormatadorStream, formatador_mimetype, http_requisicoes, http_duracao, http_em_andamento,
+                  versoes_atuais, COMPRESSAO_ATIVA, feed_eventos, parametros_feed, evento_reinicio, FEED_LOTE,
+                  FEED_ESPERA_MAX, FEED_PING, claims_da_requisicao, cliente_do_feed)
+import asyncio
+import json
+import time
+
+ASYNC_THREADS = None  # Threads do executor do banco (None = tamanho do pool de conexões)
+FEED_STREAMS_MAX_ASYNC = 1000  # Streams SSE simultâneos por worker (cada um é só uma corrotina parada)
+
+api_async = Blueprint('api_async', __name__)
+pool_async = PoolAssincrono(pool, threads=ASYNC_THREADS)
+streams_ativos = 0
+
+
+class AvisoFeed:
+    """
+    Acorda as corrotinas que esperam o feed quando a thread do FeedEventos publica algo.
+    Cada publicação dispara o Event atual e o troca por um novo (quem pegou o antigo acorda).
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.evento = None
+
+    def preparar(self):
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.evento = asyncio.Event()
+            feed_eventos.inscrever(self._publicado)
+
+    def _publicado(self):
+        # Chamado na thread do feed: o Event só pode ser mexido dentro do event loop
+        self.loop.call_soon_threadsafe(self._acordar)
+
+    def _acordar(self):
+        evento, self.evento = self.evento, asyncio.Event()
+        evento.set()
+
+
+aviso_feed = AvisoFeed()
+
+
+@api_async.before_app_request
+async def iniciar_medicao():
+    g.inicio_requisicao = time.perf_counter()
+    http_em_andamento.somar(valor=1)
+
+
+@api_async.before_app_request
+async def carregar_usuario():
+    """Mesma regra de view.carregar_usuario: claims do token em g.usuario (None sem token válido)."""
+    g.usuario = claims_da_requisicao(request, current_app.config['SECRET_KEY'])
+
+
+def token_obrigatorio(func):
+    """Versão assíncrona de view.token_obrigatorio() (sem restrição de cargo)."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if g.get('usuario') is None:
+            return jsonify({"error": "Token de acesso obrigatório"}), 401
+        return await func(*args, **kwargs)
+    return wrapper
+
+
+@api_async.after_app_request
+async def finalizar_medicao(resposta):
+    """Mesmas métricas de view.py (nas rotas em streaming, mede até o início do envio)."""
+    if 'inicio_requisicao' in g:
+        rota = request.url_rule.rule if request.url_rule else 'sem_rota'
+        http_em_andamento.somar(valor=-1)
+        http_requisicoes.somar(rota, request.method, str(resposta.status_code))
+        http_duracao.observar(rota, request.method, valor=time.perf_counter() - g.pop('inicio_requisicao'))
+    return resposta
+
+
+@api_async.after_app_request
+async def comprimir_resposta(resposta):
+    """Mesma regra de view.comprimir_resposta; as rotas em streaming já comprimem em resposta_stream()."""
+    if (not COMPRESSAO_ATIVA or resposta.status_code != 200 or 'Content-Encoding' in resposta.headers
+            or not compressivel(resposta.mimetype)):
+        return resposta
+    resposta.vary.add('Accept-Encoding')
+    codificacao = request.accept_encodings.best_match(codificacoes_suportadas())
+    if codificacao is None or not isinstance(resposta.response, DataBody):
+        return resposta
+    dados = await resposta.get_data()
+    if len(dados) >= COMPRESSAO_MINIMO:
+        resposta.set_data(comprimir(dados, codificacao))
+        resposta.headers['Content-Encoding'] = codificacao
+    return resposta
+
+
+def condicional(*tabelas):
+    """Versão assíncrona de view.condicional: 304 sem executar a rota se o ETag do cliente ainda vale."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            versoes = await pool_async.executar(lambda cursor: versoes_atuais(tabelas, cursor))
+            if versoes is None:
+                return await func(*args, **kwargs)
+            etag = etag_versoes(versoes, request.full_path)
+            if request.if_none_match.contains_weak(etag):
+                resposta = Response('', status=304)
+            else:
+                g.versoes = versoes
+                resposta = await make_response(await func(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            resposta.set_etag(etag, weak=True)
+            resposta.cache_control.no_cache = True
+            return resposta
+        return wrapper
+    return decorator
+
+
+@api_async.errorhandler(PoolEsgotado)
+async def banco_ocupado(e):
+    return jsonify({"erro": "Servidor ocupado, tente novamente"}), 503, {'Retry-After': '1'}
+
+
+@api_async.route('/produtos', methods=['GET'])
+@condicional('PRODUTOS')
+async def lista_produtos():
+    """
+     GET /produtos (assíncrono)
+    Mesmos parâmetros e resposta de view.lista_produtos.
+    """
+    try:
+        consulta = consulta_catalogo(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    versoes = g.get('versoes')
+    pagina = cache_catalogo.obter((consulta, versoes))  # Acerto no cache responde sem passar pelo executor
+    if pagina is None:
+        pagina = await pool_async.executar(ler_pagina_catalogo, consulta, versoes)
+    produtos, next_cursor = pagina
+    return jsonify({'mensagem': 'Lista de produtos', 'produtos': produtos, 'next_cursor': next_cursor})
+
+
+@api_async.route('/produto/<int:id>', methods=['GET'])
+async def buscar_produto_id(id):
+    """
+     GET /produto/<id> (assíncrono)
+    """
+    produto = cache_produtos.obter(id)
+    if produto is None:
+        produto = await pool_async.executar(lambda cursor: buscar_produto(id, cursor))
+    if not produto:
+        return jsonify({'erro': 'Produto não encontrado'}), 404
+    return jsonify({'mensagem': 'Produto encontrado', 'produto': detalhe_produto(produto)}), 200
+
+
+@api_async.route('/carrinho/<email_cliente>', methods=['GET'])
+@condicional('CARRINHO', 'PRODUTOS', 'CADASTRO')  # CADASTRO: o e-mail pode mudar de dono
+async def listar_carrinho(email_cliente):
+    """
+     GET /carrinho/<email_cliente> (assíncrono)
+    """
+    identidade = identidade_em_cache(email_cliente)
+    if identidade is None:
+        return jsonify({"erro": "Cliente não encontrado"}), 404  # E-mail inexistente em cache: nem vai ao banco
+
+    def ler(cursor):
+        row_cliente = identidade if identidade is not AUSENTE else identidade_no_banco(cursor, email_cliente)
+        if not row_cliente:
+            return None
+        return ler_carrinho(cursor, email_cliente, row_cliente[0])
+
+    try:
+        carrinho = await pool_async.executar(ler)
+    except PoolEsgotado:
+        raise
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+    if carrinho is None:
+        return jsonify({"erro": "Cliente não encontrado"}), 404
+    return jsonify(carrinho)
+
+
+@api_async.route('/vendas', methods=['GET'])
+@condicional('VENDAS')
+async def listar_vendas():
+    """
+     GET /vendas (assíncrono, em streaming)
+    """
+    try:
+        condicoes, valores = filtros_periodo("ID_VENDA", "DATA_VENDA", request.args)
+    except ValueError:
+        return jsonify({"erro": "Filtros inválidos (use AAAA-MM-DD e apos_id numérico)"}), 400
+    return resposta_stream(sql_vendas(condicoes), tuple(valores), venda_para_dict)
+
+
+@api_async.route('/cashbacks', methods=['GET'])
+@condicional('CASHBACKS')
+async def listar_cashbacks():
+    """
+     GET /cashbacks (assíncrono, em streaming)
+    """
+    try:
+        condicoes, valores = filtros_periodo("ID_CASHBACK", "DATA_GERACAO", request.args)
+    except ValueError:
+        return jsonify({"erro": "Filtros inválidos (use AAAA-MM-DD e apos_id numérico)"}), 400
+    return resposta_stream(sql_cashbacks(condicoes), tuple(valores), cashback_para_dict)
+
+
+def resposta_stream(sql, valores, converter):
+    """
+    Executa a consulta e envia o resultado em lotes de STREAM_LOTE linhas.
+    A conexão fica emprestada durante o envio; enquanto o cliente lê devagar, só a corrotina espera.
+    Comprime cada lote (gzip/brotli) se o cliente aceitar.
+    """
+    ndjson = request.args.get('formato', 'json').lower() == 'ndjson'
+    codificacao = request.accept_encodings.best_match(codificacoes_suportadas()) if COMPRESSAO_ATIVA else None
+    compressor = CompressorStream(codificacao) if codificacao else None
+
+    async def gerar():
+        async with pool_async.conexao() as con:
+            cursor = await pool_async.rodar(con.cursor)
+            try:
+                await pool_async.rodar(cursor.execute, sql, valores)
+                formatador = FormatadorStream(converter, ndjson)
+                while True:
+                    linhas = await pool_async.rodar(cursor.fetchmany, STREAM_LOTE)
+                    if not linhas:
+                        break
+                    pedaco = formatador.lote(linhas).encode('utf-8')
+                    yield compressor.pedaco(pedaco) if compressor else pedaco
+                final = formatador.fim().encode('utf-8')
+                if compressor:
+                    yield compressor.pedaco(final) + compressor.fim()
+                elif final:
+                    yield final
+            finally:
+                await pool_async.rodar(cursor.close)
+
+    resposta = Response(gerar(), mimetype=formatador_mimetype(ndjson))
+    if compressor:
+        resposta.headers['Content-Encoding'] = codificacao
+        resposta.vary.add('Accept-Encoding')
+    return resposta
+
+
+async def proximos_eventos(desde):
+    """feed_eventos.desde() sem travar o event loop: o buffer é lido direto, a tabela só pelo executor."""
+    eventos = feed_eventos.recentes(desde, FEED_LOTE)
+    if eventos is None:
+        eventos = await pool_async.executar(feed_eventos.antigos, desde, FEED_LOTE)
+    return eventos
+
+
+async def esperar_evento(evento, timeout):
+    try:
+        await asyncio.wait_for(evento.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+@api_async.route('/eventos', methods=['GET'])
+@token_obrigatorio
+async def eventos_long_poll():
+    """
+     GET /eventos (assíncrono)
+    Mesmos parâmetros e resposta de view.eventos_long_poll; quem espera é uma corrotina, não uma thread.
+    """
+    try:
+        desde, tabelas = parametros_feed(request.args)
+        espera = max(0.0, min(float(request.args.get('espera', FEED_ESPERA_MAX)), FEED_ESPERA_MAX))
+    except ValueError:
+        return jsonify({"erro": "Parâmetros inválidos (desde numérico, tabelas: vendas, cashbacks, carrinho)"}), 400
+    if feed_eventos.ultimo_id is None:
+        return jsonify({"erro": "Feed de eventos iniciando, tente novamente"}), 503, {'Retry-After': '2'}
+    if desde is None:
+        desde = feed_eventos.ultimo_id
+    id_cliente = cliente_do_feed(g.usuario)
+    aviso_feed.preparar()
+
+    prazo = time.monotonic() + espera
+    while True:
+        evento = aviso_feed.evento  # Pego antes de ler: uma publicação no meio do caminho já o dispara
+        eventos = await proximos_eventos(desde)
+        if eventos is None:
+            return jsonify(evento_reinicio()), 410
+        if eventos:
+            desde = eventos[-1]['id']
+            eventos = filtrar(eventos, tabelas, id_cliente)
+            if eventos:
+                return jsonify({'eventos': eventos, 'ultimo_id': desde})
+            continue
+        restante = prazo - time.monotonic()
+        if restante <= 0 or not await esperar_evento(evento, restante) or feed_eventos.encerrado():
+            return jsonify({'eventos': [], 'ultimo_id': desde})
+
+
+@api_async.route('/eventos/stream', methods=['GET'])
+@token_obrigatorio
+async def eventos_stream():
+    """
+     GET /eventos/stream (assíncrono, Server-Sent Events)
+    Mesmo formato de view.eventos_stream, sem limite de duração: cada cliente é uma corrotina parada.
+    Cliente lento: o envio espera o cliente ler (o servidor não acumula nada por cliente).
+    """
+    try:
+        desde, tabelas = parametros_feed(request.args, request.headers.get('Last-Event-ID'))
+    except ValueError:
+        return jsonify({"erro": "Parâmetros inválidos (desde numérico, tabelas: vendas, cashbacks, carrinho)"}), 400
+    if feed_eventos.ultimo_id is None:
+        return jsonify({"erro": "Feed de eventos iniciando, tente novamente"}), 503, {'Retry-After': '2'}
+    if streams_ativos >= FEED_STREAMS_MAX_ASYNC:
+        return jsonify({"erro": "Limite de streams atingido; use GET /eventos (long-poll)"}), 503, {'Retry-After': '5'}
+    if desde is None:
+        desde = feed_eventos.ultimo_id
+    id_cliente = cliente_do_feed(g.usuario)
+    aviso_feed.preparar()
+
+    async def gerar():
+        global streams_ativos
+        ultimo = desde
+        streams_ativos += 1
+        try:
+            yield b"retry: 2000\n\n"
+            while not feed_eventos.encerrado():
+                evento = aviso_feed.evento
+                eventos = await proximos_eventos(ultimo)
+                if eventos is None:
+                    yield f"event: reinicio\ndata: {json.dumps(evento_reinicio(), ensure_ascii=False)}\n\n".encode()
+                    return
+                if eventos:
+                    ultimo = eventos[-1]['id']
+                    texto = ''.join(formatar_sse(e) for e in filtrar(eventos, tabelas, id_cliente))
+                    if texto:
+                        yield texto.encode('utf-8')
+                    continue
+                if not await esperar_evento(evento, FEED_PING):
+                    yield b": ping\n\n"
+        finally:
+            streams_ativos -= 1
+
+    resposta = Response(gerar(), mimetype='text/event-stream')
+    resposta.timeout = None  # Sem o limite de tempo de resposta do Quart: o stream fica aberto
+    resposta.headers['Cache-Control'] = 'no-cache'
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    return resposta
@@ -0,0 +1,10 @@
+"""
+Ponto de entrada WSGI para produção.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers, threads, timeouts e preload ficam em gunicorn.conf.py (valores em config.py).
+"""
+from aplicacao import criar_app
+
+app = criar_app()